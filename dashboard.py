@@ -3,9 +3,11 @@ import pandas as pd
 import os
 import json
 import textwrap
-from datetime import datetime
+import urllib.parse
+from datetime import datetime, timezone, timedelta
 from xscout.config.loader import config
 from xscout.database.manager import db_manager
+from xscout.database.cache import QueryCache
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -22,19 +24,79 @@ if "view" not in st.query_params:
 current_view = st.query_params["view"]
 
 # --- DATA HELPERS ---
-def load_leads():
-    if not db_manager.client: return pd.DataFrame()
-    try:
-        response = db_manager.client.table("leads").select("*").order("detected_at", desc=True).execute()
-        return pd.DataFrame(response.data) if response.data else pd.DataFrame()
-    except: return pd.DataFrame()
+FEED_PAGE_SIZE = config.get("dashboard.page_size", 20)
+
+@st.cache_resource
+def get_query_cache():
+    # One cache per server process, shared by every session and rerun.
+    # Entries are dropped when the table's watermark moves (agent wrote or
+    # updated rows), see db_manager.table_watermark.
+    return QueryCache(
+        db_manager.table_watermark,
+        ttl=config.get("dashboard.cache_ttl_seconds", 300),
+        watermark_interval=config.get("dashboard.watermark_check_seconds", 5)
+    )
+
+def load_lead_page(platform=None, intent=None, cursor=None):
+    """One page of feed rows; filtering and paging happen in the database."""
+    return get_query_cache().get_or_load(
+        "leads", ("page", platform, intent, cursor),
+        lambda: db_manager.query_leads(platform=platform, intent=intent, cursor=cursor, limit=FEED_PAGE_SIZE)
+    ) or ([], None)
+
+def count_leads(platform=None, intent=None, since=None):
+    return get_query_cache().get_or_load(
+        "leads", ("count", platform, intent, since),
+        lambda: db_manager.count_leads(platform=platform, intent=intent, since=since)
+    )
+
+def decode_cursor(value):
+    if not value or "|" not in value: return None
+    detected_at, last_id = value.rsplit("|", 1)
+    return (detected_at, last_id) if last_id.isdigit() else None
+
+def load_analytics(days=7):
+    """Summary for the analytics view, read from the precomputed rollup tables."""
+    today = datetime.now(timezone.utc).date()
+    day_list = [(today - timedelta(days=d)).isoformat() for d in range(days - 1, -1, -1)]
+    # Every rollup flush stamps scan_rollups.last_scan_at, including scans
+    # that stored no new leads
+    rollups = get_query_cache().get_or_load(
+        "scan_rollups", ("rollups", day_list[0]), lambda: db_manager.read_rollups(day_list[0])
+    ) or {"leads": [], "providers": [], "scans": []}
+
+    per_day = {day: 0 for day in day_list}
+    for row in rollups["leads"]:
+        if row["day"] in per_day: per_day[row["day"]] += row["leads"]
+    today_key, yesterday_key = day_list[-1], day_list[-2]
+    providers = [row for row in rollups["providers"] if row["day"] == today_key]
+    scans = next((row for row in rollups["scans"] if row["day"] == today_key), None)
+
+    searches = sum(row["searches"] for row in providers)
+    failures = sum(row["errors"] + row["rate_limits"] for row in providers)
+    return {
+        "series": [per_day[day] for day in day_list],
+        "today_leads": per_day[today_key],
+        "change_pct": ((per_day[today_key] - per_day[yesterday_key]) * 100 / per_day[yesterday_key]) if per_day[yesterday_key] else None,
+        # searches counts only the successful ones
+        "success_pct": (100.0 * searches / (searches + failures)) if searches + failures else None,
+        "rate_limits": sum(row["rate_limits"] for row in providers),
+        "scans": scans["scans"] if scans else 0,
+        "avg_scan": (scans["total_seconds"] / scans["scans"]) if scans and scans["scans"] else None,
+        "max_scan": scans["max_seconds"] if scans else None,
+        "last_scan_at": scans["last_scan_at"] if scans else None
+    }
+
+def chart_paths(series, width=400, height=150):
+    """SVG line and area paths for the daily leads chart."""
+    peak = max(series) or 1
+    step = width / max(len(series) - 1, 1)
+    points = [(i * step, height - 10 - (value / peak) * (height - 30)) for i, value in enumerate(series)]
+    line = "M" + " L".join(f"{x:.0f},{y:.0f}" for x, y in points)
+    return line, f"{line} L{width},{height} L0,{height} Z"
 
 def load_logs():
-    if not db_manager.client: return []
-    try:
-        response = db_manager.client.table("logs").select("*").order("timestamp", desc=True).limit(5).execute()
-        return response.data if response.data else []
-    except: return []
+    return get_query_cache().get_or_load("logs", ("recent", 5), lambda: db_manager.recent_logs(limit=5)) or []
 
 # --- STYLING (THE BRAINS) ---
 STYLE_BLOCK = textwrap.dedent("""
@@ -127,19 +189,23 @@ def get_nav_html(active_view_label):
     """
 
 def get_feed_html(is_saved=False):
-    df = load_leads()
     f_type = st.query_params.get("filter", "All")
+    intent_filter = st.query_params.get("intent")
+    cursor = decode_cursor(st.query_params.get("cursor"))
     
     if is_saved:
         title = "Saved Leads"
-        lead_count_text = f"{len(df)} leads bookmarked"
+        rows, next_cursor = load_lead_page(cursor=cursor)
+        lead_count_text = f"{count_leads() or 0} leads bookmarked"
         active_label = "Saved"
+        view = "saved"
     else:
         title = "System Status: Active"
-        lead_count_text = f"Last sync: 1m ago • {len(df)} leads found today"
+        rows, next_cursor = load_lead_page(platform=f_type, intent=intent_filter, cursor=cursor)
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0).isoformat()
+        lead_count_text = f"Last sync: 1m ago • {count_leads(since=today) or 0} leads found today"
         active_label = "Feed"
-        if f_type == "X": df = df[df['platform'].str.contains('Twitter|X', case=False, na=False)]
-        elif f_type == "LinkedIn": df = df[df['platform'].str.contains('LinkedIn', case=False, na=False)]
+        view = "feed"
         
     header = f"""
     <header class="sticky top-0 z-50 bg-[#101822]/80 ios-blur border-b border-slate-800">
@@ -166,10 +232,10 @@ def get_feed_html(is_saved=False):
     """
     
     cards = ""
-    if df.empty:
+    if not rows:
         cards = '<div class="p-8 text-center text-slate-500 font-medium">No leads found.</div>'
     else:
-        for i, row in df.iterrows():
+        for i, row in enumerate(rows):
             platform = row.get('platform', 'Twitter')
             is_li = "LinkedIn" in platform
             icon_box = f'<div class="w-8 h-8 rounded-full bg-[#0077b5] flex items-center justify-center text-white"><span class="material-symbols-outlined text-sm">hub</span></div>' if is_li else \
@@ -205,7 +271,7 @@ def get_feed_html(is_saved=False):
             </div>
             """
             
-            if not is_saved and i == 0:
+            if not is_saved and i == 0 and not cursor:
                 cards += """
                 <div class="p-2">
                     <div class="flex flex-col rounded-xl bg-[#1c2027] border border-slate-800/50 overflow-hidden">
@@ -222,6 +288,15 @@ def get_feed_html(is_saved=False):
                 </div>
                 """
                 
+    if next_cursor:
+        params = {"view": view, "filter": f_type, "cursor": f"{next_cursor[0]}|{next_cursor[1]}"}
+        if intent_filter: params["intent"] = intent_filter
+        cards += f"""
+        <div class="p-2">
+            <a href="?{urllib.parse.urlencode(params)}" target="_self" class="flex h-10 items-center justify-center rounded-xl bg-[#282f39] text-[#9da8b9] text-sm font-semibold no-underline">Load older leads</a>
+        </div>
+        """
+                
     nav = get_nav_html(active_label)
     return f"""
     <div class="bg-background-dark min-h-screen pb-32">
@@ -234,11 +309,26 @@ def get_feed_html(is_saved=False):
     """
 
 def get_details_html(lead_id):
-    df = load_leads()
-    lead_rows = df[df['post_id'].astype(str) == str(lead_id)]
-    if lead_rows.empty: return '<div class="p-8 text-center">Lead not found</div>'
-    row = lead_rows.iloc[0]
-    
+    row = db_manager.get_lead(lead_id)
+    if not row: return '<div class="p-8 text-center">Lead not found</div>'
+
+    # Reposts / cross-posts the agent linked to this lead instead of alerting again
+    duplicates = db_manager.get_duplicates(row.get('post_id'))
+    duplicates_html = ""
+    if duplicates:
+        items = "".join(
+            f'<a href="{d.get("profile_url") or "#"}" target="_blank" class="flex items-center gap-2 text-sm text-[#9da8b9] no-underline">'
+            f'<span class="material-symbols-outlined text-primary text-sm">content_copy</span> @{d.get("username")} • {d.get("platform")}</a>'
+            for d in duplicates
+        )
+        duplicates_html = f"""
+        <div class="px-4 pt-4">
+            <div class="bg-white/5 rounded-xl p-4 border border-white/10 space-y-2">
+                <p class="text-sm font-bold">Also posted {len(duplicates)} more time{'s' if len(duplicates) != 1 else ''}</p>
+                {items}
+            </div>
+        </div>"""
+
     return f"""
     <div class="bg-background-dark min-h-screen text-white max-w-[480px] mx-auto border-x border-slate-800 relative pb-40">
         <div class="sticky top-0 z-50 bg-[#101822]/80 ios-blur flex items-center p-4 justify-between border-b border-slate-800">
@@ -268,6 +358,7 @@ def get_details_html(lead_id):
                 </div>
             </div>
         </div>
+        {duplicates_html}
 
         <div class="p-4 pt-6 flex justify-between items-center">
             <h2 class="text-lg font-bold">Lead Insights</h2>
@@ -301,6 +392,21 @@ def get_details_html(lead_id):
 
 def get_analytics_html():
     logs = load_logs()
+    stats = load_analytics()
+    line_path, area_path = chart_paths(stats["series"])
+
+    synced = datetime.fromisoformat(stats["last_scan_at"]).strftime("%H:%M:%S") if stats["last_scan_at"] else "--:--:--"
+    success = stats["success_pct"]
+    if success is None:
+        health, health_color, health_note = "Idle", "slate-500", "no scans today"
+    elif success >= 95:
+        health, health_color, health_note = "Stable", "green-500", f"{success:.1f}% requests ok"
+    else:
+        health, health_color, health_note = "Degraded", "orange-500", f"{success:.1f}% ok • {stats['rate_limits']} rate limits"
+    change = stats["change_pct"]
+    change_badge = "" if change is None else f'<div class="bg-{"green" if change >= 0 else "red"}-500/10 text-{"green" if change >= 0 else "red"}-500 px-2 py-1 rounded text-xs font-bold">{change:+.0f}%</div>'
+    avg_scan = f'{stats["avg_scan"]:.1f}<span class="text-sm font-normal">s</span>' if stats["avg_scan"] is not None else "–"
+    max_scan = f'{stats["max_scan"]:.1f}s' if stats["max_scan"] is not None else "–"
     
     return f"""
     <div class="bg-background-dark min-h-screen text-white pb-32">
@@ -310,34 +416,34 @@ def get_analytics_html():
                     <span class="material-symbols-outlined text-primary">analytics</span>
                     <h2 class="text-lg font-bold">System Analytics</h2>
                 </div>
-                <div class="flex items-center gap-2"><span class="text-[10px] font-mono text-slate-400">SYNCED: 12:45:01</span><span class="material-symbols-outlined text-primary">sync</span></div>
+                <div class="flex items-center gap-2"><span class="text-[10px] font-mono text-slate-400">SYNCED: {synced}</span><span class="material-symbols-outlined text-primary">sync</span></div>
             </div>
         </div>
         
         <main class="max-w-md mx-auto p-4 space-y-4">
             <div class="grid grid-cols-2 gap-3">
                 <div class="bg-[#1c2027] p-4 rounded-xl border border-slate-800">
-                    <div class="flex justify-between items-start"><p class="text-xs text-[#9da8b9] uppercase">API Health</p><div class="h-2 w-2 rounded-full bg-green-500 animate-pulse"></div></div>
-                    <p class="text-2xl font-bold mt-1">Stable</p>
-                    <p class="text-[10px] text-green-500 font-bold mt-1">● 99.9% uptime</p>
+                    <div class="flex justify-between items-start"><p class="text-xs text-[#9da8b9] uppercase">API Health</p><div class="h-2 w-2 rounded-full bg-{health_color} animate-pulse"></div></div>
+                    <p class="text-2xl font-bold mt-1">{health}</p>
+                    <p class="text-[10px] text-{health_color} font-bold mt-1">● {health_note}</p>
                 </div>
                 <div class="bg-[#1c2027] p-4 rounded-xl border border-slate-800">
-                    <p class="text-xs text-[#9da8b9] uppercase">DB Storage</p>
-                    <p class="text-2xl font-bold mt-1">1.2<span class="text-sm font-normal">/5GB</span></p>
-                    <div class="w-full bg-slate-800 h-1.5 rounded-full mt-2"><div class="bg-primary h-1.5 rounded-full" style="width: 24%"></div></div>
+                    <p class="text-xs text-[#9da8b9] uppercase">Avg Scan</p>
+                    <p class="text-2xl font-bold mt-1">{avg_scan}</p>
+                    <p class="text-[10px] text-[#9da8b9] font-bold mt-1">{stats["scans"]} scans today • max {max_scan}</p>
                 </div>
             </div>
             
             <div class="bg-[#1c2027] p-4 rounded-xl border border-slate-800">
                 <div class="flex justify-between items-start">
-                    <div><p class="text-sm text-[#9da8b9] font-medium">Daily Lead Discovery</p><p class="text-3xl font-bold">142</p></div>
-                    <div class="bg-green-500/10 text-green-500 px-2 py-1 rounded text-xs font-bold">+12%</div>
+                    <div><p class="text-sm text-[#9da8b9] font-medium">Daily Lead Discovery</p><p class="text-3xl font-bold">{stats["today_leads"]}</p></div>
+                    {change_badge}
                 </div>
                 <div class="h-40 w-full mt-4">
                     <svg class="w-full h-full" preserveAspectRatio="none" viewBox="0 0 400 150">
                         <defs><linearGradient id="chartG" x1="0" x2="0" y1="0" y2="1"><stop offset="0%" stop-color="#136dec" stop-opacity="0.3"></stop><stop offset="100%" stop-color="#136dec" stop-opacity="0"></stop></linearGradient></defs>
-                        <path d="M0,120 C50,110 80,40 120,50 C160,60 200,130 240,110 C280,90 320,20 360,30 C380,35 400,60 400,60 L400,150 L0,150 Z" fill="url(#chartG)"></path>
-                        <path d="M0,120 C50,110 80,40 120,50 C160,60 200,130 240,110 C280,90 320,20 360,30 C380,35 400,60 400,60" fill="none" stroke="#136dec" stroke-width="3"></path>
+                        <path d="{area_path}" fill="url(#chartG)"></path>
+                        <path d="{line_path}" fill="none" stroke="#136dec" stroke-width="3"></path>
                     </svg>
                 </div>
             </div>
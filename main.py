@@ -1,16 +1,97 @@
+import os
+import socket
 import argparse
-from xscout.scheduler import XScoutScheduler
+import tempfile
+from xscout.config.loader import config
+from xscout.scheduler import XScoutScheduler, default_providers
+from xscout.database.manager import db_manager
+
+def replay_setup(path):
+    """Replay providers for a recording, plus an in-memory store and a
+    scratch state dir so replayed posts never reach real leads or indexes."""
+    from xscout.search_engine.replay import ReplayProvider
+    from xscout.database.manager import DatabaseManager
+    from xscout.database.backends.sqlite_backend import SQLiteBackend
+    config.set("app.state_dir", tempfile.mkdtemp(prefix="xscout-replay-"))
+    providers = [ReplayProvider.from_jsonl(path, name) for name in ReplayProvider.recorded_providers(path)]
+    return providers, DatabaseManager(backend=SQLiteBackend(":memory:"))
 
 def main():
     parser = argparse.ArgumentParser(description="XScout: Autonomous Lead Discovery Agent")
     parser.add_argument("--dry-run", action="store_true", help="Run without sending actual notifications")
+    parser.add_argument("--rescore", action="store_true", help="Re-score all stored leads with the current classifier rules and exit")
+    parser.add_argument("--resume", action="store_true", help="With --rescore: continue from the last checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="With --rescore: leads fetched per chunk")
+    parser.add_argument("--record", metavar="PATH", help="Append every search response to a JSONL file (replay with python -m xscout.benchmark --replay)")
+    parser.add_argument("--replay", metavar="PATH", help="Scan a --record recording instead of the live APIs (in-memory store, no real state touched)")
+    parser.add_argument("--once", action="store_true", help="Run a single scan cycle and exit")
+    parser.add_argument("--cycles", type=int, help="Run this many scan cycles back to back and exit")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=["cprofile", "sample"],
+                        help="Profile every scan cycle: cProfile .pstats (default) or sampled .folded stacks of all threads")
+    parser.add_argument("--profile-dir", help="Where --profile writes its files (default: <state_dir>/profiles)")
+    parser.add_argument("--profile-top", type=int, default=20, help="Functions listed in each --profile summary")
+    parser.add_argument("--worker", action="store_true",
+                        help="Distributed mode: claim provider x keyword tasks from the shared work table in the database")
+    parser.add_argument("--worker-id", help="With --worker: name of this worker in task leases (default: <host>-<pid>)")
     args = parser.parse_args()
 
-    agent = XScoutScheduler(dry_run=args.dry_run)
+    if args.rescore:
+        from xscout.rescore import rescore
+        try:
+            rescore(chunk_size=args.chunk_size, resume=args.resume, dry_run=args.dry_run)
+        finally:
+            db_manager.close()
+        return
+
+    # Resolved before --replay points state_dir at a scratch directory
+    profile_dir = args.profile_dir or config.state_path("profiles")
+    providers, db = None, None
+    if args.replay:
+        providers, db = replay_setup(args.replay)
+    elif args.record:
+        from xscout.search_engine.replay import RecordingProvider
+        providers = [RecordingProvider(provider, args.record) for provider in default_providers()]
+
+    table = None
+    if args.worker:
+        from xscout.database.work_table import create_work_table
+        table = create_work_table((db or db_manager).backend)
+        if table is None:
+            print("[!] --worker needs a database (database.backend) shared by all workers.")
+            db_manager.close()
+            return
+
+    agent = XScoutScheduler(dry_run=args.dry_run, providers=providers, db=db)
+    if args.profile:
+        from xscout.profiling import ScanProfiler
+        agent.profiler = ScanProfiler(
+            args.profile, profile_dir, top=args.profile_top
+        )
+    worker = None
+    if args.worker:
+        from xscout.worker import ScanWorker
+        worker = ScanWorker(agent, table, args.worker_id or f"{socket.gethostname()}-{os.getpid()}")
+    if db is None:
+        db_manager.start_replication()
     try:
-        agent.start()
+        if worker and (args.once or args.cycles):
+            for _ in range(args.cycles or 1):
+                worker.run_once()
+        elif worker:
+            worker.run()
+        elif args.once or args.cycles:
+            for _ in range(args.cycles or 1):
+                agent.scan()
+        else:
+            agent.start()
     except KeyboardInterrupt:
         print("\n[!] Stopping XScout Agent...")
+    finally:
+        # Deliver queued notifications, then flush buffered writes so nothing is lost
+        agent.stop()
+        if db is not None:
+            db.close()
+        db_manager.close()
 
 if __name__ == "__main__":
     main()
@@ -3,8 +3,13 @@
 # Force Rebuild 2
 
 echo "[StartScript] Launching XScout Agent..."
+# The agent writes the rollup tables through apply_rollups(), which the anon
+# key may not call: it gets the service role key, the dashboard keeps SUPABASE_KEY
+if [ -z "$SUPABASE_SERVICE_KEY" ]; then
+    echo "[StartScript] ! SUPABASE_SERVICE_KEY is not set; the agent cannot update analytics rollups with the anon key"
+fi
 # Use unbuffered output (-u) so logs appear in Railway immediately
-python -u main.py &
+SUPABASE_KEY="${SUPABASE_SERVICE_KEY:-$SUPABASE_KEY}" python -u main.py &
 
 echo "[StartScript] Waiting for agent to initialize..."
 sleep 5
@@ -3,8 +3,12 @@ echo Starting XScout Agent & Dashboard...
 echo Access the Dashboard at: http://localhost:8501
 echo To stop, press Ctrl+C in this window.
 
-:: Start the Agent in background
+:: Start the Agent in background, with the service role key if one is set
+:: (it writes the rollup tables; the dashboard keeps the anon key)
+set "ANON_KEY=%SUPABASE_KEY%"
+if defined SUPABASE_SERVICE_KEY set "SUPABASE_KEY=%SUPABASE_SERVICE_KEY%"
 start "XScout Agent" cmd /k ".\venv\Scripts\python main.py"
+set "SUPABASE_KEY=%ANON_KEY%"
 
 :: Start the Dashboard
 .\venv\Scripts\streamlit run dashboard.py
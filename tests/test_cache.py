@@ -0,0 +1,25 @@
+from xscout.database.cache import QueryCache
+
+
+def test_entries_are_dropped_when_the_watermark_moves():
+    marks = {"leads": 1}
+    cache = QueryCache(marks.get, watermark_interval=0)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return len(loads)
+
+    assert cache.get_or_load("leads", "count", loader) == 1
+    assert cache.get_or_load("leads", "count", loader) == 1
+    marks["leads"] = 2
+    assert cache.get_or_load("leads", "count", loader) == 2
+
+
+def test_failed_loads_are_not_cached():
+    cache = QueryCache(lambda table: 1, watermark_interval=0)
+    results = iter([None, [{"id": 1}]])
+
+    assert cache.get_or_load("logs", "recent", lambda: next(results)) is None
+    assert cache.get_or_load("logs", "recent", lambda: next(results)) == [{"id": 1}]
+    assert cache.get_or_load("logs", "recent", lambda: []) == [{"id": 1}]
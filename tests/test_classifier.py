@@ -0,0 +1,65 @@
+import pytest
+from xscout.nlp.classifier import DEFAULT_RULES, LeadClassifier
+
+
+def substring_score(text):
+    """Scoring before the compiled matcher: plain `in` checks per rule."""
+    text = text.lower()
+    if any(word in text for word in DEFAULT_RULES["negative_keywords"]):
+        return 0
+    score = 3 + 2 * sum(word in text for word in DEFAULT_RULES["high_intent_keywords"])
+    if any(phrase in text for phrase in DEFAULT_RULES["intent_phrases"]):
+        score += 2
+    return min(score, 10)
+
+
+# text, substring (word_boundary: none), prefix (default), word
+SCORES = [
+    ("Need a website, will pay well", 7, 7, 7),
+    ("We're launching a startup and urgently need a website, budget ready", 10, 10, 10),
+    ("Hiring a React developer, DM me", 0, 0, 0),
+    ("Looking for a job as a designer", 0, 0, 0),
+    ("Payment on delivery, need a quick landing page", 7, 7, 5),
+    # Rules only match at the start of a word under "prefix"...
+    ("Can you quote me for a repayment calculator?", 7, 5, 5),
+    ("I need an app for my taxpayer clients", 7, 5, 3),
+    ("Startups keep overhiring, we just need a website, budget is 2k", 0, 9, 7),
+    # ...but may run on to the end of it
+    ("Recruiters: I need a logo", 0, 0, 5),
+]
+
+CONTACTS = [
+    ("Message me or DM", "Request: DM/Inbox", "Request: DM/Inbox", "Request: DM/Inbox"),
+    ("dms open", "Request: DM/Inbox", "Request: DM/Inbox", "None"),
+    ("Ask the admin", "Request: DM/Inbox", "None", "None"),
+    ("mail jo@example.com", "Emails: jo@example.com", "Emails: jo@example.com", "Emails: jo@example.com"),
+]
+
+
+def classifier(boundary):
+    return LeadClassifier({"word_boundary": boundary})
+
+
+@pytest.mark.parametrize("text,substring,prefix,word", SCORES)
+def test_scores_by_word_boundary(text, substring, prefix, word):
+    assert substring_score(text) == substring
+    assert classifier("none").score_text(text) == substring
+    assert classifier("prefix").score_text(text) == prefix
+    assert classifier("word").score_text(text) == word
+
+
+@pytest.mark.parametrize("text,substring,prefix,word", CONTACTS)
+def test_contact_info_by_word_boundary(text, substring, prefix, word):
+    assert classifier("none").extract_contact_info(text) == substring
+    assert classifier("prefix").extract_contact_info(text) == prefix
+    assert classifier("word").extract_contact_info(text) == word
+
+
+def test_prefix_is_the_default():
+    assert LeadClassifier({}).word_boundary == "prefix"
+
+
+def test_analyze_many_matches_analyze():
+    texts = [row[0] for row in SCORES] + [None]
+    model = classifier("prefix")
+    assert model.analyze_many(texts) == [model.analyze(text or "") for text in texts]
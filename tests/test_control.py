@@ -0,0 +1,58 @@
+import json
+import urllib.request
+import urllib.error
+import pytest
+from xscout.control import ControlChannel, _is_loopback
+
+
+@pytest.fixture
+def start_channel():
+    channels = []
+
+    def start(**kwargs):
+        channel = ControlChannel(lambda: {"running": True}, port=0, **kwargs)
+        channels.append(channel)
+        return channel if channel.start() else None
+
+    yield start
+    for channel in channels:
+        channel.stop()
+
+
+def request(channel, method, path, token=None):
+    req = urllib.request.Request(f"http://127.0.0.1:{channel.port}{path}", method=method,
+                                 data=b"" if method == "POST" else None)
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_commands_need_the_token(start_channel):
+    channel = start_channel(token="s3cret")
+
+    assert request(channel, "POST", "/pause")[0] == 401
+    assert request(channel, "POST", "/pause", token="wrong")[0] == 401
+    assert request(channel, "POST", "/pause", token="s3cret") == (202, {"queued": "pause"})
+    assert channel.wait(timeout=1) == "pause"
+    assert channel.wait(timeout=0) is None
+    # Reads stay open, e.g. for a Prometheus scrape
+    assert request(channel, "GET", "/status") == (200, {"running": True})
+
+
+def test_no_token_on_loopback_accepts_commands(start_channel):
+    channel = start_channel()
+    assert request(channel, "POST", "/trigger") == (202, {"queued": "trigger"})
+
+
+def test_no_token_refuses_non_loopback_host(start_channel):
+    assert start_channel(host="0.0.0.0") is None
+    assert start_channel(host="0.0.0.0", token="s3cret") is not None
+
+
+def test_loopback_hosts():
+    assert all(_is_loopback(host) for host in ["127.0.0.1", "127.0.1.1", "::1", "localhost"])
+    assert not any(_is_loopback(host) for host in ["0.0.0.0", "192.168.1.5", "::", "agent.example.com"])
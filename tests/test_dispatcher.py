@@ -0,0 +1,114 @@
+import time
+from types import SimpleNamespace
+from xscout.notifications import dispatcher as dispatcher_module
+from xscout.notifications.dispatcher import NotificationDispatcher
+
+
+class FakeNotifier:
+    """send_digest() plays back `outcomes` in order (True/False, or an
+    exception to raise), then succeeds. Records every batch it was given."""
+
+    def __init__(self, outcomes=()):
+        self.outcomes = list(outcomes)
+        self.sent = []
+
+    def send_digest(self, leads, raise_errors=False):
+        self.sent.append([lead["post_id"] for lead in leads])
+        outcome = self.outcomes.pop(0) if self.outcomes else True
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_dispatcher(notifier, **kwargs):
+    delivered, failed = [], []
+    options = {"workers": 1, "backoff_base": 0, **kwargs}
+    dispatcher = NotificationDispatcher(
+        notifier,
+        on_delivered=lambda lead: delivered.append(lead["post_id"]),
+        on_failed=lambda lead: failed.append(lead["post_id"]),
+        **options
+    )
+    return dispatcher, delivered, failed
+
+
+def lead(post_id):
+    return {"post_id": post_id}
+
+
+def test_transient_failures_are_retried():
+    notifier = FakeNotifier([ConnectionError("reset"), TimeoutError("slow")])
+    dispatcher, delivered, failed = make_dispatcher(notifier, max_retries=3)
+    dispatcher.enqueue(lead("1"))
+    dispatcher.close()
+
+    assert notifier.sent == [["1"]] * 3
+    assert (delivered, failed) == (["1"], [])
+
+
+def test_gives_up_after_max_retries():
+    notifier = FakeNotifier([ConnectionError("down")] * 10)
+    dispatcher, delivered, failed = make_dispatcher(notifier, max_retries=2)
+    dispatcher.enqueue(lead("1"))
+    dispatcher.close()
+
+    assert len(notifier.sent) == 3
+    assert (delivered, failed) == ([], ["1"])
+
+
+def test_rejection_is_not_retried():
+    notifier = FakeNotifier([False])
+    dispatcher, delivered, failed = make_dispatcher(notifier, max_retries=3)
+    dispatcher.enqueue(lead("1"))
+    dispatcher.close()
+
+    assert notifier.sent == [["1"]]
+    assert (delivered, failed) == ([], ["1"])
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(dispatcher_module, "time", SimpleNamespace(sleep=sleeps.append, time=time.time))
+    # Always the top of the jitter range
+    monkeypatch.setattr(dispatcher_module, "random", SimpleNamespace(uniform=lambda low, high: high))
+    notifier = FakeNotifier([ConnectionError("down")] * 4)
+    dispatcher, delivered, _ = make_dispatcher(notifier, max_retries=4, backoff_base=1.0, backoff_max=3.0)
+    dispatcher.enqueue(lead("1"))
+    dispatcher.close()
+
+    assert sleeps == [1.0, 2.0, 3.0, 3.0]
+    assert delivered == ["1"]
+
+
+def test_digest_merges_leads_up_to_digest_max():
+    notifier = FakeNotifier()
+    dispatcher, delivered, _ = make_dispatcher(notifier, digest_window=60, digest_max=3)
+    for post_id in "12345":
+        dispatcher.enqueue(lead(post_id))
+    # The first three filled a digest; the last two wait for the window
+    dispatcher.queue.join()
+    assert notifier.sent == [["1", "2", "3"]]
+
+    dispatcher.close()
+    assert notifier.sent == [["1", "2", "3"], ["4", "5"]]
+    assert delivered == list("12345")
+    assert dispatcher.digest_timer is None
+
+
+def test_full_queue_reports_leads_as_not_notified():
+    # No workers: nothing drains the queue
+    dispatcher, delivered, failed = make_dispatcher(FakeNotifier(), workers=0, queue_size=1)
+    dispatcher.enqueue(lead("1"))
+    dispatcher.enqueue(lead("2"))
+    assert failed == ["2"]
+    dispatcher.close()
+
+
+def test_enqueue_after_close_fails_the_lead():
+    notifier = FakeNotifier()
+    dispatcher, delivered, failed = make_dispatcher(notifier)
+    dispatcher.close()
+    dispatcher.enqueue(lead("1"))
+
+    assert notifier.sent == []
+    assert failed == ["1"]
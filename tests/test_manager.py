@@ -0,0 +1,138 @@
+import json
+import pytest
+from xscout.config.loader import config
+from xscout.database.manager import DatabaseManager
+from xscout.database.backends.sqlite_backend import SQLiteBackend
+
+
+class FlakyBackend:
+    """SQLite backend whose next `failures` writes raise. Stays open after
+    close() so tests can inspect what was written."""
+
+    def __init__(self, failures=0, on_upsert=None):
+        self.db = SQLiteBackend(":memory:")
+        self.name = "Flaky"
+        self.failures = failures
+        self.on_upsert = on_upsert
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    def _write(self, method, rows):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unreachable")
+        getattr(self.db, method)(rows)
+
+    def upsert_leads(self, rows):
+        if self.on_upsert:
+            self.on_upsert()
+        self._write("upsert_leads", rows)
+
+    def upsert_duplicates(self, rows):
+        self._write("upsert_duplicates", rows)
+
+    def mark_notified(self, post_ids):
+        self._write("mark_notified", post_ids)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def settings(tmp_path, monkeypatch):
+    # No background flushes during a test: only explicit flush()/close()
+    monkeypatch.setattr(config, "flat", {
+        **config.flat, "app.state_dir": str(tmp_path), "database.flush_interval_seconds": 3600
+    })
+
+
+def lead(post_id):
+    return {"platform": "Twitter", "post_id": post_id, "post_text": f"post {post_id}",
+            "intent_score": 80, "intent_label": "High"}
+
+
+def test_close_drains_leads_duplicates_flags_and_logs():
+    backend = FlakyBackend()
+    db = DatabaseManager(backend=backend)
+    db.add_lead(lead("1"))
+    db.add_lead(lead("2"))
+    db.mark_notified("2")
+    db.add_duplicate(lead("3"), "1", 2)
+    db.log("INFO", "scan done")
+
+    db.close()
+
+    assert backend.count_leads(None, None, None) == 2
+    assert backend.get_lead("2", ["notified"]) == {"notified": True}
+    assert [row["post_id"] for row in backend.get_duplicates("1", 10)] == ["3"]
+    assert [row["message"] for row in backend.recent_logs(10)] == ["scan done"]
+    assert not db._pending_leads and not db._pending_duplicates and not db._pending_notified
+
+
+def test_failed_flush_spills_and_next_start_replays(tmp_path):
+    down = FlakyBackend(failures=100)
+    db = DatabaseManager(backend=down)
+    db.add_lead(lead("1"))
+    db.mark_notified("1")
+    db.mark_notified("stored-earlier")
+    db.add_duplicate(lead("2"), "1", 1)
+
+    db.close()
+
+    spill = tmp_path / "pending_writes.json"
+    pending = json.loads(spill.read_text())
+    assert [(row["post_id"], row["notified"]) for row in pending["leads"]] == [("1", True)]
+    assert [row["post_id"] for row in pending["duplicates"]] == ["2"]
+    assert pending["notified"] == ["stored-earlier"]
+    assert down.count_leads(None, None, None) == 0
+
+    backend = FlakyBackend()
+    restarted = DatabaseManager(backend=backend)
+    assert not spill.exists()
+    assert restarted.lead_exists("1")
+    assert restarted.flush()
+    assert backend.get_lead("1", ["notified"]) == {"notified": True}
+    assert [row["post_id"] for row in backend.get_duplicates("1", 10)] == ["2"]
+    restarted.close()
+
+
+def test_failed_batch_is_retried_on_next_flush():
+    backend = FlakyBackend(failures=1)
+    db = DatabaseManager(backend=backend)
+    db.add_lead(lead("1"))
+
+    assert not db.flush()
+    assert db.lead_exists("1")
+    assert db.flush()
+    assert backend.count_leads(None, None, None) == 1
+    db.close()
+
+
+def test_mark_notified_on_buffered_lead():
+    backend = FlakyBackend()
+    db = DatabaseManager(backend=backend)
+    db.add_lead(lead("1"))
+    db.mark_notified("1")
+    # Seen again before the flush: must not clear the flag
+    db.add_lead(lead("1"))
+
+    assert db.flush()
+    assert backend.get_lead("1", ["notified"]) == {"notified": True}
+    db.close()
+
+
+def test_mark_notified_while_failed_upsert_is_in_flight():
+    db = None
+    # The lead is notified while its upsert is running, that upsert fails,
+    # and so does the retry
+    backend = FlakyBackend(failures=2, on_upsert=lambda: db.mark_notified("1"))
+    db = DatabaseManager(backend=backend)
+    db.add_lead(lead("1"))
+
+    assert not db.flush()
+    backend.on_upsert = None
+    assert not db.flush()
+    assert db.flush()
+    assert backend.get_lead("1", ["notified"]) == {"notified": True}
+    db.close()
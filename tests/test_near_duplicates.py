@@ -0,0 +1,100 @@
+import random
+from xscout.nlp.near_duplicates import NearDuplicateIndex
+
+POST = ("Looking for a freelance developer to build an online store for our bakery, "
+        "with card payments and delivery booking. Budget is flexible, DM me")
+
+
+def flip(fingerprint, bits):
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_reposts_and_cross_posts_match_exactly(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "nd.bin"))
+    index.add("original", index.fingerprint(POST))
+
+    repost = f"RT @bakery_owner: {POST} https://t.co/abc123 #webdev"
+    assert index.find(index.fingerprint(repost)) == ("original", 0)
+    assert index.fingerprint("need a website") is None
+
+
+def test_every_fingerprint_within_max_distance_is_found(tmp_path):
+    rng = random.Random(7)
+    index = NearDuplicateIndex(str(tmp_path / "nd.bin"), max_distance=7)
+    stored = rng.getrandbits(64)
+    index.add("stored", stored)
+    for _ in range(10000):
+        index.add("noise", rng.getrandbits(64))
+
+    for distance in range(8):
+        for _ in range(50):
+            query = flip(stored, rng.sample(range(64), distance))
+            assert index.find(query) == ("stored", distance)
+
+
+def test_distant_fingerprints_do_not_match(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "nd.bin"), max_distance=3)
+    index.add("stored", 0)
+    assert index.find(flip(0, range(4))) is None
+    assert index.find(flip(0, range(3))) == ("stored", 3)
+
+
+def test_ring_buffer_overwrites_oldest_entries(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "nd.bin"), max_entries=3)
+    fingerprints = [random.Random(i).getrandbits(64) for i in range(8)]
+    for i, fingerprint in enumerate(fingerprints):
+        index.add(f"post-{i}", fingerprint)
+
+    assert len(index) == 3
+    for i, fingerprint in enumerate(fingerprints):
+        found = index.find(fingerprint)
+        assert found == ((f"post-{i}", 0) if i >= 5 else None)
+
+
+def test_crowded_bucket_keeps_newest_entries(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "nd.bin"), max_bucket_scan=2)
+    for i in range(5):
+        index.add(f"post-{i}", 0)
+    index.add("other", flip(0, range(0, 64, 2)))
+
+    assert all(len(bucket[0]) <= 4 for table in index.tables for bucket in table.values())
+    assert index.find(0) == ("post-3", 0)
+    assert index.find(flip(0, range(0, 64, 2))) == ("other", 0)
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    index = NearDuplicateIndex(str(tmp_path / "nd.bin"), max_age=60)
+    index.add("old", 12345, at=1000.0)
+    assert index.find(12345, now=1030.0) == ("old", 0)
+    assert index.find(12345, now=1100.0) is None
+
+
+def test_save_and_load_keep_newest_entries_in_order(tmp_path):
+    path = str(tmp_path / "state" / "nd.bin")
+    index = NearDuplicateIndex(path, max_entries=4)
+    fingerprints = [random.Random(i).getrandbits(64) for i in range(6)]
+    for i, fingerprint in enumerate(fingerprints):
+        index.add(f"post-{i}", fingerprint)
+    index.save()
+
+    loaded = NearDuplicateIndex(path, max_entries=4)
+    assert loaded.load() == 4
+    assert [loaded.find(fp) for fp in fingerprints] == [None, None] + [(f"post-{i}", 0) for i in range(2, 6)]
+
+    # After a reload the next insert still replaces the oldest entry
+    loaded.add("post-6", 42)
+    assert loaded.find(fingerprints[2]) is None
+    assert loaded.find(fingerprints[3]) == ("post-3", 0)
+
+    smaller = NearDuplicateIndex(path, max_entries=2)
+    assert smaller.load() == 2
+    assert smaller.find(fingerprints[5]) == ("post-5", 0)
+    assert smaller.find(fingerprints[3]) is None
+
+
+def test_load_rejects_other_files(tmp_path):
+    path = tmp_path / "nd.bin"
+    path.write_bytes(b"not an index")
+    assert NearDuplicateIndex(str(path)).load() == 0
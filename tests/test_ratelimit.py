@@ -0,0 +1,138 @@
+import time
+from types import SimpleNamespace
+import pytest
+from xscout.search_engine import ratelimit
+from xscout.search_engine.ratelimit import RateLimiter, RateLimitExceeded, TokenBucket
+
+
+class FakeClock:
+    """Stands in for the time module: time() and monotonic() only move when
+    the test (or a sleep) advances them."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+
+class Settings(dict):
+    def get(self, key, default=None):
+        return super().get(key, default)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+
+def provider(name="twitter", rate_limit=(60, 15 * 60)):
+    return SimpleNamespace(name=name, rate_limit=rate_limit)
+
+
+def test_bucket_spends_capacity_then_waits_for_refill(clock):
+    bucket = TokenBucket(3, 30)  # one token per 10s
+
+    assert [bucket.reserve(max_wait=60) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve(max_wait=60) == pytest.approx(10)
+    # That token is taken: the next one is 10s further out
+    assert bucket.wait_time() == pytest.approx(20)
+
+    clock.now += 25
+    assert bucket.wait_time() == pytest.approx(0)
+    assert bucket.reserve(max_wait=0) == 0.0
+
+
+def test_refill_never_exceeds_capacity(clock):
+    bucket = TokenBucket(2, 10)
+    clock.now += 3600
+    assert [bucket.reserve(max_wait=0) for _ in range(3)] == [0.0, 0.0, None]
+
+
+def test_reserve_over_max_wait_reserves_nothing(clock):
+    bucket = TokenBucket(1, 100)
+    bucket.reserve(max_wait=0)
+
+    assert bucket.reserve(max_wait=50) is None
+    assert bucket.wait_time() == pytest.approx(100)
+
+
+def test_reset_header_blocks_until_reset_then_restores_full_window(clock):
+    bucket = TokenBucket(10, 100)
+    bucket.reserve(max_wait=0)
+
+    bucket.block_until(clock.now + 40)
+    assert bucket.wait_time() == pytest.approx(40)
+    clock.now += 39
+    assert bucket.reserve(max_wait=0) is None
+
+    clock.now += 1
+    assert [bucket.reserve(max_wait=0) for _ in range(10)] == [0.0] * 10
+    assert bucket.reserve(max_wait=0) is None
+
+
+def test_earlier_reset_does_not_shorten_a_block(clock):
+    bucket = TokenBucket(10, 100)
+    bucket.block_until(clock.now + 60)
+    bucket.block_until(clock.now + 10)
+    assert bucket.wait_time() == pytest.approx(60)
+
+
+def test_limiter_sleeps_through_short_waits(clock):
+    limiter = RateLimiter(Settings({"rate_limits.twitter.requests": 2, "rate_limits.twitter.window_seconds": 20}))
+    twitter = provider()
+
+    for _ in range(3):
+        limiter.acquire(twitter)
+
+    assert clock.slept == [pytest.approx(10)]
+
+
+def test_limiter_caps_waits_at_30_seconds_by_default(clock):
+    limiter = RateLimiter(Settings())
+    assert limiter.max_wait == 30
+    twitter = provider(rate_limit=(1, 60))  # next token in 60s
+
+    limiter.acquire(twitter)
+    assert not limiter.can_wait(twitter)
+    with pytest.raises(RateLimitExceeded) as error:
+        limiter.acquire(twitter)
+
+    assert error.value.local
+    assert error.value.provider == "twitter"
+    assert error.value.reset_at == pytest.approx(clock.now + 60)
+    assert clock.slept == []
+
+
+def test_limiter_honours_429_reset_and_default_backoff(clock):
+    limiter = RateLimiter(Settings({"rate_limits.max_wait_seconds": 1000,
+                                    "rate_limits.default_backoff_seconds": 120}))
+    twitter, linkedin = provider(), provider("linkedin", (30, 900))
+
+    limiter.record_rate_limited(twitter, reset_at=clock.now + 45)
+    limiter.record_rate_limited(linkedin)
+    limiter.acquire(twitter)
+    limiter.acquire(linkedin)
+
+    assert clock.slept == [pytest.approx(45), pytest.approx(120 - 45)]
+
+
+def test_unconfigured_provider_is_effectively_unlimited(clock):
+    limiter = RateLimiter(Settings())
+    replay = provider("replay", rate_limit=None)
+    for _ in range(1000):
+        limiter.acquire(replay)
+    assert clock.slept == []
@@ -0,0 +1,54 @@
+import pytest
+from xscout.search_engine.replay import RecordingProvider, ReplayProvider
+from xscout.search_engine.ratelimit import RateLimitExceeded
+
+
+def post(post_id):
+    return {"platform": "Twitter", "post_id": post_id, "post_text": f"post {post_id}",
+            "username": "someone", "profile_url": "https://example.com", "timestamp": None}
+
+
+class CursorReplay(ReplayProvider):
+    def cursor_from(self, results):
+        return max((p["post_id"] for p in results), default=None)
+
+
+def test_recorded_calls_replay_in_order(tmp_path):
+    path = str(tmp_path / "calls.jsonl")
+    source = CursorReplay("twitter", pages=[
+        ("need a website", [post("1"), post("2")]),
+        ("need a website", {"error": "server error"}),
+        ("hire developer", {"rate_limited": {"reset_at": None}}),
+        ("hire developer", [post("3")]),
+    ])
+    recorder = RecordingProvider(source, path)
+
+    stream = recorder.stream("need a website", since="0")
+    assert next(stream) == [post("1"), post("2")]
+    with pytest.raises(StopIteration) as stop:
+        next(stream)
+    assert stop.value.value == "2"
+    with pytest.raises(Exception, match="server error"):
+        recorder.search("need a website")
+    with pytest.raises(RateLimitExceeded):
+        recorder.search("hire developer")
+    assert recorder.search("hire developer") == [post("3")]
+
+    assert ReplayProvider.recorded_providers(path) == ["twitter"]
+    replay = ReplayProvider.from_jsonl(path, "twitter")
+    assert replay.pending() == 4
+    assert replay.search("need a website") == [post("1"), post("2")]
+    with pytest.raises(Exception, match="server error"):
+        replay.search("need a website")
+    with pytest.raises(RateLimitExceeded):
+        replay.search("hire developer")
+    assert replay.search("hire developer") == [post("3")]
+    assert replay.search("anything") == []
+    assert replay.rate_limited == 1
+
+
+def test_unknown_query_takes_next_page_of_any_query():
+    replay = ReplayProvider("twitter", pages=[("a", [post("1")]), ("b", [post("2")])])
+    assert replay.search("c") == [post("1")]
+    assert replay.search("b") == [post("2")]
+    assert replay.pending() == 0
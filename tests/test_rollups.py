@@ -0,0 +1,55 @@
+from xscout.database.rollups import RollupAggregator
+from xscout.database.backends.sqlite_backend import SQLiteBackend
+
+
+class FlakyDB:
+    """apply_rollups on an in-memory SQLite backend, failing while `down`."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.down = False
+
+    def apply_rollups(self, lead_rows, provider_rows, scan_rows, batch_id=None):
+        if self.down:
+            return False
+        self.backend.apply_rollups(lead_rows, provider_rows, scan_rows, batch_id=batch_id)
+        return True
+
+
+def lead_counts(backend):
+    return {(row["platform"], row["intent_label"]): row["leads"] for row in backend.read_rollups("2000-01-01")["leads"]}
+
+
+def test_unsent_batches_survive_a_restart(tmp_path):
+    path = tmp_path / "state" / "pending_rollups.json"
+    backend = SQLiteBackend(":memory:")
+    db = FlakyDB(backend)
+    db.down = True
+
+    rollups = RollupAggregator(db, str(path))
+    rollups.record_lead("Twitter", "High")
+    assert not rollups.flush()
+    rollups.record_lead("Twitter", "High")
+    assert not rollups.flush()
+    assert path.exists()
+
+    db.down = False
+    restarted = RollupAggregator(db, str(path))
+    assert restarted.flush()
+    assert not path.exists()
+    assert lead_counts(backend) == {("Twitter", "High"): 2}
+
+    # The old process had the same batches; their ids keep them from counting twice
+    assert rollups.flush()
+    assert lead_counts(backend) == {("Twitter", "High"): 2}
+    backend.close()
+
+
+def test_no_file_while_flushes_succeed(tmp_path):
+    path = tmp_path / "pending_rollups.json"
+    backend = SQLiteBackend(":memory:")
+    rollups = RollupAggregator(FlakyDB(backend), str(path))
+    rollups.record_search("twitter")
+    assert rollups.flush()
+    assert not path.exists()
+    backend.close()
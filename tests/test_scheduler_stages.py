@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("tweepy")
+from xscout.scheduler import XScoutScheduler
+
+
+class StageLog:
+    """Metrics stand-in recording when each stage timer opens and closes."""
+
+    def __init__(self):
+        self.events = []
+
+    @contextmanager
+    def time(self, name, stage):
+        self.events.append(("start", stage))
+        yield
+        self.events.append(("end", stage))
+
+    def inc(self, name, *args, **labels):
+        pass
+
+
+def test_index_check_and_database_fallback_are_separate_stages():
+    metrics = StageLog()
+    agent = SimpleNamespace(
+        metrics=metrics,
+        near_duplicates=None,
+        # The index can't tell; the database knows the post
+        seen_index=SimpleNamespace(contains=lambda post_id: None, add=lambda post_id: None),
+        db=SimpleNamespace(lead_exists=lambda post_id: True)
+    )
+
+    XScoutScheduler.process_results(agent, [{"post_id": "1", "post_text": "need a website"}], "website")
+
+    assert metrics.events == [("start", "dedup"), ("end", "dedup"),
+                              ("start", "lead_exists"), ("end", "lead_exists")]
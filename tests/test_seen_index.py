@@ -0,0 +1,58 @@
+from xscout.database.seen_index import SeenIndex
+
+
+class FakeDB:
+    def __init__(self, post_ids):
+        self.post_ids = post_ids  # newest first, like recent_post_ids()
+
+    def recent_post_ids(self, limit):
+        return self.post_ids[:limit]
+
+
+def test_small_table_gives_a_complete_index(tmp_path):
+    index = SeenIndex(FakeDB(["2", "1"]), str(tmp_path / "seen.txt"), warm_limit=5)
+    index.warm()
+    assert index.contains("1") is True
+    assert index.contains("3") is False
+
+
+def test_add_evicts_oldest_and_stops_trusting_misses(tmp_path):
+    index = SeenIndex(FakeDB(["2", "1"]), str(tmp_path / "seen.txt"), warm_limit=3)
+    index.warm()
+    assert index.complete
+
+    index.add("3")
+    index.add("1")  # seen again: now the newest
+    index.add("4")
+
+    assert list(index.post_ids) == ["3", "1", "4"]
+    assert not index.complete
+    assert index.contains("2") is None
+    assert index.contains("5") is None
+
+
+def test_save_and_load_keep_the_newest_ids(tmp_path):
+    path = str(tmp_path / "state" / "seen.txt")
+    index = SeenIndex(FakeDB([]), path, warm_limit=10)
+    index.warm()
+    for i in range(6):
+        index.add(str(i))
+    index.save()
+
+    smaller = SeenIndex(FakeDB(["9"]), path, warm_limit=4)
+    smaller.warm()
+    assert list(smaller.post_ids) == ["3", "4", "5", "9"]
+    assert not smaller.complete
+
+
+def test_save_skips_unchanged_index(tmp_path):
+    path = tmp_path / "seen.txt"
+    index = SeenIndex(FakeDB([]), str(path))
+    index.save()
+    assert not path.exists()
+
+    index.add("1")
+    index.save()
+    path.write_text("edited")
+    index.save()
+    assert path.read_text() == "edited"
@@ -0,0 +1,153 @@
+import sqlite3
+import pytest
+from xscout.database.backends import sqlite_backend
+from xscout.database.backends.sqlite_backend import SQLiteBackend
+
+
+def lead(post_id, platform="Twitter", intent="High", detected_at=None):
+    return {
+        "platform": platform, "username": "someone", "profile_url": "https://example.com",
+        "post_text": f"post {post_id}", "post_id": post_id, "matched_keyword": "website",
+        "intent_score": 80, "intent_label": intent, "contact_info": None, "notified": False,
+        "detected_at": detected_at
+    }
+
+
+@pytest.fixture
+def backend():
+    backend = SQLiteBackend(":memory:")
+    yield backend
+    backend.close()
+
+
+def test_upsert_is_idempotent_on_post_id(backend):
+    backend.upsert_leads([lead("1"), lead("2")])
+    backend.upsert_leads([lead("2"), lead("3")])
+
+    assert backend.count_leads(None, None, None) == 3
+    assert backend.lead_exists("3")
+    assert not backend.lead_exists("4")
+
+
+def test_mark_notified_and_get_lead(backend):
+    backend.upsert_leads([lead("1")])
+    backend.mark_notified(["1"])
+
+    row = backend.get_lead("1", ["post_id", "notified"])
+    assert row == {"post_id": "1", "notified": True}
+    assert backend.get_lead("missing", ["post_id"]) is None
+
+
+def test_query_pages_newest_first_with_filters(backend):
+    backend.upsert_leads([
+        lead(str(i), platform="LinkedIn" if i % 2 else "Twitter", detected_at=f"2026-01-01T00:00:0{i}+00:00")
+        for i in range(6)
+    ])
+
+    first = backend.query_leads(None, "High", None, 3, ["id", "post_id", "detected_at"])
+    assert [row["post_id"] for row in first] == ["5", "4", "3"]
+    cursor = (first[-1]["detected_at"], first[-1]["id"])
+    second = backend.query_leads(None, "High", cursor, 3, ["id", "post_id", "detected_at"])
+    assert [row["post_id"] for row in second] == ["2", "1", "0"]
+
+    linkedin = backend.query_leads(["LinkedIn"], None, None, 10, ["post_id"])
+    assert [row["post_id"] for row in linkedin] == ["5", "3", "1"]
+    assert backend.query_leads(None, "Low", None, 10, ["post_id"]) == []
+
+
+def test_unknown_columns_are_rejected(backend):
+    with pytest.raises(ValueError):
+        backend.query_leads(None, None, None, 10, ["post_id; drop table leads"])
+
+
+def test_outbox_records_writes_in_order():
+    backend = SQLiteBackend(":memory:", outbox=True)
+    backend.upsert_leads([lead("1")])
+    backend.mark_notified(["1"])
+    backend.apply_rollups([], [], [], batch_id="batch-1")
+
+    entries = backend.outbox_batch(10)
+    assert [op for _, op, _, _ in entries] == ["upsert_leads", "mark_notified", "apply_rollups"]
+    assert entries[0][2][0][0]["post_id"] == "1"
+    assert entries[2][3] == {"batch_id": "batch-1"}
+
+    backend.outbox_done([entry_id for entry_id, _, _, _ in entries[:2]])
+    assert backend.outbox_size() == 1
+    backend.close()
+
+
+def test_repeated_rollup_batch_is_counted_once(backend):
+    rows = [{"day": "2026-01-01", "platform": "Twitter", "intent_label": "High", "leads": 2}]
+    backend.apply_rollups(rows, [], [], batch_id="batch-1")
+    backend.apply_rollups(rows, [], [], batch_id="batch-1")
+    backend.apply_rollups(rows, [], [], batch_id="batch-2")
+
+    (rollup,) = backend.read_rollups("2026-01-01")["leads"]
+    assert rollup["leads"] == 4
+
+
+
+def test_replayed_log_rows_are_inserted_once(backend):
+    rows = [{"level": "INFO", "message": f"line {i}", "log_id": f"log-{i}"} for i in range(2)]
+    backend.insert_logs(rows)
+    backend.insert_logs(rows + [{"level": "INFO", "message": "line 2", "log_id": "log-2"}])
+
+    assert sorted(row["message"] for row in backend.recent_logs(10)) == ["line 0", "line 1", "line 2"]
+
+
+def test_lead_rollups_are_backfilled_once(tmp_path):
+    path = str(tmp_path / "xscout.db")
+    backend = SQLiteBackend(path)
+    backend.upsert_leads([lead("1", detected_at="2026-01-01T10:00:00+00:00"),
+                          lead("2", detected_at="2026-01-01T11:00:00+00:00"),
+                          lead("3", intent="Low", detected_at="2026-01-02T10:00:00+00:00")])
+    backend.close()
+
+    backend = SQLiteBackend(path)
+    expected = [("2026-01-01", "High", 2), ("2026-01-02", "Low", 1)]
+    rows = backend.read_rollups("2026-01-01")["leads"]
+    assert sorted((row["day"], row["intent_label"], row["leads"]) for row in rows) == expected
+    backend.upsert_leads([lead("4", detected_at="2026-01-02T12:00:00+00:00")])
+    backend.close()
+
+    backend = SQLiteBackend(path)
+    rows = backend.read_rollups("2026-01-01")["leads"]
+    assert sorted((row["day"], row["intent_label"], row["leads"]) for row in rows) == expected
+    backend.close()
+
+def test_no_outbox_by_default(backend):
+    backend.upsert_leads([lead("1")])
+    assert backend.outbox_size() == 0
+
+
+def test_leads_watermark_moves_on_updates(backend, monkeypatch):
+    ticks = iter(f"2026-01-01T00:00:{second:02d}+00:00" for second in range(60))
+    monkeypatch.setattr(sqlite_backend, "_now", lambda: next(ticks))
+    backend.upsert_leads([lead("1"), lead("2")])
+    marks = [backend.table_watermark("leads", "updated_at")]
+
+    backend.mark_notified(["1"])
+    marks.append(backend.table_watermark("leads", "updated_at"))
+    backend.update_lead_scores([{"post_id": "2", "intent_score": 10, "intent_label": "Low"}], key="post_id")
+    marks.append(backend.table_watermark("leads", "updated_at"))
+    # Already stored: nothing changes
+    backend.upsert_leads([lead("1")])
+    marks.append(backend.table_watermark("leads", "updated_at"))
+
+    assert marks[0] < marks[1] < marks[2] == marks[3]
+
+
+def test_existing_database_gains_new_columns(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("create table leads (id integer primary key autoincrement, platform text not null, "
+                 "post_text text not null, post_id text unique not null, intent_label text, "
+                 "detected_at text not null, notified integer not null default 0)")
+    conn.execute("insert into leads (platform, post_text, post_id, detected_at) values ('X', 'old', '1', '2025')")
+    conn.commit()
+    conn.close()
+
+    backend = SQLiteBackend(path)
+    backend.mark_notified(["1"])
+    assert backend.table_watermark("leads", "updated_at") != 0
+    backend.close()
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("tweepy")
+from xscout.search_engine.twitter import TwitterProvider
+
+
+class FakeClient:
+    """Recent search over tweets with ids 1..newest, newest first, paged by
+    max_results. Fails on request number fail_on (1-based) if set."""
+
+    def __init__(self, newest):
+        self.newest = newest
+        self.requests = 0
+        self.fail_on = None
+
+    def search_recent_tweets(self, query, max_results, since_id=None, until_id=None, next_token=None, **kwargs):
+        self.requests += 1
+        if self.requests == self.fail_on:
+            raise ConnectionError("connection reset")
+        ids = [i for i in range(self.newest, 0, -1)
+               if (since_id is None or i > since_id) and (until_id is None or i < until_id)]
+        start = int(next_token or 0)
+        page = ids[start:start + max_results]
+        more = start + max_results < len(ids)
+        return SimpleNamespace(
+            data=[SimpleNamespace(id=i, text=f"tweet {i}", author_id=1, created_at=None) for i in page],
+            includes={},
+            meta={"next_token": str(start + max_results)} if more else {}
+        )
+
+
+def run(provider, cursor):
+    """(tweet ids fetched, cursor returned) for one cycle."""
+    stream = provider.stream("need a website", count=10, since=cursor)
+    ids = []
+    while True:
+        try:
+            ids.extend(int(post["post_id"]) for post in next(stream))
+        except StopIteration as stop:
+            return ids, stop.value
+
+
+def make_provider(newest, max_pages=2):
+    provider = TwitterProvider(api_key="token", max_pages=max_pages)
+    provider.client = FakeClient(newest)
+    return provider
+
+
+def test_first_search_starts_from_newest():
+    provider = make_provider(newest=35)
+    ids, cursor = run(provider, None)
+    assert ids == list(range(35, 15, -1))
+    assert cursor == "35"
+
+
+def test_cut_short_search_fetches_the_gap_next_cycle():
+    provider = make_provider(newest=70)
+
+    # 35 new tweets but only 2 pages of 10 per cycle
+    ids, cursor = run(provider, "35")
+    assert ids == list(range(70, 50, -1))
+    assert cursor == "35:51:70"
+
+    # 5 more arrive; the gap below 51 is fetched first and the cursor only
+    # moves to the newest tweet seen once it is closed
+    provider.client.newest = 75
+    gap_ids, cursor = run(provider, cursor)
+    assert gap_ids == list(range(50, 35, -1))
+    assert cursor == "70"
+
+    new_ids, cursor = run(provider, cursor)
+    assert new_ids == list(range(75, 70, -1))
+    assert cursor == "75"
+
+    fetched = ids + gap_ids + new_ids
+    assert sorted(fetched) == list(range(36, 76))
+
+
+def test_error_mid_pagination_keeps_the_gap():
+    provider = make_provider(newest=70, max_pages=3)
+    provider.client.fail_on = 2
+
+    ids, cursor = run(provider, "35")
+    assert ids == list(range(70, 60, -1))
+    assert cursor == "35:61:70"
+
+    ids, cursor = run(provider, cursor)
+    assert ids == list(range(60, 35, -1))
+    assert cursor == "70"
+
+
+def test_failed_first_page_keeps_the_cursor():
+    provider = make_provider(newest=70)
+    provider.client.fail_on = 1
+    assert run(provider, "35") == ([], None)
+
+
+def test_gap_cursor_orders_after_its_since_id():
+    provider = make_provider(newest=0)
+    order = provider.cursor_order
+    assert order("35") < order("35:51:70") < order("35:40:70") < order("36")
+
+
+def test_handles_come_from_the_page_expansion():
+    provider = make_provider(newest=2)
+    response = provider.client.search_recent_tweets("q", max_results=10)
+    response.data[1].author_id = 2
+    response.includes = {"users": [SimpleNamespace(id=1, username="bakery", name="Bakery")]}
+
+    first, second = provider._parse(response)
+    assert (first["username"], first["profile_url"]) == ("bakery", "https://twitter.com/bakery")
+    assert (second["username"], second["profile_url"]) == ("2", "https://twitter.com/i/user/2")
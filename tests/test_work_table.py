@@ -0,0 +1,62 @@
+from xscout.database.backends.sqlite_backend import SQLiteBackend
+from xscout.database.work_table import SQLiteWorkTable, task_id
+
+
+def make_table(tasks):
+    table = SQLiteWorkTable(SQLiteBackend(":memory:"))
+    table.sync(tasks)
+    return table
+
+
+def test_claim_leases_each_task_once():
+    table = make_table([("twitter", "need a website"), ("twitter", "hire developer")])
+
+    first = table.claim("worker-a", ["twitter"], limit=1, lease_seconds=300)
+    second = table.claim("worker-b", ["twitter"], limit=5, lease_seconds=300)
+
+    assert len(first) == 1 and len(second) == 1
+    assert first[0]["id"] != second[0]["id"]
+    assert table.claim("worker-c", ["twitter"], limit=5, lease_seconds=300) == []
+
+
+def test_expired_lease_is_reclaimed_and_old_owner_loses_it():
+    table = make_table([("twitter", "need a website")])
+    (task,) = table.claim("worker-a", ["twitter"], limit=1, lease_seconds=0)
+
+    (reclaimed,) = table.claim("worker-b", ["twitter"], limit=1, lease_seconds=300)
+
+    assert reclaimed["id"] == task["id"]
+    assert reclaimed["previous_owner"] == "worker-a"
+    assert table.renew("worker-a", [task["id"]], 300) == []
+    assert table.renew("worker-b", [task["id"]], 300) == [task["id"]]
+
+
+def test_complete_stores_cursor_and_defers_task():
+    table = make_table([("twitter", "need a website")])
+    (task,) = table.claim("worker-a", ["twitter"], limit=1, lease_seconds=300)
+
+    table.complete("worker-a", {task["id"]: "12345"}, interval_seconds=600)
+
+    assert table.claim("worker-a", ["twitter"], limit=1, lease_seconds=300) == []
+    table.complete("worker-a", {task["id"]: None}, interval_seconds=0)  # not held: ignored
+    row = table.conn.execute("select cursor, lease_owner from scan_tasks where id = ?", [task["id"]]).fetchone()
+    assert (row["cursor"], row["lease_owner"]) == ("12345", None)
+
+
+def test_release_makes_task_due_again():
+    table = make_table([("linkedin", "need a website")])
+    (task,) = table.claim("worker-a", ["linkedin"], limit=1, lease_seconds=300)
+
+    table.release("worker-a", [task["id"]], retry_seconds=0, error="boom")
+
+    (again,) = table.claim("worker-b", ["linkedin"], limit=1, lease_seconds=300)
+    assert again["id"] == task_id("linkedin", "need a website")
+    assert again["previous_owner"] is None
+
+
+def test_sync_removes_dropped_keywords():
+    table = make_table([("twitter", "a"), ("twitter", "b")])
+    table.sync([("twitter", "b")])
+
+    claimed = table.claim("worker-a", ["twitter"], limit=5, lease_seconds=300)
+    assert [task["keyword"] for task in claimed] == ["b"]
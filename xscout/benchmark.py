@@ -0,0 +1,250 @@
+"""
+Offline end-to-end scan benchmark. Runs XScoutScheduler.scan() cycle after
+cycle over a synthetic corpus (or a recording made with main.py --record),
+served by replay providers into an in-memory SQLite database, until every
+page has been consumed.
+
+    python -m xscout.benchmark --posts 100000
+    python -m xscout.benchmark --posts 10000 --latency 0.2 --jitter 0.1 --rate-limit-rate 0.02
+    python -m xscout.benchmark --replay xscout/state/recording.jsonl --output bench.json
+
+Reports posts/sec, p50/p99 per stage and requests per cycle.
+"""
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+import contextlib
+from itertools import accumulate, product
+from collections import defaultdict
+from xscout.config.loader import config
+from xscout.search_engine.replay import ReplayProvider
+from xscout.database.backends.sqlite_backend import SQLiteBackend
+
+PLATFORMS = {"twitter": "Twitter", "linkedin": "LinkedIn"}
+DEFAULT_KEYWORDS = ["need a website", "hire web developer", "looking for a designer", "build an app",
+                    "shopify expert", "wordpress help", "landing page", "seo agency"]
+FILLER = ("we our team project next week today really any quick small business new brand store "
+          "launch help anyone recommend good price local online mobile site page").split()
+# Post words follow a Zipf distribution over FILLER (the most common words)
+# and a long tail of pseudo-words, so posts share a few common words but are
+# otherwise as distinct as real ones
+VOCABULARY = FILLER + ["".join(p) for p in product("ka lo mi ne ru sa ti vo be du".split(), repeat=3)]
+_ZIPF = list(accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+SIGNALS = ["urgently", "budget is", "looking to hire", "will pay", "need a quote", "startup", "launching soon",
+           "DM me", "inbox me", "message me", "we are hiring", "salary", "join our team", "contact me at dev{n}@example.com"]
+
+
+def synthetic_posts(count, keywords, platform, duplicate_rate=0.05, repost_rate=0.03, seed=0):
+    """Posts of 10-30 words that mention a keyword plus a few
+    intent/negative/contact signals. duplicate_rate of them reuse an earlier
+    post_id, to exercise dedup, and repost_rate of them retweet an earlier
+    post's text under a new id, to exercise near-duplicate detection."""
+    rng = random.Random(seed)
+    texts = []
+    for n in range(count):
+        if n and rng.random() < duplicate_rate:
+            post_id = f"{platform}-{rng.randrange(n)}"
+        else:
+            post_id = f"{platform}-{n}"
+        if texts and rng.random() < repost_rate:
+            text = f"RT @user{rng.randrange(5000)}: {rng.choice(texts)}"
+        else:
+            words = rng.choices(VOCABULARY, cum_weights=_ZIPF, k=rng.randint(10, 30)) + [rng.choice(keywords)]
+            words += [s.format(n=n) for s in rng.sample(SIGNALS, rng.randint(0, 3))]
+            rng.shuffle(words)
+            text = " ".join(words)
+            texts.append(text)
+        yield {
+            "platform": PLATFORMS.get(platform, platform),
+            "post_id": post_id,
+            "post_text": text,
+            "username": f"user{n % 5000}",
+            "profile_url": f"https://example.com/user{n % 5000}",
+            "timestamp": None
+        }
+
+
+def synthetic_providers(posts, keywords, page_size, platforms=("twitter", "linkedin"), **replay_kwargs):
+    """Replay providers whose pages cover `posts` posts in total, split evenly
+    across providers and round-robin across each provider's planned queries."""
+    providers = []
+    per_provider = posts // len(platforms)
+    for i, platform in enumerate(platforms):
+        provider = ReplayProvider(f"replay-{platform}", seed=i, **replay_kwargs)
+        queries = [query for query, _ in provider.plan_queries(keywords)]
+        page, pages = [], 0
+        for post in synthetic_posts(per_provider, keywords, platform, seed=i):
+            page.append(post)
+            if len(page) == page_size:
+                provider.add_page(queries[pages % len(queries)], page)
+                page, pages = [], pages + 1
+        if page:
+            provider.add_page(queries[pages % len(queries)], page)
+        providers.append(provider)
+    return providers
+
+
+def recorded_providers(path, **replay_kwargs):
+    return [ReplayProvider.from_jsonl(path, name, **replay_kwargs)
+            for name in ReplayProvider.recorded_providers(path)]
+
+
+class StageTimer:
+    """Wall time of every call to the wrapped methods, grouped by stage."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    def wrap(self, obj, attr, stage):
+        func = getattr(obj, attr)
+
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - started)
+
+        setattr(obj, attr, timed)
+
+    def add(self, stage, seconds):
+        with self.lock:
+            self.samples[stage].append(seconds)
+
+    def summary(self):
+        with self.lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+        return {
+            stage: {
+                "count": len(values),
+                "total_s": round(sum(values), 4),
+                "p50_ms": round(_percentile(values, 50) * 1000, 4),
+                "p99_ms": round(_percentile(values, 99) * 1000, 4)
+            }
+            for stage, values in samples.items()
+        }
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(providers, keywords, max_cycles=None, verbose=False):
+    """Scan until the providers run out of pages. Returns the report dict."""
+    from xscout.database.manager import DatabaseManager
+    from xscout.scheduler import XScoutScheduler
+
+    # Keep the benchmark's dedup index, cursors and spill file out of the real state dir
+    state_dir = tempfile.mkdtemp(prefix="xscout-bench-")
+    config.set("app.state_dir", state_dir)
+    db = DatabaseManager(backend=SQLiteBackend(":memory:"))
+    agent = XScoutScheduler(dry_run=True, providers=providers, db=db)
+    agent.keywords = keywords
+
+    timer = StageTimer()
+    for provider in providers:
+        timer.wrap(provider, "search", "search")
+    timer.wrap(agent.seen_index, "contains", "dedup")
+    timer.wrap(agent.classifier, "analyze", "classify")
+    if agent.near_duplicates is not None:
+        timer.wrap(agent.near_duplicates, "fingerprint", "fingerprint")
+        timer.wrap(agent.near_duplicates, "find", "near_dup")
+    timer.wrap(db, "add_lead", "save")
+    timer.wrap(agent, "process_results", "process_batch")
+    timer.wrap(agent, "_persist_state", "persist")
+
+    cycles, requests = [], []
+    devnull = open(os.devnull, "w")
+    try:
+        while any(p.pending() for p in providers) and (max_cycles is None or len(cycles) < max_cycles):
+            before = sum(p.requests for p in providers)
+            output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(devnull)
+            started = time.perf_counter()
+            with output:
+                agent.scan()
+            cycles.append(time.perf_counter() - started)
+            requests.append(sum(p.requests for p in providers) - before)
+        stored = db.count_leads()
+    finally:
+        with contextlib.redirect_stdout(devnull):
+            agent.dispatcher.close()
+            db.close()
+        devnull.close()
+        shutil.rmtree(state_dir, ignore_errors=True)
+
+    for seconds in cycles:
+        timer.add("cycle", seconds)
+    stages = timer.summary()
+    # Every returned post goes through exactly one dedup check
+    posts = stages.get("dedup", {}).get("count", 0)
+    elapsed = sum(cycles)
+    return {
+        "cycles": len(cycles),
+        "posts": posts,
+        "leads_stored": stored,
+        "elapsed_s": round(elapsed, 3),
+        "posts_per_sec": round(posts / elapsed, 1) if elapsed else None,
+        "requests_per_cycle": round(sum(requests) / len(requests), 2) if requests else 0,
+        "rate_limited": sum(p.rate_limited for p in providers),
+        "stages": stages
+    }
+
+
+def print_report(report):
+    print(f"[Benchmark] {report['posts']} posts in {report['cycles']} cycles, {report['elapsed_s']}s "
+          f"-> {report['posts_per_sec']} posts/sec")
+    print(f"[Benchmark] {report['leads_stored']} leads stored, {report['requests_per_cycle']} requests/cycle, "
+          f"{report['rate_limited']} rate limited")
+    print(f"  {'stage':<14}{'count':>10}{'total s':>12}{'p50 ms':>12}{'p99 ms':>12}")
+    for stage, stats in report["stages"].items():
+        print(f"  {stage:<14}{stats['count']:>10}{stats['total_s']:>12.3f}{stats['p50_ms']:>12.4f}{stats['p99_ms']:>12.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="XScout offline scan benchmark")
+    parser.add_argument("--posts", type=int, default=10000, help="Synthetic corpus size (ignored with --replay)")
+    parser.add_argument("--keywords", type=int, default=len(DEFAULT_KEYWORDS), help="Synthetic keyword count")
+    parser.add_argument("--page-size", type=int, default=100, help="Posts returned per synthetic request")
+    parser.add_argument("--replay", help="Replay a JSONL recording (main.py --record) instead of synthetic posts")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per request")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Chance that a request gets a 429")
+    parser.add_argument("--reset-seconds", type=float, default=0.0, help="Quota reset delay after an injected 429")
+    parser.add_argument("--max-cycles", type=int, help="Stop after this many scan cycles")
+    parser.add_argument("--no-near-duplicates", action="store_true",
+                        help="Skip near-duplicate detection (near_duplicates.enabled: false)")
+    parser.add_argument("--output", help="Also write the report as JSON to this path")
+    parser.add_argument("--verbose", action="store_true", help="Show the scheduler's own output")
+    args = parser.parse_args()
+    if args.no_near_duplicates:
+        config.set("near_duplicates.enabled", False)
+
+    replay_kwargs = {
+        "latency": args.latency, "jitter": args.jitter,
+        "rate_limit_rate": args.rate_limit_rate, "reset_seconds": args.reset_seconds
+    }
+    if args.replay:
+        keywords = config.get("keywords", []) or DEFAULT_KEYWORDS
+        providers = recorded_providers(args.replay, **replay_kwargs)
+    else:
+        n = len(DEFAULT_KEYWORDS)
+        keywords = [DEFAULT_KEYWORDS[i % n] + (f" {i // n}" if i >= n else "") for i in range(args.keywords)]
+        providers = synthetic_providers(args.posts, keywords, args.page_size, **replay_kwargs)
+
+    report = run(providers, keywords, max_cycles=args.max_cycles, verbose=args.verbose)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
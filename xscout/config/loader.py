@@ -1,51 +1,115 @@
 import yaml
 import os
+import threading
+
+# Environment fallbacks for keys the config file doesn't set (Cloud/Railway Support)
+ENV_MAP = {
+    'api_keys.twitter.bearer_token': 'TWITTER_BEARER_TOKEN',
+    'api_keys.linkedin.username': 'LINKEDIN_USERNAME',
+    'api_keys.linkedin.password': 'LINKEDIN_PASSWORD',
+    'api_keys.callmebot.phone_number': 'WHATSAPP_PHONE',
+    'api_keys.callmebot.api_key': 'WHATSAPP_KEY',
+    'app.scan_interval_minutes': 'SCAN_INTERVAL',
+    'supabase.url': 'SUPABASE_URL',
+    'supabase.key': 'SUPABASE_KEY',
+    'control.token': 'CONTROL_TOKEN'
+}
 
 class ConfigLoader:
-    def __init__(self, config_path="xscout/config/config.yaml"):
-        self.config_path = config_path
+    def __init__(self, config_path=None):
+        # XSCOUT_CONFIG lets several workers on one host each use their own file
+        self.config_path = config_path or os.getenv("XSCOUT_CONFIG", "xscout/config/config.yaml")
+        self.subscribers = []
+        self.overrides = {}
+        self.lock = threading.Lock()
+        self.mtime = self._mtime()
         self.config = self._load_config()
+        # Every dotted key (leaves and sub-sections) plus env fallbacks,
+        # computed once per load so get() is a single dict lookup
+        self.flat = self._flatten(self.config)
+
+    def _mtime(self):
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
 
     def _load_config(self):
         if os.path.exists(self.config_path):
             with open(self.config_path, 'r') as file:
-                return yaml.safe_load(file)
+                return yaml.safe_load(file) or {}
         return {}
 
+    @staticmethod
+    def _flatten(config):
+        flat = {}
+
+        def walk(prefix, node):
+            for k, v in node.items():
+                key = f"{prefix}.{k}" if prefix else str(k)
+                if v is not None:
+                    flat[key] = v
+                if isinstance(v, dict):
+                    walk(key, v)
+
+        if isinstance(config, dict):
+            walk("", config)
+
+        for key, env_var in ENV_MAP.items():
+            if key not in flat and os.getenv(env_var) is not None:
+                flat[key] = os.getenv(env_var)
+
+        if 'keywords' not in flat:
+            val = os.getenv('KEYWORDS')
+            if val: flat['keywords'] = [k.strip() for k in val.split(',')]
+
+        return flat
+
     def get(self, key, default=None):
         """Metadata aware get - supports nested keys and Env Vars"""
-        # 1. Try Config File
-        keys = key.split('.')
-        value = self.config
-        try:
-            for k in keys:
-                value = value[k]
-            if value is not None:
-                return value
-        except (KeyError, TypeError):
-            pass
-
-        # 2. Try Environment Variables (Cloud/Railway Support)
-        # Custom mapping for critical keys
-        env_map = {
-            'api_keys.twitter.bearer_token': 'TWITTER_BEARER_TOKEN',
-            'api_keys.linkedin.username': 'LINKEDIN_USERNAME',
-            'api_keys.linkedin.password': 'LINKEDIN_PASSWORD',
-            'api_keys.callmebot.phone_number': 'WHATSAPP_PHONE',
-            'api_keys.callmebot.api_key': 'WHATSAPP_KEY',
-            'app.scan_interval_minutes': 'SCAN_INTERVAL',
-            'supabase.url': 'SUPABASE_URL',
-            'supabase.key': 'SUPABASE_KEY'
-        }
-        
-        if key in env_map:
-            return os.getenv(env_map[key], default)
-            
-        if key == 'keywords':
-            val = os.getenv('KEYWORDS')
-            if val: return [k.strip() for k in val.split(',')]
+        return self.flat.get(key, default)
+
+    def set(self, key, value):
+        """Override a dotted key in memory (command-line flags, benchmarks).
+        Overrides win over the file and survive reloads."""
+        with self.lock:
+            self.overrides[key] = value
+            self.flat = {**self.flat, key: value}
+
+    def subscribe(self, callback):
+        """callback(config) runs after every successful reload."""
+        self.subscribers.append(callback)
+
+    def reload_if_changed(self):
+        """Re-read the file if its mtime changed. The new flat view is swapped
+        in with a single assignment, so readers see either the old or the new
+        config, never a mix. Returns True if a reload happened."""
+        with self.lock:
+            mtime = self._mtime()
+            if mtime == self.mtime:
+                return False
+            try:
+                new_config = self._load_config()
+            except Exception as e:
+                # Keep running on the last good config (e.g. a half-saved file)
+                print(f"[Config] Reload failed, keeping previous config: {e}")
+                return False
+            self.mtime = mtime
+            self.config = new_config
+            self.flat = {**self._flatten(new_config), **self.overrides}
+
+        print(f"[Config] Reloaded {self.config_path}")
+        for callback in list(self.subscribers):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"[Config] Subscriber error: {e}")
+        return True
 
-        return default
+    def state_path(self, filename):
+        """Path for a local state/cache file (indexes, cursors, sessions).
+        The directory is not created here; writers create it on first save."""
+        return os.path.join(self.get("app.state_dir", "xscout/state"), filename)
 
 # Global instance for easy access
 config = ConfigLoader()
@@ -0,0 +1,109 @@
+import hmac
+import json
+import queue
+import ipaddress
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMMANDS = ("trigger", "pause", "resume")
+
+
+class ControlChannel:
+    """
+    Local HTTP control endpoint for the agent:
+
+        POST /trigger   run a scan now
+        POST /pause     stop scheduled scans (manual triggers still run)
+        POST /resume    resume scheduled scans
+        GET  /status    JSON status of the agent
+        GET  /metrics   Prometheus metrics (if a metrics_fn is given)
+
+    Commands are put on a queue that the scheduler's main loop blocks on,
+    so an idle agent wakes up only for a command or its next scheduled run.
+
+    With a token, commands need an "Authorization: Bearer <token>" header.
+    Without one the endpoint only binds to a loopback host.
+    """
+
+    def __init__(self, status_fn, host="127.0.0.1", port=8765, metrics_fn=None, token=None):
+        self.status_fn = status_fn
+        self.metrics_fn = metrics_fn
+        self.host = host
+        self.port = port
+        self.token = token or None
+        self.commands = queue.Queue()
+        self.server = None
+
+    def authorized(self, header):
+        if not self.token:
+            return True
+        return hmac.compare_digest((header or "").encode("utf-8"), f"Bearer {self.token}".encode("utf-8"))
+
+    def start(self):
+        channel = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not channel.authorized(self.headers.get("Authorization")):
+                    return self._reply(401, {"error": "missing or wrong control token"})
+                command = self.path.strip("/")
+                if command not in COMMANDS:
+                    return self._reply(404, {"error": f"unknown command '{command}'"})
+                channel.commands.put(command)
+                self._reply(202, {"queued": command})
+
+            def do_GET(self):
+                if self.path == "/status":
+                    return self._reply(200, channel.status_fn())
+                if self.path == "/metrics" and channel.metrics_fn:
+                    text = channel.metrics_fn().encode("utf-8")
+                    return self._send(200, text, "text/plain; version=0.0.4; charset=utf-8")
+                self._reply(404, {"error": "not found"})
+
+            def _reply(self, code, payload):
+                self._send(code, json.dumps(payload, default=str).encode("utf-8"), "application/json")
+
+            def _send(self, code, data, content_type):
+                self.send_response(code)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass  # keep the agent's stdout for scan output
+
+        if not self.token and not _is_loopback(self.host):
+            print(f"[Control] Not listening on {self.host}: set control.token to accept commands from other hosts")
+            return False
+        try:
+            self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        except OSError as e:
+            print(f"[Control] Could not listen on {self.host}:{self.port}: {e}")
+            return False
+        self.port = self.server.server_address[1]
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="control", daemon=True).start()
+        print(f"[Control] Listening on http://{self.host}:{self.port} (trigger, pause, resume, status, metrics)")
+        return True
+
+    def wait(self, timeout):
+        """Next command, or None if `timeout` seconds pass without one."""
+        try:
+            return self.commands.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
@@ -0,0 +1,79 @@
+from abc import ABC, abstractmethod
+
+class StorageBackend(ABC):
+    """
+    Raw storage operations behind DatabaseManager. Methods raise on failure;
+    buffering, caching and error reporting live in the manager.
+    Rows are plain dicts keyed by the column names in schema.sql.
+    """
+    # Shown in log lines ("Saved 12 leads to <name>")
+    name = "base"
+
+    @abstractmethod
+    def upsert_leads(self, rows):
+        """Insert leads, skipping any whose post_id is already stored."""
+
+    @abstractmethod
+    def mark_notified(self, post_ids):
+        pass
+
+    @abstractmethod
+    def upsert_duplicates(self, rows):
+        """Insert lead_duplicates rows, skipping any whose post_id is already stored."""
+
+    @abstractmethod
+    def lead_exists(self, post_id):
+        pass
+
+    @abstractmethod
+    def recent_post_ids(self, limit):
+        """Up to `limit` post_ids, newest first."""
+
+    @abstractmethod
+    def fetch_leads_after(self, after_id, limit, columns):
+        """Leads with id > after_id, ordered by id."""
+
+    @abstractmethod
+    def update_lead_scores(self, rows, key="id"):
+        """Overwrite the given columns of existing leads, matched on `key`."""
+
+    @abstractmethod
+    def query_leads(self, platforms, intent, cursor, limit, columns):
+        """Leads newest first on (detected_at, id), strictly after the
+        (detected_at, id) cursor if given. platforms is a list or None."""
+
+    @abstractmethod
+    def count_leads(self, platforms, intent, since):
+        pass
+
+    @abstractmethod
+    def get_lead(self, post_id, columns):
+        """Lead row or None."""
+
+    @abstractmethod
+    def get_duplicates(self, canonical_post_id, limit):
+        """lead_duplicates rows linked to a lead, oldest first."""
+
+    @abstractmethod
+    def table_watermark(self, table, column="id"):
+        """Largest value of column in the table (0 if empty)."""
+
+    @abstractmethod
+    def apply_rollups(self, lead_rows, provider_rows, scan_rows, batch_id=None):
+        """Add the deltas to the rollup tables (see apply_rollups() in schema.sql),
+        unless batch_id was applied already."""
+
+    @abstractmethod
+    def read_rollups(self, since_day):
+        """{"leads": [...], "providers": [...], "scans": [...]} from since_day on."""
+
+    @abstractmethod
+    def recent_logs(self, limit):
+        pass
+
+    @abstractmethod
+    def insert_logs(self, rows):
+        """Insert log rows, skipping any whose log_id is already stored."""
+
+    def close(self):
+        pass
@@ -0,0 +1,72 @@
+import threading
+
+# Ops whose only argument is a list of rows/ids, so consecutive entries can be
+# sent as one request
+MERGEABLE_OPS = {"upsert_leads", "upsert_duplicates", "mark_notified", "insert_logs"}
+
+
+class Replicator:
+    """
+    Pushes the SQLite backend's replication outbox to a remote backend
+    (Supabase) from a background thread, oldest write first. A round stops at
+    the first failure and is retried later, so remote writes keep their local
+    order (a lead before its notified flag).
+
+    Delivery is at-least-once: a crash between the remote write and the outbox
+    delete repeats that write. Every replicated op is idempotent: leads and
+    duplicate links upsert on post_id, log rows skip a known log_id, and
+    rollup deltas carry a batch id that apply_rollups() applies only once.
+    """
+
+    def __init__(self, local, remote, interval=10, batch_size=100):
+        self.local = local
+        self.remote = remote
+        self.interval = interval
+        self.batch_size = batch_size
+        self.replicated = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="db-replicator", daemon=True)
+        self.thread.start()
+        print(f"[Replication] Replicating to {self.remote.name} every {self.interval}s "
+              f"({self.local.outbox_size()} writes pending)")
+
+    def run_once(self):
+        """Replay the outbox until it is empty. Returns False if a write failed."""
+        while True:
+            entries = self.local.outbox_batch(self.batch_size)
+            if not entries:
+                return True
+            for entry_ids, op, args, kwargs in self._merge(entries):
+                try:
+                    getattr(self.remote, op)(*args, **kwargs)
+                except Exception as e:
+                    print(f"[Replication] {op} failed, retrying later: {e}")
+                    return False
+                self.local.outbox_done(entry_ids)
+                self.replicated += len(entry_ids)
+
+    @staticmethod
+    def _merge(entries):
+        merged = []
+        for entry_id, op, args, kwargs in entries:
+            last = merged[-1] if merged else None
+            if last and op in MERGEABLE_OPS and last[1] == op:
+                last[0].append(entry_id)
+                last[2][0].extend(args[0])
+            else:
+                merged.append(([entry_id], op, [list(a) if isinstance(a, list) else a for a in args], kwargs))
+        return merged
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.run_once()
+
+    def close(self, timeout=30):
+        """Stop the thread and make a final attempt to drain the outbox."""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=timeout)
+        self.run_once()
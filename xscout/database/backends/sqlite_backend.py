@@ -0,0 +1,273 @@
+import os
+import json
+import sqlite3
+import datetime
+import threading
+from xscout.database.backends.base import StorageBackend
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema_sqlite.sql")
+ROLLUP_TABLES = {"leads": "lead_rollups", "providers": "provider_rollups", "scans": "scan_rollups"}
+# Applied rollup batch ids are kept this long; retries come much sooner
+ROLLUP_BATCH_RETENTION = datetime.timedelta(days=30)
+# Columns added after their table was first released: table -> [(column, type)]
+MIGRATIONS = {"leads": [("updated_at", "text")], "logs": [("log_id", "text")]}
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc).isoformat()
+
+
+class SQLiteBackend(StorageBackend):
+    """
+    Leads, logs and rollups in a local SQLite file in WAL mode (see
+    schema_sqlite.sql), so the agent and dashboard can run without Supabase.
+    One connection is shared behind a lock: SQLite serialises writers anyway,
+    and WAL lets the dashboard process read while the agent writes.
+
+    With outbox=True every write is also appended to replication_outbox in the
+    same transaction, for the Replicator to push to Supabase.
+    """
+    name = "SQLite"
+
+    def __init__(self, path, outbox=False):
+        self.path = path
+        self.outbox = outbox
+        self.lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("pragma journal_mode=wal")
+        # Safe with WAL: a power loss can drop the last commits, never corrupt
+        self.conn.execute("pragma synchronous=normal")
+        self._migrate()
+        with open(SCHEMA_PATH, "r") as f:
+            self.conn.executescript(f.read())
+        # table -> known columns; column lists are checked against these
+        # before being formatted into SQL
+        self.columns = {
+            table: {row["name"] for row in self.conn.execute(f"pragma table_info({table})")}
+            for table in ["leads", "logs", "lead_duplicates", *ROLLUP_TABLES.values()]
+        }
+
+    # --- Writes ---
+
+    def upsert_leads(self, rows):
+        now = _now()
+        rows = [dict(row, detected_at=row.get("detected_at") or now, updated_at=now) for row in rows]
+        with self.lock, self.conn:
+            self._insert("leads", rows, "on conflict(post_id) do nothing")
+            self._enqueue("upsert_leads", rows)
+
+    def upsert_duplicates(self, rows):
+        now = _now()
+        rows = [dict(row, detected_at=row.get("detected_at") or now) for row in rows]
+        with self.lock, self.conn:
+            self._insert("lead_duplicates", rows, "on conflict(post_id) do nothing")
+            self._enqueue("upsert_duplicates", rows)
+
+    def mark_notified(self, post_ids):
+        with self.lock, self.conn:
+            now = _now()
+            self.conn.executemany("update leads set notified = 1, updated_at = ? where post_id = ?", [(now, p) for p in post_ids])
+            self._enqueue("mark_notified", list(post_ids))
+
+    def update_lead_scores(self, rows, key="id"):
+        with self.lock, self.conn:
+            now = _now()
+            for row in rows:
+                columns = self._check("leads", [c for c in row if c not in (key, "updated_at")])
+                assignments = ", ".join(f"{c} = ?" for c in columns + ["updated_at"])
+                self.conn.execute(
+                    f"update leads set {assignments} where {self._check('leads', [key])[0]} = ?",
+                    [row[c] for c in columns] + [now, row[key]]
+                )
+            # Local ids mean nothing remotely: replicate keyed on post_id
+            self._enqueue("update_lead_scores", [{c: v for c, v in row.items() if c != "id"} for row in rows], key="post_id")
+
+    def apply_rollups(self, lead_rows, provider_rows, scan_rows, batch_id=None):
+        with self.lock, self.conn:
+            if batch_id:
+                applied = self.conn.execute(
+                    "insert into rollup_batches (id, applied_at) values (?, ?) on conflict(id) do nothing",
+                    (batch_id, _now())
+                ).rowcount
+                if not applied:
+                    return
+                self.conn.execute(
+                    "delete from rollup_batches where applied_at < ?",
+                    ((datetime.datetime.now(datetime.timezone.utc) - ROLLUP_BATCH_RETENTION).isoformat(),)
+                )
+            self.conn.executemany(
+                "insert into lead_rollups (day, platform, intent_label, leads) values (:day, :platform, :intent_label, :leads) "
+                "on conflict (day, platform, intent_label) do update set leads = leads + excluded.leads",
+                lead_rows
+            )
+            self.conn.executemany(
+                "insert into provider_rollups (day, provider, searches, errors, rate_limits) "
+                "values (:day, :provider, :searches, :errors, :rate_limits) "
+                "on conflict (day, provider) do update set searches = searches + excluded.searches, "
+                "errors = errors + excluded.errors, rate_limits = rate_limits + excluded.rate_limits",
+                provider_rows
+            )
+            self.conn.executemany(
+                "insert into scan_rollups (day, scans, total_seconds, max_seconds, last_scan_at) "
+                "values (:day, :scans, :total_seconds, :max_seconds, :last_scan_at) "
+                "on conflict (day) do update set scans = scans + excluded.scans, "
+                "total_seconds = total_seconds + excluded.total_seconds, "
+                "max_seconds = max(max_seconds, excluded.max_seconds), "
+                # max() is NULL if either side is NULL
+                "last_scan_at = coalesce(max(last_scan_at, excluded.last_scan_at), last_scan_at, excluded.last_scan_at)",
+                scan_rows
+            )
+            self._enqueue("apply_rollups", lead_rows, provider_rows, scan_rows, batch_id=batch_id)
+
+    def insert_logs(self, rows):
+        with self.lock, self.conn:
+            self._insert("logs", rows, "on conflict(log_id) do nothing")
+            self._enqueue("insert_logs", rows)
+
+    # --- Reads ---
+
+    def lead_exists(self, post_id):
+        return self._fetchone("select 1 from leads where post_id = ? limit 1", [post_id]) is not None
+
+    def recent_post_ids(self, limit):
+        rows = self._fetchall("select post_id from leads order by detected_at desc limit ?", [limit])
+        return [row["post_id"] for row in rows]
+
+    def fetch_leads_after(self, after_id, limit, columns):
+        return self._fetchall(
+            f"select {self._select(columns)} from leads where id > ? order by id limit ?", [after_id, limit]
+        )
+
+    def query_leads(self, platforms, intent, cursor, limit, columns):
+        where, params = self._filter(platforms, intent)
+        if cursor:
+            detected_at, last_id = cursor
+            where.append("(detected_at, id) < (?, ?)")
+            params += [detected_at, int(last_id)]
+        return self._fetchall(
+            f"select {self._select(columns)} from leads {self._where(where)} order by detected_at desc, id desc limit ?",
+            params + [limit]
+        )
+
+    def count_leads(self, platforms, intent, since):
+        where, params = self._filter(platforms, intent)
+        if since:
+            where.append("detected_at >= ?")
+            params.append(since)
+        return self._fetchone(f"select count(*) as n from leads {self._where(where)}", params)["n"]
+
+    def get_lead(self, post_id, columns):
+        return self._fetchone(f"select {self._select(columns)} from leads where post_id = ? limit 1", [post_id])
+
+    def get_duplicates(self, canonical_post_id, limit):
+        return self._fetchall(
+            "select * from lead_duplicates where canonical_post_id = ? order by id limit ?", [canonical_post_id, limit]
+        )
+
+    def table_watermark(self, table, column="id"):
+        self._check(table, [column])
+        return self._fetchone(f"select coalesce(max({column}), 0) as mark from {table}")["mark"]
+
+    def read_rollups(self, since_day):
+        return {
+            name: self._fetchall(f"select * from {table} where day >= ?", [since_day])
+            for name, table in ROLLUP_TABLES.items()
+        }
+
+    def recent_logs(self, limit):
+        return self._fetchall("select * from logs order by timestamp desc limit ?", [limit])
+
+    # --- Replication outbox ---
+
+    def outbox_batch(self, limit):
+        """Oldest pending writes as (entry_id, op, args, kwargs)."""
+        rows = self._fetchall("select id, op, payload from replication_outbox order by id limit ?", [limit])
+        entries = []
+        for row in rows:
+            payload = json.loads(row["payload"])
+            entries.append((row["id"], row["op"], payload["args"], payload["kwargs"]))
+        return entries
+
+    def outbox_done(self, entry_ids):
+        with self.lock, self.conn:
+            self.conn.executemany("delete from replication_outbox where id = ?", [(i,) for i in entry_ids])
+
+    def outbox_size(self):
+        return self._fetchone("select count(*) as n from replication_outbox")["n"]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # --- Helpers ---
+
+    def _migrate(self):
+        # "create table if not exists" leaves existing tables alone, so columns
+        # added later go in first (the schema's indexes may use them)
+        for table, columns in MIGRATIONS.items():
+            existing = {row["name"] for row in self.conn.execute(f"pragma table_info({table})")}
+            if not existing:
+                continue
+            for column, kind in columns:
+                if column not in existing:
+                    self.conn.execute(f"alter table {table} add column {column} {kind}")
+
+    def _enqueue(self, op, *args, **kwargs):
+        # Called inside the write's transaction, so both commit or neither
+        if self.outbox:
+            self.conn.execute(
+                "insert into replication_outbox (op, payload) values (?, ?)",
+                (op, json.dumps({"args": args, "kwargs": kwargs}, default=str))
+            )
+
+    def _insert(self, table, rows, conflict=""):
+        if not rows:
+            return
+        columns = self._check(table, list(dict.fromkeys(c for row in rows for c in row)))
+        placeholders = ", ".join("?" for _ in columns)
+        self.conn.executemany(
+            f"insert into {table} ({', '.join(columns)}) values ({placeholders}) {conflict}",
+            [[row.get(c) for c in columns] for row in rows]
+        )
+
+    def _check(self, table, columns):
+        unknown = [c for c in columns if c not in self.columns.get(table, ())]
+        if unknown:
+            raise ValueError(f"Unknown column(s) for {table}: {unknown}")
+        return columns
+
+    def _select(self, columns):
+        return ", ".join(self._check("leads", list(columns)))
+
+    @staticmethod
+    def _filter(platforms, intent):
+        where, params = [], []
+        if platforms:
+            where.append(f"platform in ({', '.join('?' for _ in platforms)})")
+            params.extend(platforms)
+        if intent:
+            where.append("intent_label = ?")
+            params.append(intent)
+        return where, params
+
+    @staticmethod
+    def _where(clauses):
+        return f"where {' and '.join(clauses)}" if clauses else ""
+
+    def _fetchall(self, sql, params=()):
+        with self.lock:
+            return [self._row(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def _fetchone(self, sql, params=()):
+        with self.lock:
+            row = self.conn.execute(sql, params).fetchone()
+        return self._row(row) if row is not None else None
+
+    @staticmethod
+    def _row(row):
+        row = dict(row)
+        if "notified" in row:
+            row["notified"] = bool(row["notified"])
+        return row
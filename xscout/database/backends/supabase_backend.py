@@ -0,0 +1,102 @@
+from supabase import create_client
+from xscout.database.backends.base import StorageBackend
+
+ROLLUP_TABLES = {"leads": "lead_rollups", "providers": "provider_rollups", "scans": "scan_rollups"}
+
+class SupabaseBackend(StorageBackend):
+    """Leads, logs and rollups in Supabase (Postgres over PostgREST), see schema.sql."""
+    name = "Supabase"
+
+    def __init__(self, url, key):
+        self.client = create_client(url, key)
+
+    def upsert_leads(self, rows):
+        # on_conflict=post_id lets the unique constraint absorb dedup races
+        self.client.table("leads").upsert(rows, on_conflict="post_id", ignore_duplicates=True).execute()
+
+    def upsert_duplicates(self, rows):
+        self.client.table("lead_duplicates").upsert(rows, on_conflict="post_id", ignore_duplicates=True).execute()
+
+    def mark_notified(self, post_ids):
+        self.client.table("leads").update({"notified": True}).in_("post_id", post_ids).execute()
+
+    def lead_exists(self, post_id):
+        response = self.client.table("leads").select("post_id").eq("post_id", post_id).limit(1).execute()
+        return len(response.data) > 0
+
+    def recent_post_ids(self, limit, page_size=1000):
+        # Paged because PostgREST caps rows per response
+        post_ids = []
+        while len(post_ids) < limit:
+            start = len(post_ids)
+            end = min(start + page_size, limit) - 1
+            response = self.client.table("leads").select("post_id").order("detected_at", desc=True).range(start, end).execute()
+            post_ids.extend(row["post_id"] for row in response.data)
+            if len(response.data) < end - start + 1:
+                break
+        return post_ids
+
+    def fetch_leads_after(self, after_id, limit, columns):
+        response = self.client.table("leads").select(",".join(columns)).gt("id", after_id).order("id").limit(limit).execute()
+        return response.data or []
+
+    def update_lead_scores(self, rows, key="id"):
+        self.client.table("leads").upsert(rows, on_conflict=key).execute()
+
+    def query_leads(self, platforms, intent, cursor, limit, columns):
+        query = self._filter(self.client.table("leads").select(",".join(columns)), platforms, intent)
+        if cursor:
+            detected_at, last_id = cursor
+            # Quoted: timestamps contain reserved characters (: and .)
+            query = query.or_(f'detected_at.lt."{detected_at}",and(detected_at.eq."{detected_at}",id.lt.{int(last_id)})')
+        response = query.order("detected_at", desc=True).order("id", desc=True).limit(limit).execute()
+        return response.data or []
+
+    def count_leads(self, platforms, intent, since):
+        query = self._filter(self.client.table("leads").select("id", count="exact"), platforms, intent)
+        if since:
+            query = query.gte("detected_at", since)
+        return query.limit(1).execute().count
+
+    def get_lead(self, post_id, columns):
+        response = self.client.table("leads").select(",".join(columns)).eq("post_id", post_id).limit(1).execute()
+        return response.data[0] if response.data else None
+
+    def get_duplicates(self, canonical_post_id, limit):
+        response = (self.client.table("lead_duplicates").select("*").eq("canonical_post_id", canonical_post_id)
+                    .order("id").limit(limit).execute())
+        return response.data or []
+
+    def table_watermark(self, table, column="id"):
+        response = (self.client.table(table).select(column).not_.is_(column, "null")
+                    .order(column, desc=True).limit(1).execute())
+        return response.data[0][column] if response.data else 0
+
+    def apply_rollups(self, lead_rows, provider_rows, scan_rows, batch_id=None):
+        self.client.rpc("apply_rollups", {
+            "lead_rows": lead_rows, "provider_rows": provider_rows, "scan_rows": scan_rows,
+            "batch_id": batch_id
+        }).execute()
+
+    def read_rollups(self, since_day):
+        rollups = {}
+        for name, table in ROLLUP_TABLES.items():
+            response = self.client.table(table).select("*").gte("day", since_day).execute()
+            rollups[name] = response.data or []
+        return rollups
+
+    def recent_logs(self, limit):
+        response = self.client.table("logs").select("*").order("timestamp", desc=True).limit(limit).execute()
+        return response.data or []
+
+    def insert_logs(self, rows):
+        # Rows that carry a log_id already stored (a replayed batch) are skipped
+        self.client.table("logs").upsert(rows, on_conflict="log_id", ignore_duplicates=True).execute()
+
+    @staticmethod
+    def _filter(query, platforms, intent):
+        if platforms:
+            query = query.in_("platform", platforms)
+        if intent:
+            query = query.eq("intent_label", intent)
+        return query
@@ -0,0 +1,80 @@
+import time
+import threading
+from collections import OrderedDict
+
+MISSING = object()
+
+class TTLCache:
+    """
+    Small thread-safe LRU whose entries expire after `ttl` seconds. Lives on
+    module-level singletons, so in the dashboard it is shared by every
+    Streamlit session in the process.
+    """
+
+    def __init__(self, max_size=1000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires_at, value)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """The cached value, or MISSING if absent or expired."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] < time.monotonic():
+                del self.entries[key]
+                return MISSING
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, key=None):
+        """Drop one key, or everything when key is None."""
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
+class QueryCache:
+    """
+    Query results keyed by (table, query params). An entry is served while it
+    is younger than `ttl` and the table's watermark (e.g. its max id) has not
+    moved since it was loaded. Watermarks are re-read at most once every
+    `watermark_interval` seconds, so any number of readers cost about one
+    tiny query per table per interval until the agent writes something new.
+    A loader returns None when its query failed; that is passed through but
+    not cached, so the next read tries again.
+    """
+
+    def __init__(self, watermark_fn, ttl=300, watermark_interval=5, max_size=256):
+        self.watermark_fn = watermark_fn
+        self.watermark_interval = watermark_interval
+        self.results = TTLCache(max_size=max_size, ttl=ttl)
+        self.watermarks = TTLCache(max_size=64, ttl=watermark_interval)
+
+    def watermark(self, table):
+        mark = self.watermarks.get(table)
+        if mark is MISSING:
+            mark = self.watermark_fn(table)
+            self.watermarks.set(table, mark)
+        return mark
+
+    def get_or_load(self, table, key, loader):
+        mark = self.watermark(table)
+        entry = self.results.get((table, key))
+        if entry is not MISSING and mark is not None and entry[0] == mark:
+            return entry[1]
+        value = loader()
+        if value is not None:
+            self.results.set((table, key), (mark, value))
+        return value
@@ -0,0 +1,94 @@
+import uuid
+import queue
+import datetime
+import threading
+
+class LogSink:
+    """
+    Non-blocking sink for the logs table. put() only appends to a bounded
+    in-memory queue; a background thread drains it with multi-row inserts.
+    When the queue is full the oldest (or newest) record is dropped and counted.
+    """
+
+    def __init__(self, write_batch, max_queue=1000, batch_size=100, flush_interval=2, overflow="drop_oldest"):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.counters = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0}
+        self.lock = threading.Lock()
+        self.closed = False
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+        self.thread.start()
+
+    def put(self, level, message):
+        record = {
+            "level": level,
+            "message": message,
+            # Stamp now: the row may be inserted a few seconds later
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            # Lets a replayed insert of this row be recognised and skipped
+            "log_id": uuid.uuid4().hex
+        }
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.overflow == "drop_newest":
+                self._count("dropped")
+                return
+            try:
+                self.queue.get_nowait()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self._count("dropped")
+                return
+        self._count("enqueued")
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+        stats["queued"] = self.queue.qsize()
+        return stats
+
+    def _count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if not batch:
+            return 0
+        try:
+            self.write_batch(batch)
+            self._count("written", len(batch))
+        except Exception:
+            # Logging must never break the agent; the loss is visible in stats()
+            self._count("failed", len(batch))
+        return len(batch)
+
+    def _run(self):
+        while not self.closed:
+            # Let records accumulate so each insert carries many rows
+            self.stop_event.wait(self.flush_interval)
+            while self._drain() == self.batch_size:
+                pass
+
+    def close(self):
+        """Stop the background thread and write out whatever is queued."""
+        if self.closed: return
+        self.closed = True
+        self.stop_event.set()
+        self.thread.join(timeout=self.flush_interval + 5)
+        while self._drain():
+            pass
@@ -1,23 +1,88 @@
 import os
+import json
+import atexit
 import datetime
+import threading
 from xscout.config.loader import config
-from supabase import create_client, Client
+from xscout.database.log_sink import LogSink
+from xscout.database.cache import TTLCache, MISSING
+
+# Columns the dashboard feed cards render
+FEED_COLUMNS = ["id", "post_id", "platform", "username", "post_text", "intent_label", "detected_at"]
+# Columns the lead details view renders
+LEAD_COLUMNS = FEED_COLUMNS + ["profile_url", "matched_keyword", "intent_score", "contact_info", "notified"]
+# Dashboard platform filter -> stored platform values
+PLATFORM_FILTERS = {"X": ["Twitter", "X"], "LinkedIn": ["LinkedIn"]}
+# Change markers for tables where max(id) misses writes: leads are updated in
+# place (rescore, notified flag); scan_rollups has no id column
+WATERMARK_COLUMNS = {"leads": "updated_at", "scan_rollups": "last_scan_at"}
+
+def create_backend():
+    """Storage backend from config (database.backend: supabase | sqlite), or
+    None if Supabase is selected but its credentials are missing."""
+    kind = config.get("database.backend", "supabase")
+    if kind == "sqlite":
+        from xscout.database.backends.sqlite_backend import SQLiteBackend
+        return SQLiteBackend(
+            config.get("database.sqlite_path") or config.state_path("xscout.db"),
+            outbox=bool(config.get("database.replicate_to_supabase", False))
+        )
+    if kind != "supabase":
+        print(f"! Warning: Unknown database.backend '{kind}', using supabase.")
+
+    url = config.get("supabase.url")
+    key = config.get("supabase.key")
+    if not url or not key:
+         # Fallback or error, but for now we assume they are set
+         print("! Warning: Supabase credentials missing.")
+         return None
+    from xscout.database.backends.supabase_backend import SupabaseBackend
+    return SupabaseBackend(url, key)
+
 
 class DatabaseManager:
-    def __init__(self):
-        url = config.get("supabase.url")
-        key = config.get("supabase.key")
-        
-        if not url or not key:
-             # Fallback or error, but for now we assume they are set
-             print("! Warning: Supabase credentials missing.")
-             self.client = None
+    def __init__(self, backend=MISSING):
+        # Write-behind buffers for leads and notified flags, flushed in bulk
+        # by a background thread (by size or every flush_interval seconds)
+        self.batch_size = config.get("database.batch_size", 50)
+        self.flush_interval = config.get("database.flush_interval_seconds", 2)
+        self.spill_path = config.state_path("pending_writes.json")
+        self._pending_leads = {}  # post_id -> row, in arrival order
+        self._pending_duplicates = {}  # post_id -> lead_duplicates row
+        self._pending_notified = set()
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        self._closed = False
+        self.log_sink = None
+        self.replicator = None
+        # post_id -> lead row for get_lead(); shared across dashboard sessions
+        self.lead_cache = TTLCache(
+            max_size=config.get("dashboard.lead_cache_size", 1000),
+            ttl=config.get("dashboard.lead_cache_ttl_seconds", 60)
+        )
+
+        # Raw storage (Supabase or local SQLite); None disables the database
+        self.backend = create_backend() if backend is MISSING else backend
+        if not self.backend:
              return
 
-        self.client: Client = create_client(url, key)
+        self._load_spill()
+        self.log_sink = LogSink(
+            self.backend.insert_logs,
+            max_queue=config.get("logging.queue_size", 1000),
+            batch_size=config.get("logging.batch_size", 100),
+            flush_interval=config.get("logging.flush_interval_seconds", 2),
+            overflow=config.get("logging.overflow", "drop_oldest")
+        )
+        self._flusher = threading.Thread(target=self._flush_loop, name="db-flusher", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
 
     def add_lead(self, lead_data):
-        if not self.client: return
+        """Queue a lead for the next bulk upsert. Returns immediately."""
+        if not self.backend: return
         
         data = {
             "platform": lead_data.get('platform'),
@@ -32,34 +97,321 @@ class DatabaseManager:
             "notified": False
         }
         
+        with self._buffer_lock:
+            queued = self._pending_leads.get(data["post_id"])
+            # A re-seen lead that was already notified stays notified
+            data["notified"] = bool(queued and queued["notified"])
+            self._pending_leads[data["post_id"]] = data
+            full = len(self._pending_leads) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def add_duplicate(self, post, canonical_post_id, distance):
+        """Queue a link from a near-duplicate post to the lead it copies."""
+        if not self.backend: return
+        data = {
+            "post_id": post.get('post_id'),
+            "canonical_post_id": canonical_post_id,
+            "platform": post.get('platform'),
+            "username": post.get('username'),
+            "profile_url": post.get('profile_url'),
+            "post_text": post.get('post_text'),
+            "distance": distance
+        }
+        with self._buffer_lock:
+            self._pending_duplicates[data["post_id"]] = data
+
+    def get_duplicates(self, post_id, limit=20):
+        """Reposts / cross-posts linked to a lead, oldest first."""
+        if not self.backend or not post_id: return []
         try:
-            self.client.table("leads").insert(data).execute()
-            print(f"    + Saved to Supabase: {lead_data.get('profile_url')}")
+            return self.backend.get_duplicates(str(post_id), limit)
         except Exception as e:
-            print(f"    ! Supabase Insert Error: {e}")
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return []
 
     def lead_exists(self, post_id):
-        if not self.client: return False
+        if not self.backend: return False
+        with self._buffer_lock:
+            if post_id in self._pending_leads:
+                return True
         try:
-            response = self.client.table("leads").select("*").eq("post_id", post_id).execute()
-            return len(response.data) > 0
+            return self.backend.lead_exists(post_id)
         except Exception as e:
-            print(f"    ! Supabase Query Error: {e}")
+            print(f"    ! {self.backend.name} Query Error: {e}")
             return False
 
-    def log(self, level, message):
-        if not self.client: return
+    def recent_post_ids(self, limit=50000):
+        """Most recent post_ids, newest first. Returns None if the query fails."""
+        if not self.backend: return []
         try:
-            self.client.table("logs").insert({"level": level, "message": message}).execute()
-        except:
-            pass # Silent fail for logs
+            return self.backend.recent_post_ids(limit)
+        except Exception as e:
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return None
+
+    def fetch_leads_after(self, after_id, limit, columns):
+        """Keyset page of leads ordered by id (id > after_id). Raises on error,
+        so batch jobs can stop and resume from their checkpoint."""
+        if not self.backend: return []
+        return self.backend.fetch_leads_after(after_id, limit, columns)
+
+    def update_lead_scores(self, rows):
+        """Bulk write-back of rescored leads, keyed on id. Rows must carry the
+        not-null columns (platform, post_id, post_text). Raises on error."""
+        if not self.backend: return
+        for i in range(0, len(rows), self.batch_size):
+            self.backend.update_lead_scores(rows[i:i + self.batch_size])
+
+    def query_leads(self, platform=None, intent=None, cursor=None, limit=20, columns=FEED_COLUMNS):
+        """
+        One page of leads, newest first, with filters applied in the database.
+        Keyset pagination on (detected_at, id): cursor is the (detected_at, id)
+        of the last row of the previous page. Returns (rows, next_cursor);
+        next_cursor is None on the last page. Returns None if the query fails.
+        """
+        if not self.backend: return [], None
+        try:
+            # Fetch one extra row to know whether another page exists
+            rows = self.backend.query_leads(self._platforms(platform), intent, cursor, limit + 1, columns)
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = (rows[-1]["detected_at"], rows[-1]["id"])
+            return rows, next_cursor
+        except Exception as e:
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return None
+
+    def get_lead(self, post_id):
+        """Single lead by post_id (unique, so indexed), or None. Cached for a short TTL."""
+        if not self.backend or not post_id: return None
+        key = str(post_id)
+        lead = self.lead_cache.get(key)
+        if lead is not MISSING:
+            return lead
+        try:
+            lead = self.backend.get_lead(key, LEAD_COLUMNS)
+        except Exception as e:
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return None
+        if lead:
+            self.lead_cache.set(key, lead)
+        return lead
+
+    def count_leads(self, platform=None, intent=None, since=None):
+        """Number of matching leads (detected at or after `since`), or None on error."""
+        if not self.backend: return 0
+        try:
+            return self.backend.count_leads(self._platforms(platform), intent, since)
+        except Exception as e:
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return None
+
+    def table_watermark(self, table):
+        """Cheap change marker for a table: its newest id (primary key lookup),
+        or the indexed column every write moves (WATERMARK_COLUMNS).
+        None if unknown, which callers treat as 'always stale'."""
+        if not self.backend: return None
+        try:
+            return self.backend.table_watermark(table, WATERMARK_COLUMNS.get(table, "id"))
+        except Exception as e:
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return None
+
+    def apply_rollups(self, lead_rows, provider_rows, scan_rows, batch_id=None):
+        """Add analytics deltas to the rollup tables (apply_rollups() in schema.sql).
+        A batch_id that was applied before is skipped."""
+        if not self.backend: return True
+        try:
+            self.backend.apply_rollups(lead_rows, provider_rows, scan_rows, batch_id=batch_id)
+            return True
+        except Exception as e:
+            print(f"    ! {self.backend.name} Rollup Error: {e}")
+            return False
+
+    def read_rollups(self, since_day):
+        """Rollup rows from since_day (ISO date) onwards: a few rows per day.
+        Returns None if the query fails."""
+        rollups = {"leads": [], "providers": [], "scans": []}
+        if not self.backend: return rollups
+        try:
+            rollups.update(self.backend.read_rollups(since_day))
+        except Exception as e:
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return None
+        return rollups
+
+    def recent_logs(self, limit=5):
+        """Newest log rows, or None if the query fails."""
+        if not self.backend: return []
+        try:
+            return self.backend.recent_logs(limit)
+        except Exception as e:
+            print(f"    ! {self.backend.name} Query Error: {e}")
+            return None
+
+    @staticmethod
+    def _platforms(platform):
+        """Dashboard platform filter -> stored platform values (None for all)."""
+        if platform and platform != "All":
+            return PLATFORM_FILTERS.get(platform, [platform])
+        return None
+
+    def log(self, level, message):
+        """Queue a row for the logs table. Never blocks; see log_sink.stats()."""
+        if not self.log_sink: return
+        self.log_sink.put(level, message)
 
     def mark_notified(self, post_id):
-        if not self.client: return
+        if not self.backend: return
+        with self._buffer_lock:
+            if post_id in self._pending_leads:
+                # Not written yet: flip the flag on the buffered row instead
+                self._pending_leads[post_id]["notified"] = True
+            else:
+                self._pending_notified.add(post_id)
+        self.lead_cache.invalidate(str(post_id))
+
+    def flush(self):
+        """Write all buffered leads, duplicate links and notified flags. Failed
+        batches are put back in the buffer for the next flush. Returns True if
+        nothing is left."""
+        if not self.backend: return True
+        with self._flush_lock:
+            with self._buffer_lock:
+                leads = list(self._pending_leads.values())
+                duplicates = list(self._pending_duplicates.values())
+                notified = self._pending_notified
+                self._pending_leads = {}
+                self._pending_duplicates = {}
+                self._pending_notified = set()
+            # Flags for leads written in this flush go in the row itself:
+            # a separate update could run against a lead that failed to save
+            for row in leads:
+                if row["post_id"] in notified:
+                    row["notified"] = True
+                    notified.discard(row["post_id"])
+            notified = list(notified)
+
+            failed_leads = []
+            for i in range(0, len(leads), self.batch_size):
+                batch = leads[i:i + self.batch_size]
+                try:
+                    self.backend.upsert_leads(batch)
+                    print(f"    + Saved {len(batch)} leads to {self.backend.name}")
+                except Exception as e:
+                    print(f"    ! {self.backend.name} Upsert Error: {e}")
+                    failed_leads.extend(batch)
+
+            # After the leads, so a link never points at a lead not stored yet
+            failed_duplicates = []
+            for i in range(0, len(duplicates), self.batch_size):
+                batch = duplicates[i:i + self.batch_size]
+                try:
+                    self.backend.upsert_duplicates(batch)
+                except Exception as e:
+                    print(f"    ! {self.backend.name} Upsert Error: {e}")
+                    failed_duplicates.extend(batch)
+
+            failed_notified = []
+            for i in range(0, len(notified), self.batch_size):
+                batch = notified[i:i + self.batch_size]
+                try:
+                    self.backend.mark_notified(batch)
+                except Exception as e:
+                    print(f"    ! {self.backend.name} Update Error: {e}")
+                    failed_notified.extend(batch)
+
+            with self._buffer_lock:
+                for row in failed_leads:
+                    post_id = row["post_id"]
+                    # Marked notified while this batch was in flight
+                    if post_id in self._pending_notified:
+                        self._pending_notified.discard(post_id)
+                        row["notified"] = True
+                    # Keep any newer version queued while we were flushing,
+                    # without losing the flag
+                    queued = self._pending_leads.setdefault(post_id, row)
+                    queued["notified"] = queued["notified"] or row["notified"]
+                for row in failed_duplicates:
+                    self._pending_duplicates.setdefault(row["post_id"], row)
+                self._pending_notified.update(failed_notified)
+                return not self._pending_leads and not self._pending_duplicates and not self._pending_notified
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and write everything out. Whatever still can't be
+        written is spilled to disk and re-queued on the next start."""
+        if self._closed or not self.backend: return
+        self._closed = True
+        self._wakeup.set()
+        if self._flusher:
+            self._flusher.join(timeout=self.flush_interval + 30)
+        for _ in range(3):
+            if self.flush():
+                break
+        self._spill()
+        self.log_sink.close()
+        stats = self.log_sink.stats()
+        if stats["dropped"] or stats["failed"]:
+            print(f"! Log sink dropped {stats['dropped']} and failed {stats['failed']} records")
+        if self.replicator:
+            self.replicator.close()
+        self.backend.close()
+
+    def start_replication(self):
+        """Push local SQLite writes to Supabase in the background
+        (database.replicate_to_supabase). Only the agent process calls this,
+        so the dashboard never replays the same outbox."""
+        if self.replicator or not getattr(self.backend, "outbox", False): return
+        url = config.get("supabase.url")
+        key = config.get("supabase.key")
+        if not url or not key:
+            print("! Warning: Supabase credentials missing; local writes are queued for replication.")
+            return
+        from xscout.database.backends.supabase_backend import SupabaseBackend
+        from xscout.database.backends.replication import Replicator
+        self.replicator = Replicator(
+            self.backend, SupabaseBackend(url, key),
+            interval=config.get("database.replication_interval_seconds", 10),
+            batch_size=config.get("database.replication_batch_size", 100)
+        )
+        self.replicator.start()
+
+    def _spill(self):
+        with self._buffer_lock:
+            pending = {
+                "leads": list(self._pending_leads.values()),
+                "duplicates": list(self._pending_duplicates.values()),
+                "notified": list(self._pending_notified)
+            }
+        if not pending["leads"] and not pending["duplicates"] and not pending["notified"]:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.spill_path)), exist_ok=True)
+        with open(self.spill_path, "w") as f:
+            json.dump(pending, f)
+        print(f"! Saved {len(pending['leads'])} unwritten leads to {self.spill_path}")
+
+    def _load_spill(self):
+        if not os.path.exists(self.spill_path): return
         try:
-            self.client.table("leads").update({"notified": True}).eq("post_id", post_id).execute()
+            with open(self.spill_path, "r") as f:
+                pending = json.load(f)
+            os.remove(self.spill_path)
         except Exception as e:
-             print(f"    ! Supabase Update Error: {e}")
+            print(f"! Could not read {self.spill_path}: {e}")
+            return
+        for row in pending.get("leads", []):
+            self._pending_leads[row["post_id"]] = row
+        for row in pending.get("duplicates", []):
+            self._pending_duplicates[row["post_id"]] = row
+        self._pending_notified.update(pending.get("notified", []))
 
 # Global instance
 db_manager = DatabaseManager()
@@ -0,0 +1,115 @@
+import os
+import json
+import uuid
+import datetime
+import threading
+from collections import defaultdict
+
+def _today():
+    return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+
+class RollupAggregator:
+    """
+    Counts analytics deltas in memory while a scan runs (leads per
+    day/platform/intent, provider searches/errors/rate limits, scan
+    durations) and adds them to the rollup tables in one call per scan.
+    Each call is a batch with its own id, which the database records, so a
+    batch that is retried (after a failed call, or by the replicator) is
+    only counted once. Batches that fail are retried with the next flush,
+    and written to `path` until they are sent, so a restart resends them
+    rather than losing them (like the write-behind spill). Counts recorded
+    since the last flush are in memory only.
+    """
+
+    def __init__(self, db, path=None):
+        self.db = db
+        self.path = path
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.unsent = self._load()  # (batch_id, lead_rows, provider_rows, scan_rows), oldest first
+        self.saved = bool(self.unsent)  # path holds batches that may since have been sent
+        self._reset()
+
+    def _reset(self):
+        self.leads = defaultdict(int)  # (day, platform, intent_label) -> leads
+        self.providers = defaultdict(lambda: {"searches": 0, "errors": 0, "rate_limits": 0})
+        self.scans = defaultdict(lambda: {"scans": 0, "total_seconds": 0.0, "max_seconds": 0.0, "last_scan_at": None})
+
+    def record_lead(self, platform, intent_label):
+        with self.lock:
+            self.leads[(_today(), platform or "Unknown", intent_label or "Low")] += 1
+
+    def record_search(self, provider):
+        self._bump_provider(provider, "searches")
+
+    def record_error(self, provider):
+        self._bump_provider(provider, "errors")
+
+    def record_rate_limit(self, provider):
+        self._bump_provider(provider, "rate_limits")
+
+    def _bump_provider(self, provider, field):
+        with self.lock:
+            self.providers[(_today(), provider)][field] += 1
+
+    def record_scan(self, seconds):
+        now = datetime.datetime.now(datetime.timezone.utc)
+        with self.lock:
+            scan = self.scans[now.date().isoformat()]
+            scan["scans"] += 1
+            scan["total_seconds"] += seconds
+            scan["max_seconds"] = max(scan["max_seconds"], seconds)
+            scan["last_scan_at"] = now.isoformat()
+
+    def flush(self):
+        with self.lock:
+            leads, providers, scans = self.leads, self.providers, self.scans
+            self._reset()
+        lead_rows = [
+            {"day": day, "platform": platform, "intent_label": label, "leads": count}
+            for (day, platform, label), count in leads.items()
+        ]
+        provider_rows = [
+            {"day": day, "provider": provider, **counts}
+            for (day, provider), counts in providers.items()
+        ]
+        scan_rows = [{"day": day, **scan} for day, scan in scans.items()]
+        with self.flush_lock:
+            if lead_rows or provider_rows or scan_rows:
+                self.unsent.append((uuid.uuid4().hex, lead_rows, provider_rows, scan_rows))
+            while self.unsent:
+                batch_id, lead_rows, provider_rows, scan_rows = self.unsent[0]
+                if not self.db.apply_rollups(lead_rows, provider_rows, scan_rows, batch_id=batch_id):
+                    self._save()
+                    return False
+                self.unsent.pop(0)
+            if self.saved:
+                self._save()
+        return True
+
+    def _save(self):
+        # Caller holds flush_lock
+        if not self.path: return
+        try:
+            if self.unsent:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(self.unsent, f)
+                os.replace(tmp_path, self.path)
+                print(f"[Rollups] Saved {len(self.unsent)} unsent batches to {self.path}")
+            elif os.path.exists(self.path):
+                os.remove(self.path)
+            self.saved = bool(self.unsent)
+        except Exception as e:
+            print(f"[Rollups] Could not save {self.path}: {e}")
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path): return []
+        try:
+            with open(self.path, "r") as f:
+                return [tuple(batch) for batch in json.load(f)]
+        except Exception as e:
+            print(f"[Rollups] Could not read {self.path}: {e}")
+            return []
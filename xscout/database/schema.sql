@@ -14,26 +14,249 @@ create table if not exists leads (
   intent_label text,
   contact_info text,
   detected_at timestamp with time zone default timezone('utc'::text, now()) not null,
-  notified boolean default false
+  notified boolean default false,
+  updated_at timestamp with time zone default now() not null
 );
 
+-- Feed queries: keyset pagination on (detected_at, id), optionally per platform
+create index if not exists leads_detected_at_id_idx on leads (detected_at desc, id desc);
+create index if not exists leads_platform_detected_at_idx on leads (platform, detected_at desc, id desc);
+
+-- Dashboard cache watermark: max(updated_at) has to move on in-place updates
+-- (rescore, notified flag) as well as inserts, so the database stamps it and
+-- ignores client values (replicated rows carry the local backend's time)
+alter table leads add column if not exists updated_at timestamp with time zone default now() not null;
+create index if not exists leads_updated_at_idx on leads (updated_at desc);
+
+create or replace function touch_updated_at()
+returns trigger language plpgsql as $$
+begin
+  new.updated_at = clock_timestamp();
+  return new;
+end;
+$$;
+
+drop trigger if exists leads_touch_updated_at on leads;
+create trigger leads_touch_updated_at before insert or update on leads
+  for each row execute function touch_updated_at();
+
 -- Logs Table
 create table if not exists logs (
   id bigint generated by default as identity primary key,
   level text,
   message text,
-  timestamp timestamp with time zone default timezone('utc'::text, now()) not null
+  timestamp timestamp with time zone default timezone('utc'::text, now()) not null,
+  log_id text
 );
 
+-- Set by the agent when the record is queued, so a replicated batch that is
+-- delivered twice inserts each row once (insert_logs ignores known ids)
+alter table logs add column if not exists log_id text;
+create unique index if not exists logs_log_id_idx on logs (log_id);
+
+-- Reposts / cross-posts of a stored lead, found by the near-duplicate index.
+-- Not leads themselves: no separate alert, linked to the lead they copy.
+create table if not exists lead_duplicates (
+  id bigint generated by default as identity primary key,
+  post_id text unique not null,
+  canonical_post_id text not null,
+  platform text not null,
+  username text,
+  profile_url text,
+  post_text text,
+  distance int,
+  detected_at timestamp with time zone default timezone('utc'::text, now()) not null
+);
+
+create index if not exists lead_duplicates_canonical_idx on lead_duplicates (canonical_post_id);
+
 -- RLS Policies (Security)
 alter table leads enable row level security;
 alter table logs enable row level security;
+alter table lead_duplicates enable row level security;
 
 -- Allow public read access (for Dashboard)
 create policy "Public Read Leads" on leads for select using (true);
 create policy "Public Read Logs" on logs for select using (true);
+create policy "Public Read Lead Duplicates" on lead_duplicates for select using (true);
 
 -- Allow anon insert access (for Agent using Anon Key)
 create policy "Anon Insert Leads" on leads for insert with check (true);
 create policy "Anon Insert Logs" on logs for insert with check (true);
 create policy "Anon Update Leads" on leads for update using (true);
+create policy "Anon Insert Lead Duplicates" on lead_duplicates for insert with check (true);
+
+-- Analytics rollups, maintained incrementally by the agent after every scan
+create table if not exists lead_rollups (
+  day date not null,
+  platform text not null,
+  intent_label text not null,
+  leads int not null default 0,
+  primary key (day, platform, intent_label)
+);
+
+-- One-off backfill from leads stored before rollups existed (UTC days, as
+-- the agent counts them). Only runs while lead_rollups is empty, so running
+-- this file again never adds to counts the agent maintains.
+insert into lead_rollups (day, platform, intent_label, leads)
+select (detected_at at time zone 'utc')::date, platform, coalesce(intent_label, 'Low'), count(*)
+from leads
+where not exists (select 1 from lead_rollups)
+group by 1, 2, 3
+on conflict do nothing;
+
+create table if not exists provider_rollups (
+  day date not null,
+  provider text not null,
+  searches int not null default 0,
+  errors int not null default 0,
+  rate_limits int not null default 0,
+  primary key (day, provider)
+);
+
+create table if not exists scan_rollups (
+  day date primary key,
+  scans int not null default 0,
+  total_seconds double precision not null default 0,
+  max_seconds double precision not null default 0,
+  last_scan_at timestamp with time zone
+);
+
+-- Ids of applied rollup batches: the replicator delivers at least once, so
+-- a batch may arrive twice and must only be counted once
+create table if not exists rollup_batches (
+  id text primary key,
+  applied_at timestamp with time zone not null default now()
+);
+
+drop function if exists apply_rollups(jsonb, jsonb, jsonb);
+
+-- Adds a batch of deltas in one round trip (upserts can only overwrite).
+-- A batch_id seen before is skipped; ids older than 30 days are forgotten.
+create or replace function apply_rollups(lead_rows jsonb, provider_rows jsonb, scan_rows jsonb, batch_id text default null)
+returns void language plpgsql as $$
+begin
+  if batch_id is not null then
+    insert into rollup_batches (id) values (batch_id) on conflict (id) do nothing;
+    if not found then
+      return;
+    end if;
+    delete from rollup_batches where applied_at < now() - interval '30 days';
+  end if;
+
+  insert into lead_rollups (day, platform, intent_label, leads)
+  select (r->>'day')::date, r->>'platform', r->>'intent_label', (r->>'leads')::int
+  from jsonb_array_elements(lead_rows) r
+  on conflict (day, platform, intent_label) do update set leads = lead_rollups.leads + excluded.leads;
+
+  insert into provider_rollups (day, provider, searches, errors, rate_limits)
+  select (r->>'day')::date, r->>'provider', (r->>'searches')::int, (r->>'errors')::int, (r->>'rate_limits')::int
+  from jsonb_array_elements(provider_rows) r
+  on conflict (day, provider) do update set
+    searches = provider_rollups.searches + excluded.searches,
+    errors = provider_rollups.errors + excluded.errors,
+    rate_limits = provider_rollups.rate_limits + excluded.rate_limits;
+
+  insert into scan_rollups (day, scans, total_seconds, max_seconds, last_scan_at)
+  select (r->>'day')::date, (r->>'scans')::int, (r->>'total_seconds')::float8, (r->>'max_seconds')::float8, (r->>'last_scan_at')::timestamptz
+  from jsonb_array_elements(scan_rows) r
+  on conflict (day) do update set
+    scans = scan_rollups.scans + excluded.scans,
+    total_seconds = scan_rollups.total_seconds + excluded.total_seconds,
+    max_seconds = greatest(scan_rollups.max_seconds, excluded.max_seconds),
+    last_scan_at = greatest(scan_rollups.last_scan_at, excluded.last_scan_at);
+end;
+$$;
+
+-- Rollups are read-only for the anon key (dashboard); the agent writes them
+-- through apply_rollups() with the service role key, which bypasses RLS
+alter table lead_rollups enable row level security;
+alter table provider_rollups enable row level security;
+alter table scan_rollups enable row level security;
+alter table rollup_batches enable row level security;
+
+create policy "Public Read Lead Rollups" on lead_rollups for select using (true);
+create policy "Public Read Provider Rollups" on provider_rollups for select using (true);
+create policy "Public Read Scan Rollups" on scan_rollups for select using (true);
+drop policy if exists "Anon Write Lead Rollups" on lead_rollups;
+drop policy if exists "Anon Write Provider Rollups" on provider_rollups;
+drop policy if exists "Anon Write Scan Rollups" on scan_rollups;
+
+revoke execute on function apply_rollups(jsonb, jsonb, jsonb, text) from public, anon, authenticated;
+
+-- Distributed scanning (main.py --worker): one task per (provider, keyword),
+-- leased by one worker at a time and renewed by its heartbeats
+create table if not exists scan_tasks (
+  id text primary key,
+  provider text not null,
+  keyword text not null,
+  cursor text,
+  next_run_at timestamp with time zone not null default now(),
+  lease_owner text,
+  lease_expires_at timestamp with time zone not null default 'epoch',
+  heartbeat_at timestamp with time zone,
+  attempts int not null default 0,
+  last_error text,
+  completed_at timestamp with time zone
+);
+
+create index if not exists scan_tasks_due_idx on scan_tasks (provider, next_run_at);
+
+-- Leases due tasks; SKIP LOCKED keeps concurrent claims from waiting on or
+-- taking each other's rows. Expired leases count as free.
+create or replace function claim_scan_tasks(worker text, provider_names text[], max_tasks int, lease_seconds int)
+returns table (id text, provider text, keyword text, cursor text, previous_owner text)
+language sql as $$
+  with picked as (
+    select t.id, t.lease_owner from scan_tasks t
+    where t.provider = any(provider_names) and t.next_run_at <= now() and t.lease_expires_at <= now()
+    order by t.next_run_at
+    limit max_tasks
+    for update skip locked
+  )
+  update scan_tasks t set
+    lease_owner = worker,
+    lease_expires_at = now() + make_interval(secs => lease_seconds),
+    heartbeat_at = now()
+  from picked where t.id = picked.id
+  returning t.id, t.provider, t.keyword, t.cursor, picked.lease_owner;
+$$;
+
+create or replace function renew_scan_tasks(worker text, task_ids text[], lease_seconds int)
+returns table (id text) language sql as $$
+  update scan_tasks t set lease_expires_at = now() + make_interval(secs => lease_seconds), heartbeat_at = now()
+  where t.id = any(task_ids) and t.lease_owner = worker
+  returning t.id;
+$$;
+
+create or replace function complete_scan_tasks(worker text, results jsonb, interval_seconds int)
+returns void language sql as $$
+  update scan_tasks t set
+    cursor = coalesce(r->>'cursor', t.cursor),
+    next_run_at = now() + make_interval(secs => interval_seconds),
+    lease_owner = null, lease_expires_at = 'epoch',
+    attempts = 0, last_error = null, completed_at = now()
+  from jsonb_array_elements(results) r
+  where t.id = r->>'id' and t.lease_owner = worker;
+$$;
+
+create or replace function release_scan_tasks(worker text, task_ids text[], retry_seconds int, error text)
+returns void language sql as $$
+  update scan_tasks t set
+    lease_owner = null, lease_expires_at = 'epoch',
+    next_run_at = now() + make_interval(secs => retry_seconds),
+    attempts = t.attempts + 1, last_error = error
+  where t.id = any(task_ids) and t.lease_owner = worker;
+$$;
+
+-- Read-only for the anon key (dashboard); workers claim and update tasks
+-- with the service role key, which bypasses RLS
+alter table scan_tasks enable row level security;
+
+create policy "Public Read Scan Tasks" on scan_tasks for select using (true);
+drop policy if exists "Anon Write Scan Tasks" on scan_tasks;
+
+revoke execute on function claim_scan_tasks(text, text[], int, int) from public, anon, authenticated;
+revoke execute on function renew_scan_tasks(text, text[], int) from public, anon, authenticated;
+revoke execute on function complete_scan_tasks(text, jsonb, int) from public, anon, authenticated;
+revoke execute on function release_scan_tasks(text, text[], int, text) from public, anon, authenticated;
@@ -0,0 +1,123 @@
+-- SQLite mirror of schema.sql for the local backend (database.backend: sqlite).
+-- Timestamps are ISO-8601 UTC text, which sorts chronologically.
+
+-- Leads Table
+create table if not exists leads (
+  id integer primary key autoincrement,
+  platform text not null,
+  username text,
+  profile_url text,
+  post_text text not null,
+  post_id text unique not null,
+  matched_keyword text,
+  intent_score int,
+  intent_label text,
+  contact_info text,
+  detected_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+  notified integer not null default 0,
+  -- Set by the backend on every insert and update
+  updated_at text
+);
+
+-- Feed queries: keyset pagination on (detected_at, id), optionally per platform.
+-- Dedup lookups use the unique index on post_id.
+create index if not exists leads_detected_at_id_idx on leads (detected_at desc, id desc);
+create index if not exists leads_platform_detected_at_idx on leads (platform, detected_at desc, id desc);
+-- Dashboard cache watermark: max(updated_at) moves on in-place updates too
+create index if not exists leads_updated_at_idx on leads (updated_at desc);
+
+-- Logs Table
+create table if not exists logs (
+  id integer primary key autoincrement,
+  level text,
+  message text,
+  timestamp text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now')),
+  -- Set when the record is queued; a repeated insert of the row is ignored
+  log_id text
+);
+
+create index if not exists logs_timestamp_idx on logs (timestamp desc);
+create unique index if not exists logs_log_id_idx on logs (log_id);
+
+-- Reposts / cross-posts of a stored lead, found by the near-duplicate index.
+-- Not leads themselves: no separate alert, linked to the lead they copy.
+create table if not exists lead_duplicates (
+  id integer primary key autoincrement,
+  post_id text unique not null,
+  canonical_post_id text not null,
+  platform text not null,
+  username text,
+  profile_url text,
+  post_text text,
+  distance int,
+  detected_at text not null default (strftime('%Y-%m-%dT%H:%M:%f+00:00', 'now'))
+);
+
+create index if not exists lead_duplicates_canonical_idx on lead_duplicates (canonical_post_id);
+
+-- Analytics rollups, maintained incrementally by the agent after every scan
+create table if not exists lead_rollups (
+  day text not null,
+  platform text not null,
+  intent_label text not null,
+  leads int not null default 0,
+  primary key (day, platform, intent_label)
+);
+
+-- One-off backfill from leads stored before rollups existed; only while
+-- lead_rollups is empty, since this script runs on every start
+insert into lead_rollups (day, platform, intent_label, leads)
+select substr(detected_at, 1, 10), platform, coalesce(intent_label, 'Low'), count(*)
+from leads
+where not exists (select 1 from lead_rollups)
+group by 1, 2, 3
+on conflict do nothing;
+
+create table if not exists provider_rollups (
+  day text not null,
+  provider text not null,
+  searches int not null default 0,
+  errors int not null default 0,
+  rate_limits int not null default 0,
+  primary key (day, provider)
+);
+
+create table if not exists scan_rollups (
+  day text primary key,
+  scans int not null default 0,
+  total_seconds real not null default 0,
+  max_seconds real not null default 0,
+  last_scan_at text
+);
+
+-- Ids of applied rollup batches, so a retried batch is not counted twice
+create table if not exists rollup_batches (
+  id text primary key,
+  applied_at text not null
+);
+
+-- Writes waiting to be replicated to Supabase (database.replicate_to_supabase),
+-- appended in the same transaction as the local write
+create table if not exists replication_outbox (
+  id integer primary key autoincrement,
+  op text not null,
+  payload text not null
+);
+
+-- Distributed scanning (main.py --worker): one task per (provider, keyword),
+-- leased by one worker at a time and renewed by its heartbeats. Unix seconds.
+create table if not exists scan_tasks (
+  id text primary key,
+  provider text not null,
+  keyword text not null,
+  cursor text,
+  next_run_at real not null default 0,
+  lease_owner text,
+  lease_expires_at real not null default 0,
+  heartbeat_at real,
+  attempts int not null default 0,
+  last_error text,
+  completed_at real
+);
+
+create index if not exists scan_tasks_due_idx on scan_tasks (provider, next_run_at);
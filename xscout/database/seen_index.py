@@ -0,0 +1,95 @@
+import os
+import threading
+from collections import OrderedDict
+
+class SeenIndex:
+    """
+    Local set of post_ids we already stored, checked before hitting the database.
+    Warmed once with a bulk query of recent post_ids and persisted to disk
+    between restarts. contains() answers True/False when it can be sure, and
+    None when only the database knows (the warm query did not cover the whole
+    leads table, ids were evicted, or other workers write to it too:
+    exclusive=False).
+
+    Holds at most warm_limit ids; the oldest are dropped first.
+    """
+
+    def __init__(self, db, path, warm_limit=50000, exclusive=True):
+        self.db = db
+        self.exclusive = exclusive
+        self.path = path
+        self.warm_limit = warm_limit
+        self.post_ids = OrderedDict()  # oldest first
+        self.complete = False  # True when the index covers every stored lead
+        self.warmed = False
+        self.dirty = False
+        self.lock = threading.Lock()
+
+    def warm(self):
+        self._load()
+        recent = self.db.recent_post_ids(limit=self.warm_limit)
+        with self.lock:
+            if recent is not None:
+                for post_id in reversed(recent):
+                    self.post_ids.setdefault(post_id)
+                # Fewer rows than asked for means we have the whole table
+                self.complete = self.exclusive and len(recent) < self.warm_limit
+                self._evict()
+            self.warmed = True
+        print(f"[SeenIndex] Warmed with {len(self.post_ids)} post ids (complete: {self.complete})")
+
+    def contains(self, post_id):
+        with self.lock:
+            if post_id in self.post_ids:
+                return True
+            return False if self.complete else None
+
+    def add(self, post_id):
+        with self.lock:
+            if post_id in self.post_ids:
+                self.post_ids.move_to_end(post_id)
+            else:
+                self.post_ids[post_id] = None
+                self._evict()
+            self.dirty = True
+
+    def _evict(self):
+        # Caller holds the lock. Once an id is gone a miss no longer proves
+        # the post is new, so the database has to be asked from then on.
+        excess = len(self.post_ids) - self.warm_limit
+        if excess <= 0:
+            return
+        for _ in range(excess):
+            self.post_ids.popitem(last=False)
+        self.complete = False
+        self.dirty = True
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                ids = [line.strip() for line in f if line.strip()]
+            with self.lock:
+                for post_id in ids:
+                    self.post_ids[post_id] = None
+                self._evict()
+        except Exception as e:
+            print(f"[SeenIndex] Could not load {self.path}: {e}")
+
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            ids = list(self.post_ids)
+            self.dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                f.write("\n".join(ids))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            with self.lock:
+                self.dirty = True
+            print(f"[SeenIndex] Could not save {self.path}: {e}")
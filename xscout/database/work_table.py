@@ -0,0 +1,164 @@
+import time
+
+
+def task_id(provider_name, keyword):
+    return f"{provider_name}:{keyword}"
+
+
+def create_work_table(backend):
+    """Work table in the same storage as the leads, so every worker that
+    shares the database also shares the tasks. None without a backend."""
+    if backend is None:
+        return None
+    from xscout.database.backends.sqlite_backend import SQLiteBackend
+    if isinstance(backend, SQLiteBackend):
+        return SQLiteWorkTable(backend)
+    return SupabaseWorkTable(backend)
+
+
+class SQLiteWorkTable:
+    """
+    scan_tasks rows (one per provider and keyword) in the SQLite backend's
+    file. Worker processes on the same host open the same file; a claim runs
+    in a BEGIN IMMEDIATE transaction, so two workers never lease the same task.
+    Times are unix seconds.
+    """
+
+    def __init__(self, backend):
+        self.conn = backend.conn
+        self.lock = backend.lock
+
+    def sync(self, tasks):
+        """Make the table hold exactly `tasks` [(provider, keyword)] for those
+        providers: new keywords are due at once, removed ones are deleted."""
+        ids = {task_id(p, k): (p, k) for p, k in tasks}
+        providers = sorted({p for p, _ in tasks})
+        if not providers:
+            return
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "insert into scan_tasks (id, provider, keyword) values (?, ?, ?) on conflict(id) do nothing",
+                [(i, p, k) for i, (p, k) in ids.items()]
+            )
+            existing = self.conn.execute(
+                f"select id from scan_tasks where provider in ({','.join('?' * len(providers))})", providers
+            ).fetchall()
+            stale = [(row["id"],) for row in existing if row["id"] not in ids]
+            self.conn.executemany("delete from scan_tasks where id = ?", stale)
+
+    def claim(self, worker_id, providers, limit, lease_seconds):
+        """Lease up to `limit` due tasks of these providers, oldest due first.
+        Tasks whose lease expired (a worker died or stalled) are due too;
+        previous_owner is set on those."""
+        if not providers:
+            return []
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute("begin immediate")
+            rows = self.conn.execute(
+                f"select id, provider, keyword, cursor, lease_owner from scan_tasks "
+                f"where provider in ({','.join('?' * len(providers))}) and next_run_at <= ? and lease_expires_at <= ? "
+                f"order by next_run_at limit ?",
+                [*providers, now, now, limit]
+            ).fetchall()
+            self.conn.executemany(
+                "update scan_tasks set lease_owner = ?, lease_expires_at = ?, heartbeat_at = ? where id = ?",
+                [(worker_id, now + lease_seconds, now, row["id"]) for row in rows]
+            )
+        return [{
+            "id": row["id"], "provider": row["provider"], "keyword": row["keyword"],
+            "cursor": row["cursor"], "previous_owner": row["lease_owner"]
+        } for row in rows]
+
+    def renew(self, worker_id, ids, lease_seconds):
+        """Extend our leases. Returns the ids still held (others were reclaimed)."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "update scan_tasks set lease_expires_at = ?, heartbeat_at = ? where id = ? and lease_owner = ?",
+                [(now + lease_seconds, now, i, worker_id) for i in ids]
+            )
+            return self._held(worker_id, ids)
+
+    def complete(self, worker_id, cursors, interval_seconds):
+        """Finish tasks ({id: new cursor or None}); each is due again after
+        interval_seconds. Tasks we no longer hold are left alone."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "update scan_tasks set cursor = coalesce(?, cursor), next_run_at = ?, lease_owner = null, "
+                "lease_expires_at = 0, attempts = 0, last_error = null, completed_at = ? "
+                "where id = ? and lease_owner = ?",
+                [(cursor, now + interval_seconds, now, i, worker_id) for i, cursor in cursors.items()]
+            )
+
+    def release(self, worker_id, ids, retry_seconds=0, error=None):
+        """Give tasks back unfinished; any worker may retry them after retry_seconds."""
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "update scan_tasks set lease_owner = null, lease_expires_at = 0, next_run_at = ?, "
+                "attempts = attempts + 1, last_error = ? where id = ? and lease_owner = ?",
+                [(now + retry_seconds, error, i, worker_id) for i in ids]
+            )
+
+    def _held(self, worker_id, ids):
+        ids = list(ids)
+        if not ids:
+            return []
+        rows = self.conn.execute(
+            f"select id from scan_tasks where lease_owner = ? and id in ({','.join('?' * len(ids))})",
+            [worker_id, *ids]
+        ).fetchall()
+        return [row["id"] for row in rows]
+
+
+class SupabaseWorkTable:
+    """
+    scan_tasks in Supabase, for workers on different nodes. Claims and lease
+    updates go through the SQL functions in schema.sql (FOR UPDATE SKIP LOCKED,
+    database clock), so workers' clocks never have to agree.
+    """
+
+    def __init__(self, backend):
+        self.client = backend.client
+
+    def sync(self, tasks):
+        ids = {task_id(p, k): (p, k) for p, k in tasks}
+        providers = sorted({p for p, _ in tasks})
+        if not providers:
+            return
+        rows = [{"id": i, "provider": p, "keyword": k} for i, (p, k) in ids.items()]
+        self.client.table("scan_tasks").upsert(rows, on_conflict="id", ignore_duplicates=True).execute()
+        existing = self.client.table("scan_tasks").select("id").in_("provider", providers).execute().data or []
+        stale = [row["id"] for row in existing if row["id"] not in ids]
+        if stale:
+            self.client.table("scan_tasks").delete().in_("id", stale).execute()
+
+    def claim(self, worker_id, providers, limit, lease_seconds):
+        if not providers:
+            return []
+        response = self.client.rpc("claim_scan_tasks", {
+            "worker": worker_id, "provider_names": list(providers),
+            "max_tasks": limit, "lease_seconds": lease_seconds
+        }).execute()
+        return response.data or []
+
+    def renew(self, worker_id, ids, lease_seconds):
+        response = self.client.rpc("renew_scan_tasks", {
+            "worker": worker_id, "task_ids": list(ids), "lease_seconds": lease_seconds
+        }).execute()
+        return [row["id"] if isinstance(row, dict) else row for row in response.data or []]
+
+    def complete(self, worker_id, cursors, interval_seconds):
+        self.client.rpc("complete_scan_tasks", {
+            "worker": worker_id,
+            "results": [{"id": i, "cursor": cursor} for i, cursor in cursors.items()],
+            # int parameters in SQL; the scan interval is configured in minutes
+            "interval_seconds": int(interval_seconds)
+        }).execute()
+
+    def release(self, worker_id, ids, retry_seconds=0, error=None):
+        self.client.rpc("release_scan_tasks", {
+            "worker": worker_id, "task_ids": list(ids), "retry_seconds": int(retry_seconds), "error": error
+        }).execute()
@@ -0,0 +1,134 @@
+import time
+import bisect
+import threading
+from collections import defaultdict
+
+# Latency buckets in seconds: from in-memory work up to slow API calls
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30)
+
+# name -> (type, help) for every metric the agent exports
+METRICS = {
+    "xscout_stage_seconds": ("histogram", "Time spent per pipeline stage"),
+    "xscout_search_seconds": ("histogram", "Provider latency per result page, including rate-limit waits"),
+    "xscout_posts_fetched_total": ("counter", "Posts returned by provider searches"),
+    "xscout_posts_deduped_total": ("counter", "Posts skipped because they were already stored"),
+    "xscout_near_duplicates_total": ("counter", "Posts linked to a recent lead as a repost or cross-post"),
+    "xscout_leads_saved_total": ("counter", "New leads queued for storage"),
+    "xscout_notifications_total": ("counter", "Notification outcomes per lead"),
+    "xscout_rate_limited_total": ("counter", "Rate limits hit (source=api for 429s, local for our own budget)"),
+    "xscout_search_errors_total": ("counter", "Searches that failed with an error"),
+}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{str(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class _Timer:
+    # A plain class rather than @contextmanager: it wraps every post's stages
+    __slots__ = ("metrics", "key", "started")
+
+    def __init__(self, metrics, key):
+        self.metrics = metrics
+        self.key = key
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics._observe(self.key, time.perf_counter() - self.started)
+
+
+class Metrics:
+    """
+    In-process counters and latency histograms for the agent, rendered in the
+    Prometheus text format (GET /metrics on the control endpoint).
+    Everything recorded since the last end_cycle() is also kept separately,
+    for the one-line summary the scheduler logs after every scan.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.lock = threading.Lock()
+        self.counters = defaultdict(float)  # (name, labels) -> value
+        self.histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+        self.cycle_counters = defaultdict(float)
+        self.cycle_timings = {}  # (name, labels) -> [count, total, max]
+
+    def inc(self, name, value=1, **labels):
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] += value
+            self.cycle_counters[name] += value
+
+    def observe(self, name, seconds, **labels):
+        self._observe(_key(name, labels), seconds)
+
+    def _observe(self, key, seconds):
+        with self.lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                # One slot per bucket plus one for +Inf, then sum and count
+                hist = self.histograms[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            hist[bisect.bisect_left(self.buckets, seconds)] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+            timing = self.cycle_timings.setdefault(key, [0, 0.0, 0.0])
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = max(timing[2], seconds)
+
+    def time(self, name, **labels):
+        """Context manager that observes the wall time of its block."""
+        return _Timer(self, _key(name, labels))
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: list(hist) for key, hist in self.histograms.items()}
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                continue
+            for (metric, labels), hist in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(self.buckets, hist):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, ('le', '+Inf'))} {hist[-1]}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist[-2]:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def end_cycle(self):
+        """Summary of what was recorded since the previous call, then reset:
+        {"counts": {name: n}, "<histogram>": {label: {count, total_ms, max_ms}}}."""
+        with self.lock:
+            counters, timings = self.cycle_counters, self.cycle_timings
+            self.cycle_counters = defaultdict(float)
+            self.cycle_timings = {}
+
+        summary = {"counts": {name.replace("xscout_", "").replace("_total", ""): int(value)
+                              for name, value in sorted(counters.items())}}
+        for (name, labels), (count, total, longest) in sorted(timings.items()):
+            section = summary.setdefault(name.replace("xscout_", "").replace("_seconds", ""), {})
+            label = ",".join(str(v) for _, v in labels) or "all"
+            section[label] = {"count": count, "total_ms": round(total * 1000, 2), "max_ms": round(longest * 1000, 2)}
+        return summary
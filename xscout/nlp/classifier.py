@@ -1,35 +1,126 @@
+import re
+from ..config.loader import config
+
+EMAIL_PATTERN = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+
+DEFAULT_RULES = {
+    "high_intent_keywords": [
+        "urgently", "budget", "looking to hire", "pay", "quote", "startup", "launching"
+    ],
+    "negative_keywords": [
+        "hiring", "job", "vacancy", "career", "join our team", "salary", "recruit", "looking for a job"
+    ],
+    # 'I need' or 'We need' pattern is strong
+    "intent_phrases": ["need a", "looking for a"],
+    "contact_keywords": ["dm", "inbox", "message me"],
+    # word: whole words only, prefix: match at word starts ("recruit" -> "recruiter"),
+    # none: plain substring matching
+    "word_boundary": "prefix"
+}
+
+RULE_KINDS = {
+    "negative_keywords": "negative",
+    "high_intent_keywords": "intent",
+    "intent_phrases": "phrase",
+    "contact_keywords": "contact"
+}
+
+
+def _trie_pattern(terms):
+    """Build a regex from a character trie of the terms (e.g. pay(?:ment)?),
+    so matching at each position costs one walk down the trie instead of
+    one attempt per term."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
 class LeadClassifier:
-    def __init__(self):
-        self.high_intent_keywords = [
-            "urgently", "budget", "looking to hire", "pay", "quote", "startup", "launching"
-        ]
-        self.negative_keywords = [
-            "hiring", "job", "vacancy", "career", "join our team", "salary", "recruit", "looking for a job"
-        ]
+    def __init__(self, rules=None):
+        self.set_rules(rules if rules is not None else config.get("classifier", {}))
+
+    def set_rules(self, rules):
+        """(Re)compile the matcher from a rules dict; missing lists use DEFAULT_RULES."""
+        rules = rules or {}
+        self.high_intent_keywords = rules.get("high_intent_keywords") or DEFAULT_RULES["high_intent_keywords"]
+        self.negative_keywords = rules.get("negative_keywords") or DEFAULT_RULES["negative_keywords"]
+        self.intent_phrases = rules.get("intent_phrases") or DEFAULT_RULES["intent_phrases"]
+        self.contact_keywords = rules.get("contact_keywords") or DEFAULT_RULES["contact_keywords"]
+        self.word_boundary = rules.get("word_boundary") or DEFAULT_RULES["word_boundary"]
+        self._compile()
+
+    def _compile(self):
+        # term -> set of (kind, term) it implies. A longer term also implies any
+        # rule that is a prefix of it, since only the longest match per
+        # position is reported (e.g. "looking for a job" -> "looking for a").
+        kinds = {}
+        for list_name, kind in RULE_KINDS.items():
+            for term in getattr(self, list_name):
+                term = term.lower().strip()
+                if term:
+                    kinds.setdefault(term, set()).add(kind)
+
+        self.rule_hits = {}
+        for term in kinds:
+            hits = set()
+            for other, other_kinds in kinds.items():
+                if term.startswith(other) and self._boundary_ok(term, len(other)):
+                    hits.update((kind, other) for kind in other_kinds)
+            self.rule_hits[term] = hits
+
+        if not kinds:
+            self.matcher = None
+            return
+        start = r"\b" if self.word_boundary in ("word", "prefix") else ""
+        end = r"\b" if self.word_boundary == "word" else ""
+        # Zero-width lookahead so overlapping rules at every position are found
+        # in one left-to-right pass over the text
+        self.matcher = re.compile(f"(?={start}({_trie_pattern(kinds)}){end})")
+
+    def _boundary_ok(self, term, length):
+        if length == len(term) or self.word_boundary != "word":
+            return True
+        return not (term[length].isalnum() or term[length] == "_")
+
+    def match(self, text):
+        """Single pass over the text. Returns {kind: set of matched rules}."""
+        found = {kind: set() for kind in RULE_KINDS.values()}
+        if not self.matcher or not text:
+            return found
+        rule_hits = self.rule_hits
+        for m in self.matcher.finditer(text.lower()):
+            for kind, term in rule_hits[m.group(1)]:
+                found[kind].add(term)
+        return found
 
     def score_text(self, text):
         """
         Score the text from 0 to 10 based on intent.
-        Returns (score, explanation)
         """
-        text = text.lower()
-        score = 0
-        
-        # Check for negative keywords (Recruitment/Job posts)
-        for bad_word in self.negative_keywords:
-            if bad_word in text:
-                return 0  # Immediate zero for recruitment posts
+        return self._score(self.match(text))
 
-        # Base score for matching a search query (assumed if it got here)
-        score += 3
+    def _score(self, found):
+        # Immediate zero for recruitment posts
+        if found["negative"]:
+            return 0
 
+        # Base score for matching a search query (assumed if it got here)
+        score = 3
         # Intent boosters
-        for word in self.high_intent_keywords:
-            if word in text:
-                score += 2
-        
-        # 'I need' or 'We need' pattern is strong
-        if "need a" in text or "looking for a" in text:
+        score += 2 * len(found["intent"])
+        if found["phrase"]:
             score += 2
 
         return min(score, 10)
@@ -43,23 +134,30 @@ class LeadClassifier:
             return "Low"
 
     def extract_contact_info(self, text):
-        import re
+        return self._contact_info(text, self.match(text))
+
+    def _contact_info(self, text, found):
         info = []
         # Email regex
-        emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+        emails = EMAIL_PATTERN.findall(text)
         if emails:
             info.append(f"Emails: {', '.join(emails)}")
-        
+
         # DM/Inbox mentions
-        if "dm" in text.lower() or "inbox" in text.lower() or "message me" in text.lower():
+        if found["contact"]:
             info.append("Request: DM/Inbox")
-            
+
         return " | ".join(info) if info else "None"
 
     def analyze(self, text):
-        score = self.score_text(text)
+        found = self.match(text)
+        score = self._score(found)
         return {
             "score": score,
             "label": self.get_intent_label(score),
-            "contact_info": self.extract_contact_info(text)
+            "contact_info": self._contact_info(text, found)
         }
+
+    def analyze_many(self, texts):
+        """Batch form of analyze(); one matcher pass per text."""
+        return [self.analyze(text or "") for text in texts]
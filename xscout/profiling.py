@@ -0,0 +1,126 @@
+import io
+import os
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+
+# Stdlib threading/queue plumbing. A sample whose innermost frame is in one of
+# these is a thread blocked waiting, and such frames are left out of summaries.
+IDLE_FILES = {"threading.py", "queue.py", "thread.py", "selectors.py", "socketserver.py"}
+
+def _frame_file(name):
+    # "func (file.py:12)" -> "file.py"
+    return name.rsplit("(", 1)[-1].split(":")[0]
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread each `interval` seconds from a
+    background thread. Unlike cProfile this also sees the search worker
+    threads, and costs the profiled code almost nothing.
+    Output is in the folded-stacks format read by flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()  # "thread;outer;...;inner" -> samples
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self.stop_event.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def summary(self, top):
+        """Functions by inclusive samples (time on the stack) while their
+        thread was busy, as text. The .folded file keeps idle stacks too."""
+        inclusive = Counter()
+        busy = 0
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames or _frame_file(frames[-1]) in IDLE_FILES:
+                continue
+            busy += count
+            for name in set(frames):
+                if _frame_file(name) not in IDLE_FILES:
+                    inclusive[name] += count
+        lines = [f"  {'samples':>8}  {'share':>6}  function  ({busy} busy thread samples)"]
+        total = max(1, busy)
+        for name, count in inclusive.most_common(top):
+            lines.append(f"  {count:>8}  {100.0 * count / total:>5.1f}%  {name}")
+        return "\n".join(lines)
+
+
+class ScanProfiler:
+    """
+    Profiles scan cycles one at a time: run(label, fn) calls fn under the
+    profiler, writes one file per cycle to out_dir and prints the top
+    functions by cumulative time.
+
+    mode "cprofile" writes .pstats (snakeviz, python -m pstats) but only
+    traces the calling thread; "sample" writes .folded stacks for all threads.
+    """
+
+    def __init__(self, mode="cprofile", out_dir="xscout/state/profiles", top=20, interval=0.005):
+        self.mode = mode
+        self.out_dir = out_dir
+        self.top = top
+        self.interval = interval
+        os.makedirs(out_dir, exist_ok=True)
+
+    def run(self, label, fn, *args):
+        path = os.path.join(self.out_dir, f"{label}-{time.strftime('%Y%m%d-%H%M%S')}")
+        started = time.perf_counter()
+        if self.mode == "sample":
+            profiler = SamplingProfiler(self.interval)
+            profiler.start()
+            try:
+                return fn(*args)
+            finally:
+                profiler.stop()
+                profiler.write(path + ".folded")
+                self._report(label, started, path + ".folded", profiler.summary(self.top))
+
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(fn, *args)
+        finally:
+            profiler.dump_stats(path + ".pstats")
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(self.top)
+            # Drop pstats' header lines; the function table is what matters
+            table = out.getvalue()
+            table = table[table.find("   ncalls"):] if "   ncalls" in table else table
+            self._report(label, started, path + ".pstats", table.rstrip())
+
+    def _report(self, label, started, path, summary):
+        print(f"[Profile] {label}: {time.perf_counter() - started:.2f}s, wrote {path}")
+        print(summary)
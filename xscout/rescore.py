@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+import pandas as pd
+from .config.loader import config
+from .database.manager import db_manager
+from .nlp.classifier import LeadClassifier
+
+RESCORE_COLUMNS = ["id", "platform", "post_id", "post_text", "intent_score", "intent_label", "contact_info"]
+
+
+def rules_fingerprint(classifier):
+    rules = [
+        classifier.high_intent_keywords, classifier.negative_keywords,
+        classifier.intent_phrases, classifier.contact_keywords, classifier.word_boundary
+    ]
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+def score_chunk(classifier, df):
+    """Score a chunk of leads and return only the rows whose score, label or
+    contact info changed, with the new values filled in."""
+    texts = df["post_text"].fillna("").astype(str)
+    # Reposts and templated posts repeat a lot; classify each distinct text once
+    unique_texts = texts.unique()
+    analyses = pd.DataFrame(classifier.analyze_many(unique_texts), index=unique_texts)
+    scored = analyses.reindex(texts.values)
+    scored.index = df.index
+
+    changed = (
+        (df["intent_score"] != scored["score"])
+        | (df["intent_label"] != scored["label"])
+        | (df["contact_info"] != scored["contact_info"])
+    )
+    updates = df.loc[changed, ["id", "platform", "post_id", "post_text"]].copy()
+    updates["intent_score"] = scored.loc[changed, "score"].astype(int)
+    updates["intent_label"] = scored.loc[changed, "label"]
+    updates["contact_info"] = scored.loc[changed, "contact_info"]
+    return updates
+
+
+def _load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _save_checkpoint(path, state):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+def rescore(chunk_size=1000, resume=False, dry_run=False):
+    """
+    Re-run the classifier over every stored lead and write back only the rows
+    whose intent_score / intent_label / contact_info changed. Leads are
+    streamed in keyset-paginated chunks by id; progress is checkpointed after
+    each chunk so an interrupted run continues with --resume.
+    """
+    if not db_manager.backend:
+        print("[Rescore] No database connection. Nothing to do.")
+        return
+
+    classifier = LeadClassifier()
+    fingerprint = rules_fingerprint(classifier)
+    # Dry runs write nothing, so their progress must never let a real
+    # --resume skip rows
+    checkpoint_path = config.state_path("rescore_dry_run_checkpoint.json" if dry_run else "rescore_checkpoint.json")
+
+    state = _load_checkpoint(checkpoint_path) if resume else None
+    if state and state.get("rules") != fingerprint:
+        print("[Rescore] Classifier rules changed since the checkpoint. Starting over.")
+        state = None
+    if not state:
+        state = {"rules": fingerprint, "last_id": 0, "scanned": 0, "changed": 0}
+    else:
+        print(f"[Rescore] Resuming after lead id {state['last_id']} ({state['scanned']} already scanned)")
+
+    started = time.time()
+    scanned_at_start = state["scanned"]
+    while True:
+        try:
+            rows = db_manager.fetch_leads_after(state["last_id"], chunk_size, RESCORE_COLUMNS)
+        except Exception as e:
+            print(f"[Rescore] ! Fetch failed: {e}. Re-run with --resume to continue.")
+            return
+        if not rows:
+            break
+
+        df = pd.DataFrame(rows, columns=RESCORE_COLUMNS)
+        updates = score_chunk(classifier, df)
+        if not dry_run and not updates.empty:
+            try:
+                # astype(object) turns numpy scalars into plain ints for the JSON payload
+                db_manager.update_lead_scores(updates.astype(object).to_dict("records"))
+            except Exception as e:
+                print(f"[Rescore] ! Update failed: {e}. Re-run with --resume to continue.")
+                return
+
+        state["last_id"] = int(df["id"].max())
+        state["scanned"] += len(df)
+        state["changed"] += len(updates)
+        _save_checkpoint(checkpoint_path, state)
+
+        elapsed = time.time() - started
+        rate = (state["scanned"] - scanned_at_start) / elapsed if elapsed else 0
+        print(f"[Rescore] {state['scanned']} scanned, {state['changed']} changed "
+              f"({rate:.0f} leads/s, last id {state['last_id']})")
+
+        if len(df) < chunk_size:
+            break
+
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    action = "would change" if dry_run else "updated"
+    print(f"[Rescore] Done: {state['scanned']} leads scanned, {state['changed']} {action} "
+          f"in {time.time() - started:.1f}s")
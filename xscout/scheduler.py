@@ -1,138 +1,470 @@
+import os
+import json
 import time
+import queue
+import threading
 import schedule
+from concurrent.futures import ThreadPoolExecutor
 from .config.loader import config
 from .database.manager import db_manager
+from .database.seen_index import SeenIndex
+from .database.rollups import RollupAggregator
 from .search_engine.twitter import TwitterProvider
 from .search_engine.linkedin import LinkedInProvider
+from .search_engine.ratelimit import RateLimiter, RateLimitExceeded
+from .search_engine.cursors import CursorStore
+from .search_engine.query_planner import match_keyword
 from .nlp.classifier import LeadClassifier
+from .nlp.near_duplicates import NearDuplicateIndex
 from .notifications.whatsapp import WhatsAppNotifier
+from .notifications.dispatcher import NotificationDispatcher
+from .control import ControlChannel
+from .metrics import Metrics
+
+CONTROL_FILE = "xscout/control.json"
+
+def default_providers():
+    return [
+        TwitterProvider(
+            api_key=config.get("api_keys.twitter.bearer_token"),
+            max_query_length=config.get("api_limits.twitter.max_query_length", 512),
+            max_pages=config.get("api_limits.twitter.max_pages", 1)
+        ),
+        LinkedInProvider(
+            email=config.get("api_keys.linkedin.username"),
+            password=config.get("api_keys.linkedin.password"),
+            session_path=config.state_path("linkedin_session.pkl")
+        )
+    ]
 
 class XScoutScheduler:
-    def __init__(self, dry_run=False):
+    def __init__(self, dry_run=False, providers=None, db=None):
+        """providers / db default to the configured search providers and the
+        global db_manager; the benchmark passes replay providers and a local store."""
         self.dry_run = dry_run
+        self.db = db if db is not None else db_manager
         self.keywords = config.get("keywords", [])
         self.min_score = config.get("app.min_intent_score", 7)
+        self.scan_workers = config.get("app.scan_workers", 4)
+        self.max_in_flight = config.get("app.max_in_flight_per_provider", 1)
+        # Result pages buffered between the fetch workers and processing
+        self.pipeline_pages = config.get("app.pipeline_queue_pages", 16)
+        self.paused = False
+        self.scanning = False
+        self.scan_count = 0
+        self.last_scan_at = None
+        self.control = None
+        # Stage latencies and counters: GET /metrics, plus one summary log per scan
+        self.metrics = Metrics()
+        # Optional ScanProfiler (main.py --profile) wrapped around every scan
+        self.profiler = None
         
         # Initialize components
-        self.providers = [
-            TwitterProvider(
-                api_key=config.get("api_keys.twitter.bearer_token")
-            ),
-            LinkedInProvider(
-                email=config.get("api_keys.linkedin.username"),
-                password=config.get("api_keys.linkedin.password")
-            )
-        ]
+        self.providers = providers if providers is not None else default_providers()
         self.classifier = LeadClassifier()
-        self.notifier = WhatsAppNotifier()
+        # Keyword / scoring edits in config.yaml apply from the next scan
+        config.subscribe(self._apply_config)
+        notify_workers = config.get("notifications.workers", 2)
+        self.notifier = WhatsAppNotifier(pool_size=notify_workers)
+        # The scan loop only enqueues; delivery and retries happen on workers
+        self.dispatcher = NotificationDispatcher(
+            self.notifier,
+            on_delivered=self._on_notified,
+            on_failed=self._on_notify_failed,
+            metrics=self.metrics,
+            workers=notify_workers,
+            queue_size=config.get("notifications.queue_size", 100),
+            max_retries=config.get("notifications.max_retries", 3),
+            backoff_base=config.get("notifications.backoff_seconds", 1.0),
+            digest_window=config.get("notifications.digest_window_seconds", 0),
+            digest_max=config.get("notifications.digest_max_leads", 5)
+        )
 
-    def scan(self):
-        print(f"\n[Scheduler] Starting scan at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-        blocked_providers = set()
+        # Local dedup index; warmed lazily on the first scan
+        self.seen_index = SeenIndex(
+            self.db,
+            config.state_path("seen_posts.txt"),
+            warm_limit=config.get("app.seen_index_warm_limit", 50000)
+        )
+
+        # Reposts / cross-posts of recent leads are linked to them instead of
+        # being saved and alerted on again; loaded lazily on the first scan
+        self.near_duplicates = None
+        if config.get("near_duplicates.enabled", True):
+            self.near_duplicates = NearDuplicateIndex(
+                config.state_path("near_duplicates.bin"),
+                max_entries=config.get("near_duplicates.max_entries", 500000),
+                max_age=config.get("near_duplicates.window_days", 7) * 86400,
+                max_distance=config.get("near_duplicates.max_distance", 7),
+                min_tokens=config.get("near_duplicates.min_words", 6),
+                max_bucket_scan=config.get("near_duplicates.max_bucket_scan", 256)
+            )
+
+        # Per-provider token buckets; kept for the life of the agent so
+        # budgets carry across scan cycles
+        self.rate_limiter = RateLimiter(config)
+        for provider in self.providers:
+            provider.rate_limiter = self.rate_limiter
+
+        # Analytics counters, added to the rollup tables after each scan
+        self.rollups = RollupAggregator(self.db, config.state_path("pending_rollups.json"))
+
+        # since_id / timestamp high-water marks per (provider, keyword)
+        self.cursors = CursorStore(config.state_path("cursors.json"))
+
+        # Caps concurrent requests per provider, independent of the pool size
+        self.provider_slots = {
+            provider: threading.BoundedSemaphore(self.max_in_flight)
+            for provider in self.providers
+        }
+
+    def _since(self, provider, keywords, cursors):
+        # A packed query can only resume from the oldest of its keywords' cursors
+        positions = [cursors.get(provider, keyword) for keyword in keywords]
+        if None in positions:
+            return None
+        return min(positions, key=provider.cursor_order)
+
+    def _fetch(self, provider, query, keywords, blocked_providers, pages, cancelled, cursors):
+        """Runs on a worker thread. Puts each result page on the pipeline queue
+        as it arrives (blocking while the queue is full), then one final
+        "done" / "skipped" / "error" message for the query."""
+        def put(message):
+            # Blocks for backpressure, but gives up if the scan was abandoned
+            while not cancelled.is_set():
+                try:
+                    pages.put(message, timeout=0.5)
+                    return
+                except queue.Full:
+                    pass
+            raise RuntimeError("scan cancelled")
 
-        for keyword in self.keywords:
-            print(f"  > Scanning for keyword: '{keyword}'")
-            for provider in self.providers:
+        try:
+            cursor = None
+            with self.provider_slots[provider]:
                 # Skip if this provider already hit a rate limit in this cycle
                 if provider in blocked_providers:
-                    continue
+                    put(("skipped", provider, keywords, None))
+                    return
+                stream = self._stream(provider, query, keywords, blocked_providers, cursors)
+                while True:
+                    started = time.perf_counter()
+                    try:
+                        page = next(stream)
+                    except StopIteration as stop:
+                        # The provider says where to resume: a search cut short
+                        # (page budget, 429, error) must not skip what it missed
+                        cursor = stop.value
+                        break
+                    self.metrics.observe("xscout_search_seconds", time.perf_counter() - started, provider=provider.name)
+                    put(("page", provider, keywords, (page, time.perf_counter())))
+            put(("done", provider, keywords, cursor))
+        except Exception as e:
+            if not cancelled.is_set():
+                put(("error", provider, keywords, e))
 
-                # Add delay to respect rate limits (especially Twitter)
-                time.sleep(5) 
-                
-                try:
-                    results = provider.search(keyword)
-                    self.process_results(results, keyword)
-                except Exception as e:
-                    error_msg = str(e)
-                    
-                    if "429" in error_msg or "Too Many Requests" in error_msg:
-                        print(f"    [!] Rate Limit hit for {provider.__class__.__name__}. Skipping rest of scan for this provider.")
-                        db_manager.log("WARNING", f"Rate limit hit for {provider.__class__.__name__} - Skipping rest of cycle")
+    def _stream(self, provider, query, keywords, blocked_providers, cursors):
+        since = self._since(provider, keywords, cursors)
+        try:
+            return (yield from provider.stream(query, count=provider.page_size, since=since))
+        except RateLimitExceeded as e:
+            # A real 429 before the first page: drain the bucket until the API's
+            # reset time, then retry once if that is within rate_limits.max_wait_seconds
+            if e.local:
+                raise
+            self.rate_limiter.record_rate_limited(provider, e.reset_at)
+            self.rollups.record_rate_limit(provider.name)
+            self.metrics.inc("xscout_rate_limited_total", provider=provider.name, source="api")
+            if provider in blocked_providers or not self.rate_limiter.can_wait(provider):
+                raise
+            print(f"    [!] Rate Limit hit for {provider.__class__.__name__}. Waiting for reset...")
+            self.db.log("WARNING", f"Rate limit hit for {provider.__class__.__name__} - Waiting for reset")
+            return (yield from provider.stream(query, count=provider.page_size, since=since))
+
+    def _apply_config(self, cfg):
+        self.keywords = cfg.get("keywords", [])
+        self.min_score = cfg.get("app.min_intent_score", 7)
+        self.classifier.set_rules(cfg.get("classifier", {}))
+        print(f"[Scheduler] Config applied: {len(self.keywords)} keywords, min score {self.min_score}")
+
+    def scan(self, assignments=None, cursors=None):
+        """One scan cycle. assignments ({provider: [keywords]}) and cursors
+        default to every provider x every keyword and the local CursorStore;
+        a ScanWorker passes the tasks it leased instead."""
+        config.reload_if_changed()
+        print(f"\n[Scheduler] Starting scan at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+        started = time.time()
+        self.scanning = True
+        try:
+            if self.profiler:
+                self.profiler.run(f"scan-{self.scan_count + 1}", self._scan, started, assignments, cursors)
+            else:
+                self._scan(started, assignments, cursors)
+        finally:
+            self.scanning = False
+            self.scan_count += 1
+            self.last_scan_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+    def _scan(self, started, assignments=None, cursors=None):
+        blocked_providers = set()
+        cursors = cursors or self.cursors
+        if assignments is None:
+            assignments = {provider: self.keywords for provider in self.providers}
+
+        if not self.seen_index.warmed:
+            self.seen_index.warm()
+        if self.near_duplicates and not self.near_duplicates.loaded:
+            self.near_duplicates.load()
+
+        # Each provider packs keywords into as few queries as it can
+        plans = {provider: provider.plan_queries(keywords) for provider, keywords in assignments.items()}
+
+        # Pipeline: worker threads stream result pages into a bounded queue
+        # (a full queue holds the fetchers back); this thread dedups, classifies
+        # and saves each page as it lands; saves go to the write-behind buffer
+        # and alerts to the dispatcher's queue, so nothing waits on I/O here.
+        pages = queue.Queue(maxsize=self.pipeline_pages)
+        cancelled = threading.Event()
+        failed = set()  # (provider, keywords) whose pages failed processing
+        with ThreadPoolExecutor(max_workers=self.scan_workers) as pool:
+            pending = 0
+            # Interleave providers so no single provider's queue starves the pool
+            for i in range(max((len(plan) for plan in plans.values()), default=0)):
+                for provider, plan in plans.items():
+                    if i >= len(plan):
+                        continue
+                    query, keywords = plan[i]
+                    pool.submit(self._fetch, provider, query, keywords, blocked_providers, pages, cancelled, cursors)
+                    pending += 1
+
+            try:
+                while pending:
+                    kind, provider, keywords, payload = pages.get()
+                    if kind == "page":
+                        try:
+                            self._process_page(provider, keywords, *payload)
+                        except Exception as e:
+                            failed.add((provider, tuple(keywords)))
+                            self._scan_error(provider, e)
+                        continue
+
+                    pending -= 1
+                    if kind == "done" and (provider, tuple(keywords)) not in failed:
+                        self.rollups.record_search(provider.name)
+                        # Only fully processed searches move the cursor: otherwise
+                        # the same posts are fetched again and dropped by dedup
+                        for keyword in keywords:
+                            cursors.stage(provider, keyword, payload)
+                    elif kind == "error" and isinstance(payload, RateLimitExceeded):
+                        if provider in blocked_providers:
+                            continue
+                        if payload.local:
+                            # Real 429s were already counted on the worker thread
+                            self.rollups.record_rate_limit(provider.name)
+                            self.metrics.inc("xscout_rate_limited_total", provider=provider.name, source="local")
+                        print(f"    [!] {payload}. Skipping rest of scan for {provider.__class__.__name__}.")
+                        self.db.log("WARNING", f"Rate limit hit for {provider.__class__.__name__} - Skipping rest of cycle")
                         blocked_providers.add(provider)
-                    else:
-                        print(f"    ! Error scanning {provider.__class__.__name__}: {error_msg}")
-                        db_manager.log("ERROR", f"Scan error on {provider.__class__.__name__}: {error_msg}") 
+                    elif kind == "error":
+                        self._scan_error(provider, payload)
+            finally:
+                # If we stop early: fetchers blocked on a full queue give up,
+                # and queries not started yet are dropped
+                cancelled.set()
+                pool.shutdown(wait=False, cancel_futures=True)
 
+        self.rollups.record_scan(time.time() - started)
+        with self.metrics.time("xscout_stage_seconds", stage="persist"):
+            self._persist_state(cursors)
+        self._log_cycle(started)
         print("[Scheduler] Scan complete.")
 
-    def process_results(self, results, keyword):
+    def _process_page(self, provider, keywords, results, arrived):
+        self.metrics.observe("xscout_stage_seconds", time.perf_counter() - arrived, stage="page_queue_wait")
+        self.metrics.inc("xscout_posts_fetched_total", len(results), provider=provider.name)
+        print(f"  > {provider.__class__.__name__} returned {len(results)} results for {keywords}")
+        with self.metrics.time("xscout_stage_seconds", stage="process_results"):
+            self.process_results(results, keywords)
+
+    def _scan_error(self, provider, error):
+        error_msg = str(error)
+        self.rollups.record_error(provider.name)
+        self.metrics.inc("xscout_search_errors_total", provider=provider.name)
+        print(f"    ! Error scanning {provider.__class__.__name__}: {error_msg}")
+        self.db.log("ERROR", f"Scan error on {provider.__class__.__name__}: {error_msg}")
+
+    def _log_cycle(self, started):
+        """One structured record per scan: counts and stage timings of this cycle."""
+        duration = time.time() - started
+        self.metrics.observe("xscout_stage_seconds", duration, stage="cycle")
+        summary = {"event": "scan_cycle", "scan": self.scan_count + 1, "duration_s": round(duration, 3)}
+        summary.update(self.metrics.end_cycle())
+        record = json.dumps(summary, separators=(",", ":"))
+        print(f"[Metrics] {record}")
+        self.db.log("INFO", record)
+
+    def _persist_state(self, cursors=None):
+        # Advance cursors only once this cycle's leads are actually stored;
+        # otherwise the same posts are fetched again next cycle
+        cursors = cursors or self.cursors
+        with self.metrics.time("xscout_stage_seconds", stage="flush"):
+            flushed = self.db.flush()
+        if flushed:
+            cursors.commit()
+        else:
+            cursors.discard()
+
+        self.rollups.flush()
+        self.seen_index.save()
+        if self.near_duplicates:
+            self.near_duplicates.save()
+        for provider in self.providers:
+            provider.save_state()
+
+    def process_results(self, results, keywords):
+        if isinstance(keywords, str):
+            keywords = [keywords]
+        metrics = self.metrics
+        near = self.near_duplicates
         for post in results:
-            if db_manager.lead_exists(post['post_id']):
+            # Local index first; only ask the database when the index can't tell.
+            # Timed as separate stages so "dedup" is the index alone.
+            with metrics.time("xscout_stage_seconds", stage="dedup"):
+                seen = self.seen_index.contains(post['post_id'])
+            if seen is None:
+                with metrics.time("xscout_stage_seconds", stage="lead_exists"):
+                    seen = self.db.lead_exists(post['post_id'])
+            if seen:
+                self.seen_index.add(post['post_id'])
+                metrics.inc("xscout_posts_deduped_total")
                 continue  # Skip duplicates
 
+            # A repost or cross-post of a recent lead: link it to that lead
+            # rather than saving and alerting on it again
+            fingerprint = None
+            if near is not None:
+                with metrics.time("xscout_stage_seconds", stage="near_dup"):
+                    fingerprint = near.fingerprint(post['post_text'])
+                    match = near.find(fingerprint)
+                if match:
+                    self.db.add_duplicate(post, *match)
+                    self.seen_index.add(post['post_id'])
+                    metrics.inc("xscout_near_duplicates_total")
+                    continue
+
             # Analyze
-            analysis = self.classifier.analyze(post['post_text'])
+            with metrics.time("xscout_stage_seconds", stage="classify"):
+                analysis = self.classifier.analyze(post['post_text'])
             score = analysis['score']
             
             # Enrich data
-            post['matched_keyword'] = keyword
+            # Packed queries: attribute the keyword locally from the post text
+            post['matched_keyword'] = match_keyword(post['post_text'], keywords) or keywords[0]
             post['intent_score'] = score
             post['intent_label'] = analysis['label']
             post['contact_info'] = analysis['contact_info']
             
             # Save
-            db_manager.add_lead(post)
+            with metrics.time("xscout_stage_seconds", stage="save"):
+                self.db.add_lead(post)
+            self.seen_index.add(post['post_id'])
+            if near is not None:
+                near.add(post['post_id'], fingerprint)
+            self.rollups.record_lead(post['platform'], post['intent_label'])
+            metrics.inc("xscout_leads_saved_total")
             
             # Notify
             if score >= self.min_score:
                 if self.dry_run:
                     print(f"    [DRY-RUN] High intent lead found ({score}/10): {post['post_text'][:50]}...")
-                    db_manager.log("INFO", f"Dry-run lead found: {post['post_id']}")
+                    self.db.log("INFO", f"Dry-run lead found: {post['post_id']}")
                 else:
-                    print(f"    [ALERT] High intent lead found ({score}/10). Sending notification...")
-                    success = self.notifier.send_alert(post)
-                    if success:
-                        db_manager.mark_notified(post['post_id'])
-                        db_manager.log("INFO", f"Notification sent for {post['post_id']}")
-                    else:
-                        db_manager.log("ERROR", f"Failed to notify for {post['post_id']}")
-
-    def get_control_status(self):
-        try:
-            import json
-            import os
-            if os.path.exists("xscout/control.json"):
-                with open("xscout/control.json", "r") as f:
-                    return json.load(f)
-        except:
-            pass
-        return {"running": True, "trigger_now": False}
-
-    def reset_trigger(self):
+                    print(f"    [ALERT] High intent lead found ({score}/10). Queueing notification...")
+                    with metrics.time("xscout_stage_seconds", stage="notify_enqueue"):
+                        self.dispatcher.enqueue(post)
+
+    def _on_notified(self, lead):
+        # Runs on a dispatcher worker once the message was actually delivered
+        self.metrics.inc("xscout_notifications_total", result="sent")
+        self.db.mark_notified(lead['post_id'])
+        self.db.log("INFO", f"Notification sent for {lead['post_id']}")
+
+    def _on_notify_failed(self, lead):
+        self.metrics.inc("xscout_notifications_total", result="failed")
+        self.db.log("ERROR", f"Failed to notify for {lead['post_id']}")
+
+    def stop(self):
+        """Deliver queued notifications and persist local state before exit."""
+        if self.control:
+            self.control.stop()
+        self.dispatcher.close()
+        self._persist_state()
+
+    def initial_running_state(self):
+        """control.json is read once at startup for the initial paused/running
+        state; at runtime the agent is controlled through the control endpoint."""
         try:
-            import json
-            status = self.get_control_status()
-            status["trigger_now"] = False
-            with open("xscout/control.json", "w") as f:
-                json.dump(status, f)
-        except:
-            pass
+            if os.path.exists(CONTROL_FILE):
+                with open(CONTROL_FILE, "r") as f:
+                    return json.load(f).get("running", True)
+        except Exception as e:
+            print(f"[!] Could not read {CONTROL_FILE}: {e}")
+        return True
+
+    def status(self):
+        next_run = schedule.next_run()
+        return {
+            "running": not self.paused,
+            "scanning": self.scanning,
+            "dry_run": self.dry_run,
+            "scans": self.scan_count,
+            "last_scan_at": self.last_scan_at,
+            "next_run_at": next_run.isoformat() if next_run else None
+        }
+
+    def _scheduled_scan(self):
+        if self.paused:
+            print("[Scheduler] Paused. Skipping scheduled scan.")
+            return
+        self.scan()
 
     def start(self):
         interval = config.get("app.scan_interval_minutes", 15)
         print(f"[*] XScout Agent started. Scanning every {interval} minutes.")
         print(f"[*] Dry-run mode: {self.dry_run}")
+
+        self.paused = not self.initial_running_state()
+        self.control = ControlChannel(
+            self.status,
+            host=config.get("control.host", "127.0.0.1"),
+            port=config.get("control.port", 8765),
+            metrics_fn=self.metrics.render,
+            token=config.get("control.token")
+        )
+        self.control.start()
         
         # Run immediately once on startup
-        self.scan()
+        if not self.paused:
+            self.scan()
         
         # Schedule
-        schedule.every(interval).minutes.do(self.scan)
+        schedule.every(interval).minutes.do(self._scheduled_scan)
         
         print("[*] Waiting for schedule or manual triggers...")
         while True:
-            # Check Control File
-            status = self.get_control_status()
-            
-            # Manual Trigger
-            if status.get("trigger_now"):
-                print("[!] Manual trigger detected. Starting scan...")
-                self.reset_trigger()
+            # Block until a control command arrives or the next run is due
+            idle = schedule.idle_seconds()
+            command = self.control.wait(max(0, idle) if idle is not None else None)
+
+            if command == "trigger":
+                print("[!] Manual trigger received. Starting scan...")
                 self.scan()
-            
-            # Scheduled Run (only if running is True)
-            if status.get("running", True):
-                schedule.run_pending()
-            
-            time.sleep(1)
+            elif command == "pause":
+                print("[!] Scheduled scans paused.")
+                self.paused = True
+            elif command == "resume":
+                print("[!] Scheduled scans resumed.")
+                self.paused = False
+
+            # Paused runs are skipped inside the job so the schedule still advances
+            schedule.run_pending()
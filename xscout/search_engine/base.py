@@ -1,10 +1,58 @@
 from abc import ABC, abstractmethod
 
 class SearchProvider(ABC):
+    # Short identifier used for config sections (rate_limits.<name>, ...)
+    name = "base"
+    # Default request budget as (requests, window_seconds); None means unlimited
+    rate_limit = None
+    # Shared RateLimiter, attached by the scheduler
+    rate_limiter = None
+    # Results requested per search request (the scheduler's `count`)
+    page_size = 10
+
+    def wait_for_slot(self):
+        """Call before every API request. Blocks until the provider's budget
+        allows it, or raises RateLimitExceeded if that would take too long."""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(self)
+
+    def available(self):
+        """False when the provider has no credentials to search with; a
+        worker only claims tasks for providers it can actually serve."""
+        return True
+
+    def save_state(self):
+        """Persist any local caches. Called at the end of every scan."""
+        pass
+
+    def plan_queries(self, keywords):
+        """Group keywords into the queries actually sent, as (query, [keywords]).
+        Default: one query per keyword."""
+        return [(keyword, [keyword]) for keyword in keywords]
+
+    def cursor_from(self, results):
+        """High-water mark for a batch of results, passed back as `since` on
+        the next search for the same keyword. None if unsupported."""
+        return None
+
+    def cursor_order(self, cursor):
+        """Sort key for cursors, so they only ever move forward."""
+        return cursor
+
+    def stream(self, query, count=10, since=None):
+        """Yield result pages (lists in the search() format) as they arrive,
+        so the scheduler can process the first page while later ones are
+        still being fetched, and return the cursor to resume from (None
+        keeps the current one). Default: a single page with search()'s
+        results, and cursor_from() of them."""
+        results = self.search(query, count=count, since=since)
+        yield results
+        return self.cursor_from(results)
+
     @abstractmethod
-    def search(self, query, count=10):
+    def search(self, query, count=10, since=None):
         """
-        Search for posts matching the query.
+        Search for posts matching the query, newer than the `since` cursor if given.
         Must return a list of dictionaries with keys:
         - platform (str)
         - post_id (str)
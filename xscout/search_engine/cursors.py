@@ -0,0 +1,70 @@
+import os
+import json
+import threading
+
+class CursorStore:
+    """
+    High-water marks per (provider, keyword), persisted to a local JSON file.
+    Twitter cursors are since_id values, LinkedIn cursors ISO timestamps;
+    the store treats them as opaque strings. New positions are staged while a
+    scan runs and committed together, with one atomic file replace, once the
+    scan's results have been written to the database.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.cursors = self._load()
+        self.staged = {}
+
+    @staticmethod
+    def key(provider, keyword):
+        return f"{provider.name}:{keyword}"
+
+    def get(self, provider, keyword):
+        with self.lock:
+            return self.cursors.get(self.key(provider, keyword))
+
+    def stage(self, provider, keyword, value):
+        """Remember a new position; it takes effect on commit()."""
+        if value is None:
+            return
+        key = self.key(provider, keyword)
+        with self.lock:
+            current = self.staged.get(key, self.cursors.get(key))
+            # Cursors only ever move forward
+            if current is not None and provider.cursor_order(value) <= provider.cursor_order(current):
+                return
+            self.staged[key] = value
+
+    def commit(self):
+        with self.lock:
+            if not self.staged:
+                return
+            self.cursors.update(self.staged)
+            self.staged = {}
+            self._save()
+
+    def discard(self):
+        with self.lock:
+            self.staged = {}
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[Cursors] Could not load {self.path}: {e}")
+            return {}
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(self.cursors, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"[Cursors] Could not save {self.path}: {e}")
@@ -1,26 +1,133 @@
+import os
+import re
+import time
+import pickle
+import threading
 from .base import SearchProvider
-from datetime import datetime
-from linkedin_api import Linkedin
+from datetime import datetime, timezone
+
+# Activity ids are time-based: the top bits are the post's unix time in ms
+ACTIVITY_ID = re.compile(r"urn:li:activity:(\d+)")
+# Signs that LinkedIn no longer accepts the session (as opposed to a network
+# or server error): these exceptions, these statuses, or a redirect to these pages
+AUTH_ERRORS = {"UnauthorizedException", "ChallengeException"}
+AUTH_STATUSES = {401, 403}
+LOGIN_PAGES = ("/login", "/uas/login", "/checkpoint", "/authwall")
+# A failed login is retried after this long, not on every search:
+# repeated logins are what trigger account challenges
+LOGIN_RETRY_SECONDS = 30 * 60
 
 class LinkedInProvider(SearchProvider):
-    def __init__(self, email=None, password=None):
+    name = "linkedin"
+    # Unofficial API: keep volume low to avoid account challenges
+    rate_limit = (30, 15 * 60)
+
+    def __init__(self, email=None, password=None, session_path=None):
+        # Login is deferred to the first search, so constructing the provider is free
+        self.email = email
+        self.password = password
+        self.session_path = session_path
+        self.enabled = bool(email and password and email != "YOUR_LINKEDIN_EMAIL")
         self.client = None
-        if email and password and email != "YOUR_LINKEDIN_EMAIL":
+        self.session_from_cache = False
+        self.next_login_at = 0.0
+        self.login_lock = threading.Lock()
+        # Last HTTP response per thread, to tell auth failures from other errors
+        self.responses = threading.local()
+
+    def _ensure_client(self):
+        if self.client or not self.enabled:
+            return self.client
+        with self.login_lock:
+            if self.client or time.time() < self.next_login_at:
+                return self.client
+            # Imported here so agent startup doesn't pay for it
+            from linkedin_api import Linkedin
+            cookies = self._load_session()
             try:
-                self.client = Linkedin(email, password)
+                if cookies is not None:
+                    # Reuse the saved session instead of a full (challenge-prone) login
+                    self.client = Linkedin(self.email, self.password, cookies=cookies)
+                    self.session_from_cache = True
+                else:
+                    self.client = Linkedin(self.email, self.password)
+                    self.session_from_cache = False
+                    self._save_session()
             except Exception as e:
-                print(f"[LinkedIn] Auth Error: {e}")
+                self.next_login_at = time.time() + LOGIN_RETRY_SECONDS
+                print(f"[LinkedIn] Auth Error: {e}. Retrying login in {LOGIN_RETRY_SECONDS // 60} minutes.")
+                return None
+            self.client.client.session.hooks["response"].append(self._track_response)
+        return self.client
+
+    def _track_response(self, response, *args, **kwargs):
+        self.responses.last = response
+
+    def _auth_rejected(self, error=None):
+        """True if the session was refused (401/403, challenge, redirect to
+        the login page), False for network and server errors."""
+        if error is not None and type(error).__name__ in AUTH_ERRORS:
+            return True
+        response = getattr(error, "response", None) or getattr(self.responses, "last", None)
+        if response is None:
+            return False
+        pages = [response.url] + [r.url for r in getattr(response, "history", [])]
+        return response.status_code in AUTH_STATUSES or any(p in (url or "") for url in pages for p in LOGIN_PAGES)
 
-    def search(self, query, count=10):
-        if not self.client:
-            print(f"[LinkedIn] No valid credentials. Skipping search for '{query}'")
+    def _load_session(self):
+        """Saved cookie jar, or None if missing or the session has expired."""
+        if not self.session_path or not os.path.exists(self.session_path):
+            return None
+        try:
+            with open(self.session_path, "rb") as f:
+                cookies = pickle.load(f)
+        except Exception as e:
+            print(f"[LinkedIn] Could not read session cache: {e}")
+            return None
+        # JSESSIONID carries the session expiry
+        for cookie in cookies:
+            if cookie.name == "JSESSIONID" and cookie.expires and cookie.expires > time.time():
+                return cookies
+        return None
+
+    def _save_session(self):
+        if not self.session_path or not self.client:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.session_path)), exist_ok=True)
+            with open(self.session_path, "wb") as f:
+                pickle.dump(self.client.client.session.cookies, f)
+        except Exception as e:
+            print(f"[LinkedIn] Could not save session cache: {e}")
+
+    def _invalidate_session(self, retry_now=False):
+        """Drop a session that stopped working. The next search logs in again,
+        at once if retry_now, else after LOGIN_RETRY_SECONDS."""
+        with self.login_lock:
+            self.client = None
+            self.session_from_cache = False
+            self.next_login_at = 0.0 if retry_now else time.time() + LOGIN_RETRY_SECONDS
+            if self.session_path and os.path.exists(self.session_path):
+                os.remove(self.session_path)
+
+    def available(self):
+        return self.enabled
+
+    def search(self, query, count=10, since=None):
+        if not self._ensure_client():
+            print(f"[LinkedIn] Not logged in. Skipping search for '{query}'")
             return []
 
+        self.wait_for_slot()
         print(f"[LinkedIn] Searching for: {query}")
+        self.responses.last = None
         try:
             # Note: search_posts is not officially documented in standard lib, usually requires 'search'
             # Using basic search for content (this is brittle as unofficial API)
             results = self.client.search({'keywords': query}, limit=count)
+            if self._auth_rejected():
+                # The library reads a 401 body as an empty result
+                raise PermissionError(f"HTTP {self.responses.last.status_code}")
             
             # Since the unofficial API response structure varies, we wrap carefully
             # Ideally this library finds people/jobs. Post search is tricky.
@@ -38,10 +145,59 @@ class LinkedInProvider(SearchProvider):
                     "post_text": item.get('title', {}).get('text', '') + " " + item.get('subline', {}).get('text', ''),
                     "username": "Unknown", # scraping full details is expensive
                     "profile_url": f"https://www.linkedin.com/feed/update/{urn}",
-                    "timestamp": datetime.now()
+                    "timestamp": self._post_time(item)
                 })
+            since_ts = self._cursor_time(since) if since else None
+            if since_ts:
+                # No server-side filter; drop anything not newer than the cursor.
+                # Posts without a known time are kept and left to dedup
+                parsed_results = [
+                    post for post in parsed_results
+                    if post['timestamp'] is None or post['timestamp'] > since_ts
+                ]
             return parsed_results
 
         except Exception as e:
-            print(f"[LinkedIn] Error: {e}")
+            if not self._auth_rejected(e):
+                # Network or server trouble: keep the session, try again next search
+                print(f"[LinkedIn] Error: {e}")
+                return []
+            if self.session_from_cache:
+                print(f"[LinkedIn] Cached session rejected ({e}). Logging in again...")
+                self._invalidate_session(retry_now=True)
+                return self.search(query, count=count, since=since)
+            print(f"[LinkedIn] Session rejected ({e}). Retrying login in {LOGIN_RETRY_SECONDS // 60} minutes.")
+            self._invalidate_session()
             return []
+
+    @staticmethod
+    def _post_time(item):
+        """When the post was published (UTC), from createdAt if the payload
+        has it, else from the activity id in its URN; None if neither."""
+        created = item.get('createdAt') or (item.get('created') or {}).get('time')
+        if isinstance(created, (int, float)):
+            return datetime.fromtimestamp(created / 1000, tz=timezone.utc)
+        for urn in (item.get('urn'), item.get('entityUrn'), item.get('trackingUrn')):
+            match = ACTIVITY_ID.search(urn or '')
+            if match:
+                published = datetime.fromtimestamp((int(match.group(1)) >> 22) / 1000, tz=timezone.utc)
+                # Not a time-based id if it decodes to nonsense
+                if datetime(2003, 1, 1, tzinfo=timezone.utc) < published <= datetime.now(timezone.utc):
+                    return published
+        return None
+
+    @staticmethod
+    def _cursor_time(cursor):
+        published = datetime.fromisoformat(cursor)
+        # Cursors from before post times were parsed hold local scan times
+        return published if published.tzinfo else None
+
+    def cursor_from(self, results):
+        times = [post['timestamp'] for post in results if post['timestamp']]
+        if not times:
+            return None
+        return max(times).isoformat()
+
+    def cursor_order(self, cursor):
+        # A legacy scan-time cursor sorts first, so any real post time replaces it
+        return self._cursor_time(cursor) or datetime.min.replace(tzinfo=timezone.utc)
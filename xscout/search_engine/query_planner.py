@@ -0,0 +1,69 @@
+import re
+
+TOKEN_PATTERN = re.compile(r"[\w']+")
+
+
+def _clause(keyword):
+    """Query clause for one keyword. Multi-word keywords are grouped so OR
+    binds them as a unit: (need a website)."""
+    keyword = keyword.strip()
+    if " " in keyword and not (keyword.startswith('"') and keyword.endswith('"')):
+        return f"({keyword})"
+    return keyword
+
+
+class QueryPlanner:
+    """
+    Packs keywords into as few OR-combined queries as fit the provider's
+    query-length limit, e.g. (need a website) OR (hire web developer).
+    """
+
+    def __init__(self, max_length=512, suffix=""):
+        self.max_length = max_length
+        self.suffix = suffix
+
+    def build(self, keywords):
+        return " OR ".join(_clause(k) for k in keywords)
+
+    def plan(self, keywords):
+        """Returns a list of (query, [keywords]) groups, keeping keyword order."""
+        budget = self.max_length - len(self.suffix)
+        groups = []
+        current = []
+        for keyword in keywords:
+            candidate = current + [keyword]
+            if current and len(self.query_for(candidate)) > budget:
+                groups.append(current)
+                current = [keyword]
+            else:
+                current = candidate
+        if current:
+            groups.append(current)
+        return [(self.query_for(group), group) for group in groups]
+
+    def query_for(self, group):
+        if len(group) == 1:
+            return group[0].strip()
+        # Wrap the OR-group so trailing operators apply to all of it
+        return f"({self.build(group)})"
+
+
+def match_keyword(text, keywords):
+    """
+    Which keyword a post was returned for. Mirrors the search semantics:
+    a quoted keyword must appear as a phrase, otherwise all of its words must
+    appear somewhere in the text. Returns None if nothing matches.
+    """
+    lowered = (text or "").lower()
+    words = set(TOKEN_PATTERN.findall(lowered))
+    for keyword in keywords:
+        keyword_lower = keyword.lower().strip()
+        if keyword_lower.startswith('"') and keyword_lower.endswith('"'):
+            phrase = " ".join(TOKEN_PATTERN.findall(keyword_lower))
+            if phrase and phrase in " ".join(TOKEN_PATTERN.findall(lowered)):
+                return keyword
+        else:
+            terms = TOKEN_PATTERN.findall(keyword_lower)
+            if terms and all(term in words for term in terms):
+                return keyword
+    return None
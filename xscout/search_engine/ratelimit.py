@@ -0,0 +1,115 @@
+import time
+import threading
+
+
+class RateLimitExceeded(Exception):
+    """Raised by providers when the API (or our own budget) says stop.
+    reset_at is a unix timestamp when the quota resets, if known. local is
+    True when our own budget refused the request before it was sent."""
+
+    def __init__(self, provider, reset_at=None, local=False):
+        self.provider = provider
+        self.reset_at = reset_at
+        self.local = local
+        when = time.strftime('%H:%M:%S', time.localtime(reset_at)) if reset_at else "unknown"
+        super().__init__(f"429 Too Many Requests - {provider} rate limit (resets at {when})")
+
+
+class TokenBucket:
+    """Classic token bucket sized to an API window, e.g. 60 requests / 15 min.
+    A 429 with a reset header empties the bucket until that time, after which
+    the full window budget is restored."""
+
+    def __init__(self, capacity, window_seconds):
+        self.capacity = capacity
+        self.refill_rate = capacity / float(window_seconds)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0  # unix time, from API reset headers
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.blocked_until:
+            # No refill while blocked; the restored budget is already in self.tokens
+            if time.time() >= self.blocked_until:
+                self.blocked_until = 0.0
+        else:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until a token is available (without reserving it)."""
+        with self.lock:
+            self._refill()
+            return self._wait_time()
+
+    def _wait_time(self):
+        wait = max(0.0, self.blocked_until - time.time()) if self.blocked_until else 0.0
+        if self.tokens < 1:
+            wait += (1 - self.tokens) / self.refill_rate
+        return wait
+
+    def reserve(self, max_wait):
+        """Reserve a token. Returns seconds the caller must sleep, or None if
+        that would be longer than max_wait (nothing is reserved then)."""
+        with self.lock:
+            self._refill()
+            wait = self._wait_time()
+            if wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+    def block_until(self, reset_at):
+        with self.lock:
+            self._refill()
+            if reset_at > self.blocked_until:
+                self.blocked_until = reset_at
+                # The API hands out a fresh window at reset time
+                self.tokens = float(self.capacity)
+
+
+class RateLimiter:
+    """One token bucket per provider. Lives on the scheduler, so budget state
+    carries across scan cycles."""
+
+    def __init__(self, config):
+        self.config = config
+        # A waiting request holds its provider's concurrency slot, so only
+        # short waits are worth it; longer ones skip the provider this cycle
+        self.max_wait = config.get("rate_limits.max_wait_seconds", 30)
+        self.default_backoff = config.get("rate_limits.default_backoff_seconds", 60)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, provider):
+        with self.lock:
+            if provider.name not in self.buckets:
+                requests = self.config.get(f"rate_limits.{provider.name}.requests")
+                window = self.config.get(f"rate_limits.{provider.name}.window_seconds")
+                if requests is None and provider.rate_limit:
+                    requests, window = provider.rate_limit
+                # No budget configured: effectively unlimited, but 429 resets are still honoured
+                self.buckets[provider.name] = TokenBucket(requests or 1000000, window or 1)
+            return self.buckets[provider.name]
+
+    def acquire(self, provider):
+        """Block until the provider may send one request. Raises RateLimitExceeded
+        if the wait would exceed rate_limits.max_wait_seconds."""
+        bucket = self.bucket(provider)
+        wait = bucket.reserve(self.max_wait)
+        if wait is None:
+            raise RateLimitExceeded(provider.name, time.time() + bucket.wait_time(), local=True)
+        if wait > 0:
+            if wait >= 1:
+                print(f"    [RateLimit] {provider.name}: waiting {wait:.0f}s for budget")
+            time.sleep(wait)
+
+    def record_rate_limited(self, provider, reset_at=None):
+        """Called on a 429. Sleeps will last only until the API's reset time."""
+        reset_at = reset_at or time.time() + self.default_backoff
+        self.bucket(provider).block_until(reset_at)
+
+    def can_wait(self, provider):
+        return self.bucket(provider).wait_time() <= self.max_wait
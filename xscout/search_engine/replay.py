@@ -0,0 +1,193 @@
+import json
+import time
+import random
+import threading
+from collections import OrderedDict, deque
+from .base import SearchProvider
+from .ratelimit import RateLimitExceeded
+
+
+class RecordingProvider(SearchProvider):
+    """
+    Wraps a real provider and appends every search to a JSONL file:
+    {"provider", "query", "since", "latency", "results"} per call, or
+    "rate_limited" / "error" instead of results when the call failed.
+    Results are recorded as the provider returns them (already parsed), which
+    is what the rest of the pipeline consumes.
+    """
+
+    def __init__(self, provider, path):
+        self.provider = provider
+        self.path = path
+        self.name = provider.name
+        self.rate_limit = provider.rate_limit
+        self.lock = threading.Lock()
+
+    @property
+    def page_size(self):
+        return self.provider.page_size
+
+    @property
+    def rate_limiter(self):
+        return self.provider.rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, limiter):
+        # The wrapped provider calls wait_for_slot() itself
+        self.provider.rate_limiter = limiter
+
+    def search(self, query, count=10, since=None):
+        return [post for page in self.stream(query, count=count, since=since) for post in page]
+
+    def stream(self, query, count=10, since=None):
+        # One line per call, with the pages' results concatenated
+        record = {"provider": self.name, "query": query, "since": since}
+        results = []
+        started = time.monotonic()
+        stream = self.provider.stream(query, count=count, since=since)
+        try:
+            while True:
+                try:
+                    page = next(stream)
+                except StopIteration as stop:
+                    # The wrapped provider's resume cursor
+                    return stop.value
+                results.extend(page)
+                yield page
+        except RateLimitExceeded as e:
+            if e.local:
+                # Our own budget refused it; nothing was sent
+                record = None
+            else:
+                record["rate_limited"] = {"reset_at": e.reset_at}
+            raise
+        except Exception as e:
+            record["error"] = str(e)
+            raise
+        finally:
+            if record is not None:
+                if "rate_limited" not in record and "error" not in record:
+                    # Also when the consumer stopped early: what it did receive
+                    record["results"] = results
+                record["latency"] = round(time.monotonic() - started, 4)
+                self._write(record)
+
+    def _write(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+    def available(self):
+        return self.provider.available()
+
+    def save_state(self):
+        self.provider.save_state()
+
+    def plan_queries(self, keywords):
+        return self.provider.plan_queries(keywords)
+
+    def cursor_from(self, results):
+        return self.provider.cursor_from(results)
+
+    def cursor_order(self, cursor):
+        return self.provider.cursor_order(cursor)
+
+
+class ReplayProvider(SearchProvider):
+    """
+    Serves recorded or synthetic result pages instead of calling an API.
+    Each search pops the next page queued for that exact query, or the next
+    page of any query once those run out; an exhausted replay returns [].
+
+    latency / jitter simulate the API round trip (seconds), and
+    rate_limit_rate is the chance that a request raises a 429 whose quota
+    resets after reset_seconds. Recorded 429s and errors are replayed in place
+    of their page (429s also reset after reset_seconds).
+    """
+
+    def __init__(self, name, pages=None, latency=0.0, jitter=0.0, rate_limit_rate=0.0,
+                 reset_seconds=0.0, seed=None):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.reset_seconds = reset_seconds
+        self.random = random.Random(seed)
+        self.pages = OrderedDict()  # query -> deque of records
+        self.requests = 0
+        self.rate_limited = 0
+        self.lock = threading.Lock()
+        for query, record in pages or []:
+            self.add_page(query, record)
+
+    @classmethod
+    def from_jsonl(cls, path, provider, **kwargs):
+        """Replay of the calls a RecordingProvider made for one provider."""
+        replay = cls(f"replay-{provider}", **kwargs)
+        with open(path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("provider") == provider:
+                    replay.add_page(record.get("query"), record)
+        return replay
+
+    @staticmethod
+    def recorded_providers(path):
+        with open(path, "r") as f:
+            names = [json.loads(line).get("provider") for line in f if line.strip()]
+        return list(dict.fromkeys(name for name in names if name))
+
+    def add_page(self, query, record):
+        """record is a recorded call, or just a list of result dicts."""
+        if isinstance(record, list):
+            record = {"results": record}
+        with self.lock:
+            self.pages.setdefault(query, deque()).append(record)
+
+    def plan_queries(self, keywords):
+        # Without configured keywords, replay the recorded queries themselves
+        if not keywords:
+            with self.lock:
+                return [(query, [query]) for query in self.pages if query]
+        return super().plan_queries(keywords)
+
+    def pending(self):
+        with self.lock:
+            return sum(len(pages) for pages in self.pages.values())
+
+    def _next_page(self, query):
+        with self.lock:
+            pages = self.pages.get(query)
+            if not pages:
+                pages = next((p for p in self.pages.values() if p), None)
+            return pages.popleft() if pages else None
+
+    def search(self, query, count=10, since=None):
+        self.wait_for_slot()
+        with self.lock:
+            self.requests += 1
+            inject = self.rate_limit_rate and self.random.random() < self.rate_limit_rate
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            time.sleep(delay)
+        if inject:
+            self._count_rate_limited()
+            raise RateLimitExceeded(self.name, reset_at=time.time() + self.reset_seconds)
+
+        record = self._next_page(query)
+        if record is None:
+            return []
+        if "rate_limited" in record:
+            self._count_rate_limited()
+            raise RateLimitExceeded(self.name, reset_at=time.time() + self.reset_seconds)
+        if "error" in record:
+            raise Exception(record["error"])
+        # Copies: the scheduler enriches result dicts in place
+        return [dict(post) for post in record.get("results", [])]
+
+    def _count_rate_limited(self):
+        with self.lock:
+            self.rate_limited += 1
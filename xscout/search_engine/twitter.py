@@ -1,50 +1,178 @@
 from .base import SearchProvider
+from .ratelimit import RateLimitExceeded
+from .query_planner import QueryPlanner
 from datetime import datetime
 import tweepy
 
+QUERY_SUFFIX = " -is:retweet lang:en"
+
 class TwitterProvider(SearchProvider):
-    def __init__(self, api_key=None):
+    name = "twitter"
+    # Recent search on the Basic tier: 60 requests per 15-minute window
+    rate_limit = (60, 15 * 60)
+    # max_results ceiling of recent search; fewer requests per cycle
+    page_size = 100
+
+    def __init__(self, api_key=None, max_query_length=512, max_pages=1):
         self.client = None
-        if api_key and api_key != "YOUR_TWITTER_BEARER_TOKEN":
+        # Basic tier allows 512 characters per query, Pro 4096
+        self.planner = QueryPlanner(max_length=max_query_length, suffix=QUERY_SUFFIX)
+        self.max_pages = max_pages
+        self.api_key = api_key if api_key != "YOUR_TWITTER_BEARER_TOKEN" else None
+
+    def _ensure_client(self):
+        # Created on first search so constructing the provider stays cheap
+        if not self.client and self.api_key:
             try:
-                self.client = tweepy.Client(bearer_token=api_key)
+                self.client = tweepy.Client(bearer_token=self.api_key)
             except Exception as e:
                 print(f"[Twitter] Init Error: {e}")
+                self.api_key = None
+        return self.client
+
+    def available(self):
+        return bool(self.api_key)
 
-    def search(self, query, count=10):
-        if not self.client:
+    def search(self, query, count=10, since=None):
+        return [post for page in self.stream(query, count=count, since=since) for post in page]
+
+    def stream(self, query, count=10, since=None):
+        """Yields each page of up to 100 tweets as soon as it is fetched, and
+        returns the cursor to resume from (see _next_cursor)."""
+        if not self._ensure_client():
             print(f"[Twitter] No valid API key. Skipping search for '{query}'")
-            return []
+            return None
 
         print(f"[Twitter] Searching for: {query}")
+        since_id, until_id, newest = self._positions(since)
+        oldest = None
+        fetched = 0
+        next_token = None
+        complete = False
         try:
-            # Search recent tweets (requires Basic or Pro tier for comprehensive access, Free is very limited)
-            response = self.client.search_recent_tweets(
-                query=f"{query} -is:retweet lang:en",
-                max_results=min(count, 100),
-                tweet_fields=['created_at', 'author_id', 'text']
-            )
-            
-            if not response.data:
-                return []
-
-            results = []
-            for tweet in response.data:
-                results.append({
-                    "platform": "Twitter",
-                    "post_id": str(tweet.id),
-                    "post_text": tweet.text,
-                    "username": str(tweet.author_id), # Requires user expansion to get handle
-                    "profile_url": f"https://twitter.com/i/user/{tweet.author_id}",
-                    "timestamp": tweet.created_at or datetime.now()
-                })
-            return results
+            # Newest first; max_pages bounds how far back one cycle catches up
+            for page in range(self.max_pages):
+                self.wait_for_slot()
+                # Search recent tweets (requires Basic or Pro tier for comprehensive access, Free is very limited)
+                try:
+                    response = self._search_recent(query, count, since_id, next_token, until_id)
+                except tweepy.BadRequest as e:
+                    # since_id older than the 7-day search window is rejected; start fresh
+                    if not since_id or "since_id" not in str(e):
+                        raise
+                    since_id = until_id = None
+                    self.wait_for_slot()
+                    response = self._search_recent(query, count, None, next_token)
+
+                next_token = (response.meta or {}).get("next_token")
+                page_results = self._parse(response)
+                fetched += len(page_results)
+                ids = [int(post["post_id"]) for post in page_results]
+                if ids:
+                    oldest = min(ids) if oldest is None else min(oldest, *ids)
+                    newest = max(ids) if newest is None else max(newest, *ids)
+                yield page_results
+                if not next_token:
+                    complete = True
+                    break
 
+        except (tweepy.TooManyRequests, RateLimitExceeded) as e:
+            if not fetched:
+                if isinstance(e, RateLimitExceeded):
+                    raise
+                # Re-raise with the reset time so the scheduler sleeps only until then
+                raise RateLimitExceeded(self.name, self._reset_time(e.response))
+            # Out of budget mid-pagination: the pages already yielded stand
+            if isinstance(e, tweepy.TooManyRequests) and self.rate_limiter:
+                self.rate_limiter.record_rate_limited(self, self._reset_time(e.response))
+            print(f"[Twitter] Rate limited after {fetched} results. Stopping pagination.")
         except Exception as e:
-            # Re-raise so scheduler can handle rate limits logic
-            error_str = str(e)
-            if "429" in error_str:
-                raise Exception(f"429 Too Many Requests - Rate Limit Exceeded")
-            
             print(f"[Twitter] Error: {e}")
-            return []
+        return self._next_cursor(since_id, oldest, newest, complete)
+
+    @staticmethod
+    def _positions(cursor):
+        """(since_id, until_id, newest_id) of a cursor: a plain since_id, or
+        "since:until:newest" while the tweets between since and until, left
+        over from a search that was cut short, are still to be fetched."""
+        if not cursor:
+            return None, None, None
+        parts = [int(part) for part in str(cursor).split(":")]
+        if len(parts) == 3:
+            return tuple(parts)
+        return parts[0], None, None
+
+    @staticmethod
+    def _next_cursor(since_id, oldest, newest, complete):
+        if newest is None:
+            return None
+        if complete or since_id is None:
+            # Everything after since_id was fetched (a first search with no
+            # since_id starts from now rather than paging back 7 days)
+            return str(newest)
+        if oldest is None:
+            # Stopped before the first page: resume from the same place
+            return None
+        # Cut short by max_pages, a 429 or an error: tweets between since_id
+        # and the oldest one fetched are searched next time (until_id), and
+        # the cursor moves to newest only once that gap is closed
+        print(f"[Twitter] Search cut short; tweets between {since_id} and {oldest} are fetched next cycle.")
+        return f"{since_id}:{oldest}:{newest}"
+
+    def _search_recent(self, query, count, since, next_token=None, until=None):
+        return self.client.search_recent_tweets(
+            query=f"{query}{QUERY_SUFFIX}",
+            max_results=min(max(count, 10), 100),
+            since_id=since,
+            until_id=until,
+            next_token=next_token,
+            tweet_fields=['created_at', 'author_id', 'text'],
+            # Handles come back in the same response instead of as numeric ids
+            expansions=['author_id'],
+            user_fields=['username', 'name']
+        )
+
+    def _parse(self, response):
+        # The author_id expansion returns the author of every tweet on the page
+        authors = {user.id: user.username for user in (response.includes or {}).get("users", [])}
+
+        results = []
+        for tweet in response.data or []:
+            username = authors.get(tweet.author_id)
+            if username:
+                profile_url = f"https://twitter.com/{username}"
+            else:
+                username = str(tweet.author_id)
+                profile_url = f"https://twitter.com/i/user/{tweet.author_id}"
+            results.append({
+                "platform": "Twitter",
+                "post_id": str(tweet.id),
+                "post_text": tweet.text,
+                "username": username,
+                "profile_url": profile_url,
+                "timestamp": tweet.created_at or datetime.now()
+            })
+        return results
+
+    def plan_queries(self, keywords):
+        # Pack keywords into OR-queries: one request covers several keywords
+        return self.planner.plan(keywords)
+
+    def cursor_from(self, results):
+        # since_id: the newest tweet id we have seen
+        if not results:
+            return None
+        return str(max(int(post['post_id']) for post in results))
+
+    def cursor_order(self, cursor):
+        # A gap still to fetch above since_id is ahead of plain since_id, and
+        # the lower its until_id the less of it is left
+        since_id, until_id, _ = self._positions(cursor)
+        return (since_id, 0) if until_id is None else (since_id, 1, -until_id)
+
+    @staticmethod
+    def _reset_time(response):
+        try:
+            return float(response.headers["x-rate-limit-reset"])
+        except (AttributeError, KeyError, TypeError, ValueError):
+            return None
@@ -0,0 +1,203 @@
+import threading
+from .config.loader import config
+from .control import ControlChannel
+
+
+class LeasedTasks:
+    """
+    Stands in for the scheduler's CursorStore during a worker's scan: cursors
+    come from the leased task rows, stage() marks a task finished, commit()
+    completes the finished tasks and hands the rest back for a retry, and
+    discard() hands back all of them.
+    """
+
+    def __init__(self, table, worker_id, tasks, interval_seconds, retry_seconds):
+        self.table = table
+        self.worker_id = worker_id
+        self.interval_seconds = interval_seconds
+        self.retry_seconds = retry_seconds
+        self.tasks = {(task["provider"], task["keyword"]): task for task in tasks}
+        self.finished = {}  # task id -> new cursor, or None to keep the old one
+        self.lock = threading.Lock()
+
+    def ids(self):
+        with self.lock:
+            return [task["id"] for task in self.tasks.values()]
+
+    def get(self, provider, keyword):
+        task = self.tasks.get((provider.name, keyword))
+        return task["cursor"] if task else None
+
+    def stage(self, provider, keyword, value):
+        task = self.tasks.get((provider.name, keyword))
+        if task is None:
+            return
+        with self.lock:
+            current = self.finished.get(task["id"]) or task["cursor"]
+            # Cursors only ever move forward
+            if value is not None and (current is None or provider.cursor_order(value) > provider.cursor_order(current)):
+                self.finished[task["id"]] = value
+            else:
+                self.finished.setdefault(task["id"], None)
+
+    def commit(self):
+        with self.lock:
+            finished = self.finished
+            unfinished = [task["id"] for task in self.tasks.values() if task["id"] not in finished]
+            self.tasks, self.finished = {}, {}
+        if finished:
+            self.table.complete(self.worker_id, finished, self.interval_seconds)
+        if unfinished:
+            # Rate limited or failed: due again after retry_seconds, for any worker
+            self.table.release(self.worker_id, unfinished, self.retry_seconds, "not finished in scan")
+
+    def discard(self):
+        with self.lock:
+            ids = [task["id"] for task in self.tasks.values()]
+            self.tasks, self.finished = {}, {}
+        if ids:
+            self.table.release(self.worker_id, ids, self.retry_seconds, "scan results not stored")
+
+
+class LeaseHeartbeat:
+    """Renews a batch's leases from a background thread while it is scanned."""
+
+    def __init__(self, table, worker_id, ids, lease_seconds):
+        self.table = table
+        self.worker_id = worker_id
+        self.ids = list(ids)
+        self.lease_seconds = lease_seconds
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+
+    def _run(self):
+        # Three renewals per lease period, so one slow round trip doesn't lose it
+        while self.ids and not self.stop_event.wait(self.lease_seconds / 3):
+            try:
+                held = set(self.table.renew(self.worker_id, self.ids, self.lease_seconds))
+            except Exception as e:
+                print(f"[Worker] Lease renewal failed: {e}")
+                continue
+            lost = [i for i in self.ids if i not in held]
+            if lost:
+                # Another worker took them over; our results for them won't be recorded
+                print(f"[Worker] Lost {len(lost)} leases: {', '.join(lost)}")
+                self.ids = [i for i in self.ids if i in held]
+
+
+class ScanWorker:
+    """
+    Distributed mode (main.py --worker). Every provider x keyword of the shared
+    config is a task in the work table; each worker process claims a batch of
+    due tasks for the providers it has credentials for, scans them as one
+    cycle and reports back, and a task is due again scan_interval_minutes
+    after it completes. A heartbeat renews the batch's leases during the
+    scan; if a worker dies or stalls its leases expire and the next claim by
+    any worker picks the tasks up.
+    """
+
+    def __init__(self, agent, table, worker_id):
+        self.agent = agent
+        self.table = table
+        self.worker_id = worker_id
+        self.lease_seconds = config.get("worker.lease_seconds", 120)
+        self.batch_size = config.get("worker.batch_size", 20)
+        self.poll_seconds = config.get("worker.poll_seconds", 15)
+        self.retry_seconds = config.get("worker.retry_seconds", 60)
+        self.synced_keywords = None
+        self.leased = 0
+        # Other workers store leads too, so a miss in the local dedup index
+        # has to be confirmed by the database
+        agent.seen_index.exclusive = False
+
+    def sync(self):
+        keywords = list(self.agent.keywords)
+        if keywords == self.synced_keywords:
+            return
+        self.table.sync([(provider.name, keyword) for provider in self.agent.providers for keyword in keywords])
+        self.synced_keywords = keywords
+        print(f"[Worker] Work table: {len(keywords)} keywords x {len(self.agent.providers)} providers")
+
+    def run_once(self):
+        """Claim one batch of due tasks and scan it. Returns the number claimed."""
+        # Before the claim, so edited keywords are in the table first
+        config.reload_if_changed()
+        self.sync()
+        providers = {provider.name: provider for provider in self.agent.providers if provider.available()}
+        tasks = self.table.claim(self.worker_id, list(providers), self.batch_size, self.lease_seconds)
+        if not tasks:
+            return 0
+
+        taken_over = [task for task in tasks if task.get("previous_owner") not in (None, self.worker_id)]
+        if taken_over:
+            owners = sorted({task["previous_owner"] for task in taken_over})
+            print(f"[Worker] Took over {len(taken_over)} expired leases from {', '.join(owners)}")
+        print(f"[Worker] {self.worker_id} claimed {len(tasks)} tasks")
+
+        assignments = {}
+        for task in tasks:
+            assignments.setdefault(providers[task["provider"]], []).append(task["keyword"])
+        batch = LeasedTasks(
+            self.table, self.worker_id, tasks,
+            interval_seconds=float(config.get("app.scan_interval_minutes", 15)) * 60,
+            retry_seconds=self.retry_seconds
+        )
+        heartbeat = LeaseHeartbeat(self.table, self.worker_id, batch.ids(), self.lease_seconds)
+        heartbeat.start()
+        self.leased = len(tasks)
+        try:
+            self.agent.scan(assignments=assignments, cursors=batch)
+        finally:
+            heartbeat.stop()
+            self.leased = 0
+            # Nothing left after a normal scan; frees the leases if it raised
+            batch.discard()
+        return len(tasks)
+
+    def status(self):
+        return {**self.agent.status(), "worker_id": self.worker_id, "leased_tasks": self.leased}
+
+    def run(self):
+        agent = self.agent
+        print(f"[*] XScout worker {self.worker_id} started. Polling for tasks every {self.poll_seconds}s.")
+        print(f"[*] Dry-run mode: {agent.dry_run}")
+
+        agent.paused = not agent.initial_running_state()
+        agent.control = ControlChannel(
+            self.status,
+            host=config.get("control.host", "127.0.0.1"),
+            port=config.get("control.port", 8765),
+            metrics_fn=agent.metrics.render
+        )
+        agent.control.start()
+
+        while True:
+            claimed = self._run_batch() if not agent.paused else 0
+            # While tasks keep coming, claim again at once (commands still get through)
+            command = agent.control.wait(0 if claimed else self.poll_seconds)
+            if command == "trigger":
+                print("[!] Manual trigger received. Claiming tasks...")
+                self._run_batch()
+            elif command == "pause":
+                print("[!] Worker paused.")
+                agent.paused = True
+            elif command == "resume":
+                print("[!] Worker resumed.")
+                agent.paused = False
+
+    def _run_batch(self):
+        try:
+            return self.run_once()
+        except Exception as e:
+            # Work table unreachable: try again on the next poll
+            print(f"[Worker] Work table error: {e}")
+            return 0